@@ -25,21 +25,51 @@ POST /evaluate
 import os
 import sys
 import sqlite3
-from typing import Dict, Any
-from flask import Flask, request, jsonify, g
+import threading
+from collections import OrderedDict
+import json
+from typing import Dict, List, Any, Optional
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 import module2_models as m2    
 import module3_evaluator as evalmod 
 import module4_recommender as recmod
+import module6_index as idxmod
+import module7_role_similarity as rolesim
+import module10_admission as admission
+import module11_jobs as jobsmod
+import module12_partitions as partmod
+import module15_compression as compression
+import module16_sessions as sessmod
+import module17_pipeline as pipeline
 
-# DB path (single file). Change if you prefer another directory.
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "evaluations.db")
+# Evaluations database, archive and resource catalog: module17_pipeline.py,
+# shared with the job process
+DB_PATH = pipeline.DB_PATH
+# Base path of the persisted "students like you" index (see module6_index.py --rebuild)
+STUDENT_INDEX_PATH = os.path.join(pipeline.BASE_DIR, "student_index")
+# SKILLGAP_QUANTIZED=1 evaluates on-grid profiles (proficiency strings or their
+# scores) from precomputed per-role tables; anything else is computed exactly.
+QUANTIZED_EVALUATION = os.environ.get("SKILLGAP_QUANTIZED", "0") == "1"
+# JSON responses at least this large are gzip/brotli-compressed when the client accepts it
+COMPRESS_MIN_BYTES = int(os.environ.get("SKILLGAP_COMPRESS_MIN_BYTES", compression.COMPRESS_MIN_BYTES))
+# Student sessions (module16_sessions.py) expire this many days after their last change
+SESSION_TTL_DAYS = float(os.environ.get("SKILLGAP_SESSION_TTL_DAYS", 30))
+# Reverse proxies in front of the app (nginx, Render's router) whose
+# X-Forwarded-For entries are trusted; request.remote_addr is then the entry
+# the outermost of them appended. The default 0 trusts no header: a client
+# talking to the app directly could otherwise pick its own rate-limit key.
+TRUSTED_PROXIES = int(os.environ.get("SKILLGAP_TRUSTED_PROXIES", 0))
 
 app = Flask(__name__)
+if TRUSTED_PROXIES > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
 # Enable CORS for all routes (allows frontend to access backend)
 CORS(app)
+compression.install_compression(app, COMPRESS_MIN_BYTES)
 
 # --------- DB helpers ---------
 def get_db():
@@ -51,20 +81,21 @@ def get_db():
     return db
 
 def init_db():
-    """Create evaluations table if it doesn't exist."""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS evaluations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        role TEXT NOT NULL,
-        alignment REAL NOT NULL,
-        readiness REAL NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    conn.commit()
-    conn.close()
+    """Create (or migrate to) the partitioned evaluations storage."""
+    partmod.init_storage(DB_PATH)
+
+def load_student_index() -> idxmod.StudentVectorIndex:
+    """Open the persisted index (memory-mapped) if present, then catch up from the DB."""
+    index = None
+    if os.path.exists(STUDENT_INDEX_PATH + ".vectors.npy"):
+        try:
+            index = idxmod.StudentVectorIndex.load(STUDENT_INDEX_PATH, mmap=True)
+        except Exception as e:
+            print(f"[WARN] Could not load student index, rebuilding: {e}")
+    if index is None or index.dim != len(m2.SKILLS):
+        index = idxmod.StudentVectorIndex()
+    idxmod.catch_up_from_db(index, DB_PATH)
+    return index
 
 @app.teardown_appcontext
 def close_connection(exc):
@@ -72,219 +103,546 @@ def close_connection(exc):
     if db is not None:
         db.close()
 
-def insert_evaluation(role: str, alignment: float, readiness: float) -> int:
-    db = get_db()
-    cur = db.cursor()
-    cur.execute(
-        "INSERT INTO evaluations (role, alignment, readiness) VALUES (?, ?, ?)",
-        (role, float(alignment), float(readiness))
-    )
-    db.commit()
-    return cur.lastrowid
+def insert_evaluation(role: str, alignment: float, readiness: float, student_vector=None) -> int:
+    blob = idxmod.vector_to_blob(student_vector) if student_vector is not None else None
+    eval_id = partmod.insert_evaluation(get_db(), role, alignment, readiness, blob)
+    if student_vector is not None:
+        STUDENT_INDEX.add(eval_id, student_vector, readiness, role)
+    return eval_id
+
+PARTITION_MAINTAINER = partmod.PartitionMaintainer(DB_PATH, pipeline.ARCHIVE_DIR, pipeline.HOT_MONTHS,
+                                                   pipeline.RETENTION_MONTHS)
 
 # --------- Static curated resources (MVP) ---------
-DEFAULT_RESOURCES = [
-    {
-        "id": "res_cs50_py", 
-        "title": "CS50's Intro to Python (Lectures Only)", 
-        "url": "https://cs50.harvard.edu/python/",
-        "time": 16.0, 
-        "coverage": {"Python": 0.9, "Programming": 0.6}, 
-        "type": "course",
-        "icon_type": "university"  # <--- Harvard/University Icon
-    },
-    {
-        "id": "res_neetcode", 
-        "title": "NeetCode 150 (Walkthrough Videos)", 
-        "url": "https://neetcode.io/roadmap",
-        "time": 25.0, 
-        "coverage": {"DSA": 0.9, "Python": 0.3}, 
-        "type": "practice",
-        "icon_type": "code"        # <--- Coding/Terminal Icon
-    },
-    {
-        "id": "res_ostep", 
-        "title": "OSTEP: Operating Systems (Chapters 1-10)", 
-        "url": "https://pages.cs.wisc.edu/~remzi/OSTEP/",
-        "time": 12.0, 
-        "coverage": {"OS": 0.9, "Linux": 0.3}, 
-        "type": "theory",
-        "icon_type": "docs"        # <--- Book/Docs Icon
-    },
-    {
-        "id": "res_fcc_sql", 
-        "title": "Full Database Course for Beginners (FreeCodeCamp)", 
-        "url": "https://www.youtube.com/watch?v=HXV3zeQKqGY",
-        "time": 4.5, 
-        "coverage": {"SQL": 0.9, "DBMS": 0.5}, 
-        "type": "video",
-        "icon_type": "youtube"     # <--- YouTube Icon
-    },
-    {
-        "id": "res_dbms_gate", 
-        "title": "Gate Smashers: DBMS (Core Playlist)", 
-        "url": "https://www.youtube.com/playlist?list=PLxCzCOWd7aiFAN6I8CuViBuCdJgiOkT2Y",
-        "time": 20.0, 
-        "coverage": {"DBMS": 0.9}, 
-        "type": "video",
-        "icon_type": "youtube"     # <--- YouTube Icon
-    },
-    {
-        "id": "res_git_doc", 
-        "title": "Pro Git Book (Ch 1-3)", 
-        "url": "https://git-scm.com/book/en/v2",
-        "time": 4.0, 
-        "coverage": {"Git": 1.0}, 
-        "type": "theory",
-        "icon_type": "docs"        # <--- Book/Docs Icon
-    },
-    {
-        "id": "res_pandas_kaggle", 
-        "title": "Kaggle Pandas Course", 
-        "url": "https://www.kaggle.com/learn/pandas",
-        "time": 4.0, 
-        "coverage": {"Pandas": 0.9, "Python": 0.2}, 
-        "type": "practice",
-        "icon_type": "code"        # <--- Coding/Terminal Icon
-    },
-    {
-        "id": "res_stats_fcc", 
-        "title": "Statistics for Data Science (FreeCodeCamp)", 
-        "url": "https://www.youtube.com/watch?v=LHBE6Q9XlzI",
-        "time": 8.0, 
-        "coverage": {"Statistics": 0.9}, 
-        "type": "video",
-        "icon_type": "youtube"     # <--- YouTube Icon
-    },
-    {
-        "id": "res_cn_gate", 
-        "title": "Gate Smashers: Computer Networks (Complete Playlist)", 
-        "url": "https://www.youtube.com/playlist?list=PLxCzCOWd7aiGFBD2-2joCpWOLUrDLvVV_",
-        "time": 15.0, 
-        "coverage": {"CN": 0.9, "OS": 0.2}, 
-        "type": "video",
-        "icon_type": "youtube"     # <--- YouTube Icon
-    },
-    {
-        "id": "res_cpp_fcc", 
-        "title": "C++ Full Course for Beginners (FreeCodeCamp)", 
-        "url": "https://www.youtube.com/watch?v=vLnPwxZdW4Y",
-        "time": 4.5, 
-        "coverage": {"C++": 0.9, "DSA": 0.2}, 
-        "type": "video",
-        "icon_type": "youtube"     # <--- YouTube Icon
-    },
-    {
-        "id": "res_linux_fcc", 
-        "title": "Linux Command Line Basics (FreeCodeCamp)", 
-        "url": "https://www.youtube.com/watch?v=ROjZy1ZbBwY",
-        "time": 3.0, 
-        "coverage": {"Linux": 0.9, "OS": 0.1}, 
-        "type": "video",
-        "icon_type": "youtube"     # <--- YouTube Icon
-    },
-    {
-        "id": "res_numpy_kaggle", 
-        "title": "Kaggle NumPy Course", 
-        "url": "https://www.kaggle.com/learn/numpy",
-        "time": 4.0, 
-        "coverage": {"NumPy": 0.9, "Python": 0.2}, 
-        "type": "practice",
-        "icon_type": "code"        # <--- Coding/Terminal Icon
-    }
-]
+DEFAULT_RESOURCES = m2.DEFAULT_RESOURCES
+# The column catalog everything below works on (the shared store's under gunicorn)
+SHARED_STORE = pipeline.SHARED_STORE
+RESOURCE_CATALOG = pipeline.RESOURCE_CATALOG
 
-# --------- Endpoint ---------
-@app.route("/evaluate", methods=["POST"])
-def evaluate_endpoint():
-    data = request.get_json(silent=True)
-    if not data:
-        return jsonify({"error": "Invalid JSON body"}), 400
+# --------- Admission control ---------
+RATE_LIMITER = admission.TokenBucketLimiter()
+UPDATE_RATE_LIMITER = admission.TokenBucketLimiter(admission.UPDATE_RATE_PER_SECOND, admission.UPDATE_BURST)
+LOAD_SHEDDER = admission.LoadShedder()
 
-    # Required fields
-    role = data.get("role")
-    student_profile = data.get("student_profile")
+def admission_controlled(cost: float = 1.0, max_body_bytes: int = admission.MAX_BODY_BYTES,
+                         buffer_body: bool = True, limiter: Optional[admission.TokenBucketLimiter] = None):
+    """limiter defaults to RATE_LIMITER; the update endpoints pass UPDATE_RATE_LIMITER."""
+    return admission.admission_controlled(limiter or RATE_LIMITER, LOAD_SHEDDER, cost, max_body_bytes, buffer_body)
 
-    # Minimal presence checks
-    if role is None or student_profile is None:
-        return jsonify({"error": "Missing required fields: role, student_profile"}), 400
+# --------- Response trimming ---------
+# Optional, per request (query parameter, or body field of the same name):
+#   explanations=template : explanation_template_id instead of role requirements
+#   compact=1             : explanations=template, plus only the non-zero gaps,
+#                           no per-resource "coverage" (the template lists each
+#                           skill's resources by coverage) and no plan "weeks"
+#                           (the resources' week_assignment says the same)
+#   fields=a,b,...        : only these top-level response keys
+TRUE_VALUES = ("1", "true", "yes", "on")
 
-    # Unknown role -> 400 (explicit check)
-    if role not in m2.ROLES:
-        return jsonify({"error": f"Unknown role: {role}"}), 400
+def parse_response_options(data: Optional[Dict[str, Any]]):
+    """Returns ({"explanations", "compact", "fields"}, None) or (None, error message)."""
+    def option(name: str, default: Any) -> Any:
+        if name in request.args:
+            return request.args[name]
+        return (data or {}).get(name, default)
 
-    # student_profile must be a dict/object
-    if not isinstance(student_profile, dict):
-        return jsonify({"error": "student_profile must be an object mapping skill->proficiency"}), 400
+    explanations = option("explanations", "full")
+    if explanations not in pipeline.EXPLANATION_MODES:
+        return None, f"Unknown explanations mode: {explanations}"
 
-    # delegate to evaluator (handles proficiency string -> numeric conversions and extra checks)
+    compact = option("compact", False)
+    if isinstance(compact, str):
+        compact = compact.strip().lower() in TRUE_VALUES
+    elif not isinstance(compact, bool):
+        # 0 and 1 in a JSON body, like compact=0 / compact=1 in the query string
+        if not isinstance(compact, int) or compact not in (0, 1):
+            return None, "compact must be a boolean, 0 or 1"
+        compact = compact == 1
+
+    fields = option("fields", None)
+    if isinstance(fields, str):
+        fields = [name.strip() for name in fields.split(",") if name.strip()]
+    elif fields is not None and not (isinstance(fields, list) and all(isinstance(f, str) for f in fields)):
+        return None, "fields must be a comma-separated string or a list of strings"
+
+    return {"explanations": explanations, "compact": compact, "fields": fields}, None
+
+# --------- Incremental evaluation handles ---------
+# evaluation_id -> IncrementalHandle, per worker. A handle that is unknown to
+# this worker (evicted, restarted, other gunicorn worker) answers 404 and the
+# client falls back to a full /evaluate.
+MAX_INCREMENTAL_HANDLES = 1024
+_incremental_handles: "OrderedDict[int, IncrementalHandle]" = OrderedDict()
+_incremental_lock = threading.Lock()
+
+class IncrementalHandle:
+    """
+    The compiled profile of one /evaluate. Most evaluations never get an
+    update, so the IncrementalEvaluation and IncrementalResourceScores are
+    built on the first one. Use under .lock.
+    """
+
+    def __init__(self, role: str, profile: Dict[str, float], student_vector):
+        self.lock = threading.Lock()
+        self.role = role
+        self.profile = profile
+        self.student_vector = student_vector
+        self.state: Optional[evalmod.IncrementalEvaluation] = None
+        self.scores: Optional[recmod.IncrementalResourceScores] = None
+
+    def materialize(self):
+        """(state, scores), built on the first call (caller holds self.lock)."""
+        if self.state is None:
+            self.state = evalmod.IncrementalEvaluation.from_compiled(self.profile, self.student_vector, self.role)
+            self.scores = recmod.IncrementalResourceScores(RESOURCE_CATALOG, self.state.gaps)
+            self.profile = self.student_vector = None
+        return self.state, self.scores
+
+def remember_incremental_handle(eval_id: int, role: str, profile: Dict[str, float], student_vector) -> None:
+    """profile and student_vector are only read (from_compiled copies them on the first update)."""
+    handle = IncrementalHandle(role, profile, student_vector)
+    with _incremental_lock:
+        _incremental_handles[eval_id] = handle
+        _incremental_handles.move_to_end(eval_id)
+        while len(_incremental_handles) > MAX_INCREMENTAL_HANDLES:
+            _incremental_handles.popitem(last=False)
+
+# --------- Plan versions (delta responses) ---------
+# plan_version -> plan, per worker. Responses carry "plan_version"; a client
+# sending it back as "base_plan_version" gets "plan_delta" instead of "plan".
+# An unknown base (evicted, other worker) simply gets the full plan.
+MAX_PLAN_VERSIONS = 4096
+_plan_versions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_plan_versions_lock = threading.Lock()
+
+def attach_plan(response: Dict[str, Any], plan: Dict[str, Any], base_version: Any,
+                known_base: Optional[tuple] = None) -> None:
+    """
+    Sets plan_version and swaps "plan" for "plan_delta" when the client's base
+    plan is known: cached in this worker, or `known_base` = (version, plan)
+    (a session's previous plan, whichever worker computed it).
+    """
+    version = recmod.plan_version(plan)
+    with _plan_versions_lock:
+        _plan_versions[version] = plan
+        _plan_versions.move_to_end(version)
+        while len(_plan_versions) > MAX_PLAN_VERSIONS:
+            _plan_versions.popitem(last=False)
+        base = _plan_versions.get(base_version) if isinstance(base_version, str) else None
+        if base is not None:
+            _plan_versions.move_to_end(base_version)
+    if base is None and known_base is not None and known_base[0] == base_version:
+        base = known_base[1]
+
+    response["plan_version"] = version
+    if base is None:
+        return
+    delta = recmod.diff_plans(base, plan)
+    if delta is None:
+        return
+    delta["base_version"] = base_version
+    del response["plan"]
+    response["plan_delta"] = delta
+
+# --------- Shared evaluation work ---------
+# Concurrent identical /evaluate requests (same role, profile and selection
+# mode) share one computation; each still gets its own evaluation_id. Only
+# requests on the same worker process meet here, i.e. the SKILLGAP_THREADS
+# request threads of one gthread worker (gunicorn.conf.py); a worker without
+# request threads never has two requests in flight to coalesce.
+EVALUATION_FLIGHTS = admission.SingleFlight()
+
+def compute_evaluation_and_plan(role: str, student_profile: Dict[str, Any], selection: str,
+                                role_requirements: Dict[str, Dict[str, float]],
+                                numeric_student_profile: Dict[str, float]):
+    """
+    Returns (((profile, student_vector), evaluation, plan), None) or
+    (None, (error_body, status)), with the normalized profile and its student
+    vector to rebuild an IncrementalEvaluation from (from_compiled) when one
+    is needed. Errors are returned rather than raised so every coalesced
+    caller gets the same response. The result is shared between requests:
+    treat it as read-only.
+    """
     try:
-        evaluation = evalmod.evaluate_student(student_profile, role)
+        if QUANTIZED_EVALUATION:
+            # A table lookup for on-grid profiles; the vector is only compiled
+            # for the neighbor index, without the gap bookkeeping
+            evaluation = evalmod.evaluate_student_quantized(student_profile, role)
+            vocab = m2.build_vocab()
+            profile = evalmod.normalize_student_profile(student_profile, vocab)
+            student_vector = m2.get_student_vector(profile, vocab)
+        else:
+            # The incremental state is the evaluation: its compiled student
+            # vector and gaps feed the response and the neighbor index alike
+            state = evalmod.IncrementalEvaluation(student_profile, role)
+            evaluation = state.result()
+            profile, student_vector = state.profile, state.s
     except ValueError as e:
         # This usually indicates invalid input (e.g., unknown proficiency string)
-        return jsonify({"error": str(e)}), 400
+        return None, ({"error": str(e)}, 400)
     except Exception as e:
-        return jsonify({"error": "Internal evaluation error", "details": str(e)}), 500
+        return None, ({"error": "Internal evaluation error", "details": str(e)}, 500)
+
+    # Build learning plan (uses static catalog in this MVP)
+    try:
+        plan = pipeline.build_learning_plan(evaluation, selection, role_requirements, numeric_student_profile)
+    except Exception as e:
+        return None, ({"error": "Error building learning plan", "details": str(e)}, 500)
+
+    return ((profile, student_vector), evaluation, plan), None
+
+# --------- Endpoint ---------
+@app.route("/evaluate", methods=["POST"])
+@admission_controlled()
+def evaluate_endpoint():
+    data = request.get_json(silent=True)
+    role, student_profile, error = pipeline.parse_evaluate_payload(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    # Resource selection: "greedy" (default) credits every resource with the full
+    # gaps, "submodular" credits overlapping resources only with what is left
+    selection = data.get("selection", "greedy")
+    if selection not in ("greedy", "submodular"):
+        return jsonify({"error": f"Unknown selection mode: {selection}"}), 400
+    response_options, error = parse_response_options(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     # Get role requirements for priority/skim calculations and response
-    role_requirements = {}
-    if role in m2.ROLES:
-        for skill, spec in m2.ROLES[role].items():
-            role_requirements[skill] = {
-                "required": spec["required"],
-                "weight": spec["weight"]
-            }
+    role_requirements = pipeline.build_role_requirements(role)
 
     # Convert student_profile to numeric format for recommender
-    # Frontend sends numeric values (0-1), but handle strings if present
-    import module1_vectors as m1
-    numeric_student_profile = {}
-    for skill, prof in student_profile.items():
-        if isinstance(prof, (int, float)):
-            numeric_student_profile[skill] = float(prof)
-        elif isinstance(prof, str):
-            # Use evaluator's conversion function for string proficiency values
-            try:
-                numeric_student_profile[skill] = m1.map_proficiency_to_score(prof)
-            except:
-                numeric_student_profile[skill] = 0.0
-        else:
-            numeric_student_profile[skill] = 0.0
+    numeric_student_profile = pipeline.to_numeric_profile(student_profile)
 
-    # Build learning plan (uses static catalog in this MVP)
+    # Evaluation + plan, shared with identical requests already in flight
+    key = admission.canonical_request_key(role, student_profile, selection)
+    (outcome, failure), _ = EVALUATION_FLIGHTS.do(
+        key,
+        lambda: compute_evaluation_and_plan(role, student_profile, selection,
+                                            role_requirements, numeric_student_profile)
+    )
+    if failure is not None:
+        body, status = failure
+        return jsonify(body), status
+    (profile, student_vector), evaluation, plan = outcome
+
+    # Optional uncertainty mode: {"uncertainty": true} or {"uncertainty": {"samples": 5000, "confidence": 0.95}}
+    uncertainty = data.get("uncertainty")
+    confidence_intervals = None
+    if uncertainty:
+        options = uncertainty if isinstance(uncertainty, dict) else {}
+        try:
+            confidence_intervals = evalmod.evaluate_uncertainty(
+                student_profile, role,
+                samples=int(options.get("samples", evalmod.DEFAULT_MC_SAMPLES)),
+                confidence=float(options.get("confidence", 0.9))
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+    # Optional Pareto mode: {"pareto": true} or {"pareto": {"max_plans": 3, "max_hours": 40}}
+    pareto = data.get("pareto")
+    pareto_plans = None
+    if pareto:
+        options = pareto if isinstance(pareto, dict) else {}
+        try:
+            max_hours = options.get("max_hours")
+            pareto_plans = recmod.pareto_learning_plans(
+                evaluation, RESOURCE_CATALOG, role_requirements, numeric_student_profile,
+                max_plans=max(1, min(int(options.get("max_plans", 4)), 8)),
+                max_hours=float(max_hours) if max_hours is not None else None
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        for option in pareto_plans:
+            pipeline.enrich_plan_resources(option["plan"])
+
+    # Persist evaluation summary (alignment + readiness + student vector)
     try:
-        plan = recmod.recommend_learning_plan(evaluation, DEFAULT_RESOURCES, role_requirements, numeric_student_profile)
+        eval_id = insert_evaluation(role, evaluation["alignment_score"], evaluation["readiness_score"], student_vector)
+    except Exception as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    # Keep a handle so follow-up slider changes can be applied incrementally
+    remember_incremental_handle(eval_id, role, profile, student_vector)
+
+    # Compose response
+    response = pipeline.compose_response(eval_id, evaluation, plan, role_requirements)
+    attach_plan(response, plan, data.get("base_plan_version"))
+    if confidence_intervals is not None:
+        response["confidence_intervals"] = confidence_intervals
+    if pareto_plans is not None:
+        response["pareto_plans"] = pareto_plans
+    pipeline.trim_response(response, role, response_options)
+    return jsonify(response), 200
+
+@app.route("/evaluate/<int:evaluation_id>/update", methods=["POST"])
+@admission_controlled(limiter=UPDATE_RATE_LIMITER)
+def evaluate_update_endpoint(evaluation_id: int):
+    """
+    Applies changed skills to a previous evaluation.
+
+    Request JSON: {"changes": {"DSA": 0.8, "OS": "intermediate"}, "base_plan_version": "...",
+                   "explanations": "full" | "template", "compact": false, "fields": [...]}
+    Response JSON: same shape as /evaluate (same evaluation_id, not persisted).
+    Cost is proportional to the changed skills plus the plan scheduling.
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get("changes"), dict):
+        return jsonify({"error": "Missing required field: changes"}), 400
+    if len(data["changes"]) > pipeline.MAX_PROFILE_SKILLS:
+        return jsonify({"error": f"Too many changed skills (max {pipeline.MAX_PROFILE_SKILLS})"}), 400
+    options, error = parse_response_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    with _incremental_lock:
+        handle = _incremental_handles.get(evaluation_id)
+        if handle is not None:
+            _incremental_handles.move_to_end(evaluation_id)
+    if handle is None:
+        return jsonify({"error": f"Unknown or expired evaluation handle: {evaluation_id}"}), 404
+
+    with handle.lock:
+        state, scores = handle.materialize()
+        try:
+            gap_deltas = state.update(data["changes"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        scores.apply_gap_deltas(gap_deltas)
+        evaluation = state.result()
+        ranked = scores.ranked()
+        numeric_student_profile = dict(state.profile)
+
+    role_requirements = pipeline.build_role_requirements(state.role)
+    try:
+        plan = recmod.recommend_learning_plan(evaluation, RESOURCE_CATALOG, role_requirements,
+                                              numeric_student_profile, scored=ranked)
     except Exception as e:
         return jsonify({"error": "Error building learning plan", "details": str(e)}), 500
 
-    # Enrich selected_resources with URLs, coverage, and icon_type from DEFAULT_RESOURCES
-    resource_lookup = {r["id"]: r for r in DEFAULT_RESOURCES}
-    for resource in plan["selected_resources"]:
-        full_resource = resource_lookup.get(resource["id"])
-        if full_resource:
-            resource["url"] = full_resource.get("url", "")
-            resource["coverage"] = full_resource.get("coverage", {})  # Include coverage for skill updates
-            resource["icon_type"] = full_resource.get("icon_type", "docs")  # Include icon_type for display
+    pipeline.enrich_plan_resources(plan)
+    response = pipeline.compose_response(evaluation_id, evaluation, plan, role_requirements)
+    attach_plan(response, plan, data.get("base_plan_version"))
+    pipeline.trim_response(response, state.role, options)
+    return jsonify(response), 200
+
+# --------- Student sessions (see module16_sessions.py) ---------
+# A session keeps the compiled profile, last evaluation and plan server-side
+# (hot in this worker, persisted in SQLite), so a returning student sends
+# only the session id and the skills that changed.
+SESSIONS = sessmod.SessionStore(DB_PATH, RESOURCE_CATALOG, ttl_seconds=SESSION_TTL_DAYS * 86400.0)
+# Attempts when another worker changes the same session mid-update
+SESSION_UPDATE_ATTEMPTS = 3
+
+def compose_session_response(session: sessmod.Session, options: Optional[Dict[str, Any]],
+                             base_version: Any = None,
+                             known_base: Optional[tuple] = None) -> Dict[str, Any]:
+    """/evaluate-shaped response for the session's current state (caller holds session.lock)."""
+    response = pipeline.compose_response(session.evaluation_id, session.evaluation, session.plan,
+                                pipeline.build_role_requirements(session.role))
+    attach_plan(response, session.plan, base_version, known_base)
+    response["session_id"] = session.id
+    response["session_version"] = session.version
+    pipeline.trim_response(response, session.role, options)
+    return response
+
+@app.route("/sessions", methods=["POST"])
+@admission_controlled()
+def create_session_endpoint():
+    """
+    Evaluates like /evaluate and keeps the result as a session.
 
-    # Persist evaluation summary (alignment + readiness)
+    Request JSON: same as /evaluate (role, student_profile, selection, response options)
+    Response JSON (201): the /evaluate response plus "session_id" and "session_version"
+    """
+    data = request.get_json(silent=True)
+    role, student_profile, error = pipeline.parse_evaluate_payload(data)
+    if error:
+        return jsonify({"error": error}), 400
+    selection = data.get("selection", "greedy")
+    if selection not in sessmod.SELECTION_MODES:
+        return jsonify({"error": f"Unknown selection mode: {selection}"}), 400
+    options, error = parse_response_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    role_requirements = pipeline.build_role_requirements(role)
+    numeric_student_profile = pipeline.to_numeric_profile(student_profile)
+    key = admission.canonical_request_key(role, student_profile, selection)
+    (outcome, failure), _ = EVALUATION_FLIGHTS.do(
+        key,
+        lambda: compute_evaluation_and_plan(role, student_profile, selection,
+                                            role_requirements, numeric_student_profile)
+    )
+    if failure is not None:
+        body, status = failure
+        return jsonify(body), status
+    (profile, student_vector), evaluation, plan = outcome
+    state = evalmod.IncrementalEvaluation.from_compiled(profile, student_vector, role)
     try:
-        eval_id = insert_evaluation(role, evaluation["alignment_score"], evaluation["readiness_score"])
+        eval_id = insert_evaluation(role, evaluation["alignment_score"], evaluation["readiness_score"], student_vector)
+        session = SESSIONS.create(state, selection, eval_id, evaluation, plan, recmod.plan_version(plan))
     except Exception as e:
         return jsonify({"error": "Database error", "details": str(e)}), 500
 
-    # Compose response
-    response = {
-        "evaluation_id": eval_id,
-        "alignment_score": evaluation["alignment_score"],
-        "readiness_score": evaluation["readiness_score"],
-        "top_gaps": evaluation["top_gaps"],
-        "gaps": evaluation.get("gaps", {}),  # Include full gaps object for explanations
-        "plan": plan,
-        "role_requirements": {skill: req["required"] for skill, req in role_requirements.items()},  # Simplified for frontend compatibility
-        "role_requirements_full": role_requirements  # Include full role requirements with weights for explanations
-    }
+    with session.lock:
+        response = compose_session_response(session, options, data.get("base_plan_version"))
+    return jsonify(response), 201
+
+@app.route("/sessions/<session_id>", methods=["GET"])
+def get_session_endpoint(session_id: str):
+    """
+    The session's last evaluation and plan, without recomputing anything.
+    ETag is the session version, so an unchanged session revalidates to 304.
+    """
+    options, error = parse_response_options(None)
+    if error:
+        return jsonify({"error": error}), 400
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": f"Unknown or expired session: {session_id}"}), 404
+    with session.lock:
+        body = compose_session_response(session, options)
+    response = jsonify(body)
+    response.set_etag(f"{session.id}.{body['session_version']}")
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
+
+@app.route("/sessions/<session_id>/update", methods=["POST"])
+@admission_controlled(limiter=UPDATE_RATE_LIMITER)
+def update_session_endpoint(session_id: str):
+    """
+    Applies changed skills to a session and stores the new evaluation and plan.
+
+    Request JSON: {"changes": {"DSA": 0.8, "OS": "intermediate"}, "base_plan_version": "...",
+                   "explanations": "full" | "template", "compact": false, "fields": [...]}
+    Response JSON: same shape as POST /sessions, with the next session_version.
+    Sending the session's current plan_version as base_plan_version gets a
+    plan_delta from any worker.
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get("changes"), dict):
+        return jsonify({"error": "Missing required field: changes"}), 400
+    if len(data["changes"]) > pipeline.MAX_PROFILE_SKILLS:
+        return jsonify({"error": f"Too many changed skills (max {pipeline.MAX_PROFILE_SKILLS})"}), 400
+    options, error = parse_response_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    for _ in range(SESSION_UPDATE_ATTEMPTS):
+        # No version read: save() fails on a stale hot copy and the retry reloads it
+        session = SESSIONS.get(session_id, verify=False)
+        if session is None:
+            return jsonify({"error": f"Unknown or expired session: {session_id}"}), 404
+
+        with session.lock:
+            try:
+                gap_deltas = session.state.update(data["changes"])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400  # nothing was applied
+            previous = (session.plan_version, session.plan)
+            try:
+                session.scores.apply_gap_deltas(gap_deltas)
+                evaluation = session.state.result()
+                role_requirements = pipeline.build_role_requirements(session.role)
+                numeric_student_profile = dict(session.state.profile)
+                if session.selection == "greedy":
+                    plan = recmod.recommend_learning_plan(evaluation, RESOURCE_CATALOG, role_requirements,
+                                                          numeric_student_profile, scored=session.scores.ranked())
+                    pipeline.enrich_plan_resources(plan)
+                else:
+                    plan = pipeline.build_learning_plan(evaluation, session.selection, role_requirements,
+                                               numeric_student_profile)
+                session.evaluation, session.plan = evaluation, plan
+                session.plan_version = recmod.plan_version(plan)
+                saved = SESSIONS.save(session)
+            except Exception as e:
+                SESSIONS.evict(session_id)  # the hot copy may be half-updated
+                return jsonify({"error": "Error updating session", "details": str(e)}), 500
+            if saved:
+                response = compose_session_response(session, options, data.get("base_plan_version"), previous)
+                return jsonify(response), 200
+        # Another worker changed the session first: retry on its fresh state
+
+    return jsonify({"error": "Session is being updated concurrently, retry"}), 409
+
+@app.route("/sessions/<session_id>", methods=["DELETE"])
+def delete_session_endpoint(session_id: str):
+    if not SESSIONS.delete(session_id):
+        return jsonify({"error": f"Unknown or expired session: {session_id}"}), 404
+    return "", 204
+
+@app.route("/simulate", methods=["POST"])
+@admission_controlled(2.0)
+def simulate_endpoint():
+    """
+    What-if projection: evaluates like /evaluate, then projects readiness and
+    alignment week by week if the returned plan is followed. Not persisted.
+
+    Request JSON: same as /evaluate.
+    Response JSON: /evaluate fields (without evaluation_id) plus
+      "trajectory": {"weeks": [0, 1, ...], "readiness": [...], "alignment": [...], ...}
+    """
+    data = request.get_json(silent=True)
+    role, student_profile, error = pipeline.parse_evaluate_payload(data)
+    if error:
+        return jsonify({"error": error}), 400
+    options, error = parse_response_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        evaluation = evalmod.evaluate_student(student_profile, role)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Internal evaluation error", "details": str(e)}), 500
+
+    role_requirements = pipeline.build_role_requirements(role)
+    numeric_student_profile = pipeline.to_numeric_profile(student_profile)
+
+    try:
+        plan = recmod.recommend_learning_plan(evaluation, RESOURCE_CATALOG, role_requirements, numeric_student_profile)
+    except Exception as e:
+        return jsonify({"error": "Error building learning plan", "details": str(e)}), 500
+
+    pipeline.enrich_plan_resources(plan)
+    trajectory = recmod.simulate_plan_progress(plan, role, numeric_student_profile)
+
+    response = pipeline.compose_response(None, evaluation, plan, role_requirements)
+    del response["evaluation_id"]
+    response["trajectory"] = trajectory
+    pipeline.trim_response(response, role, options)
     return jsonify(response), 200
 
+@app.route("/similar", methods=["POST"])
+@admission_controlled()
+def similar_endpoint():
+    """
+    "Students like you": past evaluations for the same role whose student
+    vectors are closest under the role's weights.
+
+    Request JSON: {"role": "SDE", "student_profile": {...}, "k": 5}
+    Response JSON: {"neighbors": [{"evaluation_id", "similarity", "readiness", "role"}, ...]}
+    """
+    data = request.get_json(silent=True)
+    role, student_profile, error = pipeline.parse_evaluate_payload(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        k = max(1, min(int(data.get("k", 5)), 50))
+        vocab = m2.build_vocab()
+        s = m2.get_student_vector(evalmod.normalize_student_profile(student_profile, vocab), vocab)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Each worker has its own index: pick up rows other workers stored since
+    idxmod.catch_up_from_db(STUDENT_INDEX, DB_PATH, get_db())
+    return jsonify({"neighbors": STUDENT_INDEX.query(s, role, k=k)}), 200
+
 @app.route("/roles", methods=["GET"])
 def get_roles():
     """
@@ -314,12 +672,239 @@ def get_roles():
         
     return jsonify(response), 200
 
+@app.route("/roles/<role_name>/related", methods=["GET"])
+def get_related_roles(role_name: str):
+    """
+    Related roles from the precomputed role similarity matrix, plus the
+    role's cluster. Query param: k (default 3).
+    """
+    k = request.args.get("k", default=3, type=int)
+    try:
+        if role_name not in m2.ROLES and m2.BLEND_SEPARATOR in role_name:
+            role_name = m2.composite_role_name(role_name)
+        result = rolesim.get_role_similarity().lookup(role_name, k=max(0, k))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify(result), 200
+
+@app.route("/roles/<role_name>/explanations", methods=["GET"])
+def get_explanation_template_endpoint(role_name: str):
+    """
+    The role's explanation template (see Explanation templates above). The
+    template_id doubles as a strong ETag, so revalidation answers 304.
+    """
+    if role_name not in m2.ROLES and m2.BLEND_SEPARATOR in role_name:
+        try:
+            role_name = m2.composite_role_name(role_name)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 404
+    template = pipeline.get_explanation_template(role_name)
+    if template is None:
+        return jsonify({"error": f"Unknown role: {role_name}"}), 404
+    response = jsonify(template)
+    response.set_etag(template["template_id"])
+    response.headers["Cache-Control"] = f"public, max-age={pipeline.EXPLANATION_MAX_AGE}"
+    return response.make_conditional(request)
+
+# --------- Background jobs (see module11_jobs.py) ---------
+# Job threads inside each web worker. 0 (the default) leaves the work to the
+# `python module11_jobs.py work` process gunicorn.conf.py starts next to them
+JOB_WORKERS = int(os.environ.get("SKILLGAP_JOB_WORKERS", 0))
+# Job submissions carry a whole class of profiles
+MAX_JOB_BODY_BYTES = 8 * 1024 * 1024
+
+def run_evaluate_job(items, options):
+    """Job handler: pipeline.evaluate_items over one checkpoint chunk."""
+    return pipeline.evaluate_items(items, options.get("selection", "greedy"), options.get("response"))
+
+JOB_QUEUE = jobsmod.JobQueue(DB_PATH, {"evaluate": run_evaluate_job}, num_workers=JOB_WORKERS)
+
+@app.route("/jobs", methods=["POST"])
+@admission_controlled(5.0, max_body_bytes=MAX_JOB_BODY_BYTES)
+def submit_job_endpoint():
+    """
+    Queues a batch evaluation; poll GET /jobs/<job_id> and page through
+    GET /jobs/<job_id>/results.
+
+    Request JSON: {"kind": "evaluate", "items": [{"role", "student_profile"}, ...],
+                   "selection": "greedy", "explanations": "full", "compact": false, "fields": [...]}
+    Response JSON (202): {"job_id", "status", "total"}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Invalid JSON body"}), 400
+
+    kind = data.get("kind", "evaluate")
+    items = data.get("items")
+    if not isinstance(items, list):
+        return jsonify({"error": "items must be a list"}), 400
+    for i, item in enumerate(items):
+        _, _, error = pipeline.parse_evaluate_payload(item if isinstance(item, dict) else None)
+        if error:
+            return jsonify({"error": f"items[{i}]: {error}"}), 400
+
+    selection = data.get("selection", "greedy")
+    if selection not in ("greedy", "submodular"):
+        return jsonify({"error": f"Unknown selection mode: {selection}"}), 400
+    response_options, error = parse_response_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        job_id = JOB_QUEUE.submit(kind, items, {"selection": selection, "response": response_options})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    JOB_QUEUE.ensure_started()
+    return jsonify({"job_id": job_id, "status": "queued", "total": len(items)}), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status_endpoint(job_id: str):
+    status = JOB_QUEUE.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    JOB_QUEUE.ensure_started()
+    return jsonify(status), 200
+
+@app.route("/jobs/<job_id>/results", methods=["GET"])
+def job_results_endpoint(job_id: str):
+    """
+    Results checkpointed so far, in item order. Query params: offset (default 0),
+    limit (default and max 500). next_offset is null once the job is finished
+    and everything has been returned.
+    """
+    status = JOB_QUEUE.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    offset = max(0, request.args.get("offset", default=0, type=int))
+    limit = request.args.get("limit", default=jobsmod.MAX_RESULTS_PAGE, type=int)
+    results = JOB_QUEUE.results(job_id, offset, limit)
+    end = offset + len(results)
+    finished = status["status"] in ("done", "failed") and end >= status["completed"]
+    return jsonify({
+        "job_id": job_id,
+        "status": status["status"],
+        "offset": offset,
+        "results": results,
+        "next_offset": None if finished else end,
+    }), 200
+
+# --------- Streaming batch evaluation ---------
+# Items evaluated per vectorized pass; one chunk of results is in memory at a
+# time. NDJSON input is also read one line at a time; a JSON body is parsed
+# whole, so its items list (up to MAX_JOB_BODY_BYTES) stays in memory.
+STREAM_CHUNK_SIZE = 32
+
+def _stream_input_items():
+    """
+    Items from an NDJSON body (read line by line) or from a JSON body's
+    "items" list. Lines that are not valid JSON become None (-> per-item error).
+    """
+    if request.mimetype == "application/x-ndjson":
+        for line in iter(request.stream.readline, b""):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+        return
+    data = request.get_json(silent=True)
+    if data is None and len(request.get_data(cache=True)) > request.max_content_length - 1:
+        # get_json reads at most max_content_length, so a truncated chunked
+        # body shows up as unparseable JSON of exactly that length
+        raise RequestEntityTooLarge()
+    yield from (data or {}).get("items") or []
+
+def _format_stream_event(payload: Dict[str, Any], sse: bool, event: str = "result") -> str:
+    body = json.dumps(payload)
+    if sse:
+        return f"event: {event}\ndata: {body}\n\n"
+    return body + "\n"
+
+@app.route("/evaluate/stream", methods=["POST"])
+@admission_controlled(5.0, max_body_bytes=MAX_JOB_BODY_BYTES, buffer_body=False)
+def evaluate_stream_endpoint():
+    """
+    Streams /evaluate results (not persisted) for a list of profiles as each
+    chunk of STREAM_CHUNK_SIZE finishes, as NDJSON or server-sent events.
+
+    Request: JSON {"items": [{"role", "student_profile"}, ...]} or an NDJSON
+      body (Content-Type: application/x-ndjson) with one item per line.
+      Query params: selection (greedy | submodular), explanations / compact /
+      fields (see Response trimming), format (ndjson | sse; Accept:
+      text/event-stream also selects sse).
+    Response: one {"index", ...result} object per item in input order, then
+      {"done": true, "count": n} (SSE event "end").
+    """
+    selection = request.args.get("selection", "greedy")
+    if selection not in ("greedy", "submodular"):
+        return jsonify({"error": f"Unknown selection mode: {selection}"}), 400
+    options, error = parse_response_options(None)
+    if error:
+        return jsonify({"error": error}), 400
+    if request.mimetype != "application/x-ndjson":
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+            return jsonify({"error": "items must be a list"}), 400
+
+    fmt = request.args.get("format")
+    sse = fmt == "sse" or (fmt is None and request.accept_mimetypes.best == "text/event-stream")
+
+    def results_for(chunk: List[Any], start: int):
+        for offset, result in enumerate(pipeline.evaluate_items(chunk, selection, options)):
+            yield _format_stream_event({"index": start + offset, **result}, sse)
+
+    def generate():
+        # A plain generator: the server pulls the next chunk only after the
+        # previous one was written, so a slow client slows the evaluation down
+        count = 0
+        chunk: List[Any] = []
+        items = _stream_input_items()
+        while True:
+            try:
+                item = next(items)
+            except StopIteration:
+                break
+            except RequestEntityTooLarge:
+                # A chunked body ran past the limit mid-stream; results already
+                # sent stay valid, the rest of the body is not read
+                yield _format_stream_event({"error": f"Request body too large (max {MAX_JOB_BODY_BYTES} bytes)"}, sse, "error")
+                break
+            if count + len(chunk) >= jobsmod.MAX_JOB_ITEMS:
+                yield _format_stream_event({"error": f"Too many items (max {jobsmod.MAX_JOB_ITEMS})"}, sse, "error")
+                break
+            chunk.append(item)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield from results_for(chunk, count)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            yield from results_for(chunk, count)
+            count += len(chunk)
+        yield _format_stream_event({"done": True, "count": count}, sse, "end")
+
+    mimetype = "text/event-stream" if sse else "application/x-ndjson"
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # let proxies pass chunks straight through
+    return response
+
 # --------- Bootstrapping ---------
 # Initialize database on startup
 init_db()
+JOB_QUEUE.init_schema()
+SESSIONS.init_schema()
+pipeline.refresh_explanation_templates()
+STUDENT_INDEX = load_student_index()
 
 if __name__ == "__main__":
     print("Initialized DB at", DB_PATH)
     print("Run the Flask app and hit POST /evaluate with JSON payload.")
     port = int(os.environ.get("PORT", 5000))
+    # The development server has no separate job process
+    JOB_QUEUE.num_workers = JOB_WORKERS or jobsmod.DEFAULT_WORKERS
+    JOB_QUEUE.ensure_started()
+    PARTITION_MAINTAINER.ensure_started()
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,105 @@
+# gunicorn.conf.py
+#
+# Picked up automatically by `gunicorn app:app` (Procfile / render.yaml).
+# The master compiles roles, skills and the resource catalog into one
+# memory-mapped segment (module8_shared_store.py) without importing the app,
+# and passes its path to the workers in SKILLGAP_STORE_PATH; they attach to it
+# zero-copy when they import the app. On HUP the master publishes the next
+# generation before the workers are replaced.
+# Workers are threaded (gthread), so one process serves SKILLGAP_THREADS
+# requests at once: admission control sizes its in-flight limits from the same
+# variable, and identical concurrent /evaluate requests can share one result.
+#
+# Background jobs and partition maintenance run in one separate process
+# (`python module11_jobs.py work`) started by the master, not in the web
+# workers, and restarted by it when it exits. It shares the web service's
+# disk, which a separate Render service could not. Its state lives on the
+# arbiter (`server`), which outlives the config reload on HUP.
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+worker_class = "gthread"
+threads = int(os.environ.get("SKILLGAP_THREADS", 8))
+
+# Delay before restarting a job process that exited, doubled after every exit
+# that came sooner than JOB_RESPAWN_MAX_SECONDS after its start, so a crash
+# loop backs off instead of spinning
+JOB_RESPAWN_SECONDS = 1.0
+JOB_RESPAWN_MAX_SECONDS = 60.0
+
+
+def publish_store(server):
+    import module8_shared_store as storemod
+    path = storemod.default_store_path()
+    generation = storemod.publish_store(os.environ.get("SKILLGAP_CATALOG_PATH"), path)
+    os.environ[storemod.STORE_ENV] = path
+    server.log.info("Published shared store generation %s at %s", generation, path)
+
+
+def on_starting(server):
+    publish_store(server)
+
+
+def on_reload(server):
+    publish_store(server)
+
+
+def supervise_job_process(server):
+    here = os.path.dirname(os.path.abspath(__file__))
+    delay = JOB_RESPAWN_SECONDS
+    while True:
+        with server.job_lock:
+            if server.job_stopping.is_set():
+                return
+            server.job_process = subprocess.Popen([sys.executable, "module11_jobs.py", "work"], cwd=here)
+        started = time.monotonic()
+        server.log.info("Started job worker process %s", server.job_process.pid)
+
+        code = server.job_process.wait()
+        if server.job_stopping.is_set():
+            return
+        if time.monotonic() - started >= JOB_RESPAWN_MAX_SECONDS:
+            delay = JOB_RESPAWN_SECONDS
+        server.log.warning("Job worker process %s exited with %s, restarting in %.0fs",
+                           server.job_process.pid, code, delay)
+        server.job_stopping.wait(delay)
+        delay = min(delay * 2, JOB_RESPAWN_MAX_SECONDS)
+
+
+def when_ready(server):
+    server.job_lock = threading.Lock()
+    server.job_stopping = threading.Event()
+    server.job_process = None
+    threading.Thread(target=supervise_job_process, args=(server,), name="job-supervisor", daemon=True).start()
+
+
+def on_exit(server):
+    # Only the segment this master named itself; a SKILLGAP_STORE_PATH given
+    # from outside is left to its owner
+    import module8_shared_store as storemod
+    path = storemod.own_store_path()
+    if os.environ.get(storemod.STORE_ENV) == path and os.path.exists(path):
+        os.unlink(path)
+
+    if not hasattr(server, "job_stopping"):
+        return
+    with server.job_lock:
+        server.job_stopping.set()
+        process = server.job_process
+    if process is not None and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def post_fork(server, worker):
+    import app
+    # Extra job threads in each web worker, only when SKILLGAP_JOB_WORKERS > 0;
+    # threads do not survive fork, so they start here
+    app.JOB_QUEUE.ensure_started()
@@ -0,0 +1,265 @@
+# module10_admission.py
+"""
+Per-process admission control for the expensive endpoints.
+
+- TokenBucketLimiter: per-client token buckets refilled lazily on access
+  (no background thread, O(1) per check).
+- LoadShedder: counts in-flight requests and tracks an EWMA of recent
+  latency; sheds when the worker is saturated or already too slow.
+- admission_controlled: Flask decorator wiring both in front of a view,
+  together with a request body size cap, so oversized or excess requests
+  are rejected before any JSON parsing or NumPy work.
+- SingleFlight: coalesces concurrent identical computations so a burst of
+  the same request costs one computation. Callers are threads of one
+  process, so it only pays off under a threaded server.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Response, request, jsonify
+
+# Sustained requests per second per client, and the burst allowance
+RATE_PER_SECOND = float(os.environ.get("SKILLGAP_RATE_PER_SECOND", 1.0))
+BURST = float(os.environ.get("SKILLGAP_RATE_BURST", 20.0))
+# Separate, looser bucket for the slider endpoints (/evaluate/<id>/update,
+# /sessions/<id>/update): dragging one slider sends several cheap updates a
+# second, which must neither be throttled by nor use up the bucket above
+UPDATE_RATE_PER_SECOND = float(os.environ.get("SKILLGAP_UPDATE_RATE_PER_SECOND", 10.0))
+UPDATE_BURST = float(os.environ.get("SKILLGAP_UPDATE_RATE_BURST", 50.0))
+# Buckets kept in memory; least recently seen clients are dropped first
+MAX_TRACKED_CLIENTS = 10000
+
+# Largest accepted request body for guarded endpoints (bytes)
+MAX_BODY_BYTES = 64 * 1024
+# Largest accepted student_profile / changes object (number of skills)
+MAX_PROFILE_SKILLS = 256
+
+# Request threads per worker process (gunicorn.conf.py runs gthread workers
+# with this many threads), which bounds how many requests can be in flight
+WORKER_THREADS = int(os.environ.get("SKILLGAP_THREADS", 8))
+# Shed with 503 beyond this many concurrent guarded requests in this process;
+# the remaining threads stay free for the cheap, unguarded endpoints
+MAX_IN_FLIGHT = max(1, WORKER_THREADS - 2)
+# ... or when the EWMA latency exceeds this and the process is already busy
+LATENCY_BUDGET_SECONDS = 2.0
+BUSY_IN_FLIGHT = max(1, WORKER_THREADS // 2)
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class TokenBucketLimiter:
+
+    def __init__(self, rate: float = RATE_PER_SECOND, burst: float = BURST,
+                 max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()  # key -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, cost: float = 1.0) -> Tuple[bool, float]:
+        """Returns (allowed, seconds until enough tokens are available)."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, 0.0
+            return False, (cost - bucket[0]) / self.rate if self.rate > 0 else float("inf")
+
+
+class LoadShedder:
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT,
+                 latency_budget: float = LATENCY_BUDGET_SECONDS,
+                 busy_in_flight: int = BUSY_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self.latency_budget = latency_budget
+        self.busy_in_flight = busy_in_flight
+        self.in_flight = 0
+        self.latency_ewma = 0.0
+        self._lock = threading.Lock()
+
+    def try_enter(self) -> Optional[str]:
+        """Admits the request (returns None) or returns the reason for shedding it."""
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                return "Server is at capacity"
+            if self.in_flight >= self.busy_in_flight and self.latency_ewma > self.latency_budget:
+                return "Server is overloaded"
+            self.in_flight += 1
+            return None
+
+    def exit(self, elapsed: Optional[float] = None) -> None:
+        """Releases the slot; elapsed=None leaves the latency estimate alone."""
+        with self._lock:
+            self.in_flight -= 1
+            if elapsed is not None:
+                self.latency_ewma += LATENCY_EWMA_ALPHA * (elapsed - self.latency_ewma)
+
+
+def client_key() -> str:
+    # The peer address, or with SKILLGAP_TRUSTED_PROXIES set (app.py wraps the
+    # WSGI app in ProxyFix) the X-Forwarded-For hop the trusted proxy appended,
+    # never one the client wrote itself
+    return request.remote_addr or "unknown"
+
+
+def admission_controlled(limiter: TokenBucketLimiter, shedder: LoadShedder, cost: float = 1.0,
+                         max_body_bytes: int = MAX_BODY_BYTES, buffer_body: bool = True) -> Callable:
+    """
+    buffer_body=False leaves a body without Content-Length (chunked) unread for
+    views that stream it; reading past max_body_bytes then raises
+    werkzeug's RequestEntityTooLarge from request.stream.
+    """
+    too_large = {"error": f"Request body too large (max {max_body_bytes} bytes)"}
+
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.content_length is not None and request.content_length > max_body_bytes:
+                return jsonify(too_large), 413
+            # Chunked bodies carry no Content-Length: cap what is read instead.
+            # One byte over the cap tells a body that is too large from one
+            # that fits exactly (the capped stream stops there silently).
+            request.max_content_length = max_body_bytes + 1
+
+            allowed, retry_after = limiter.allow(client_key(), cost)
+            if not allowed:
+                response = jsonify({"error": "Rate limit exceeded"})
+                response.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+                return response, 429
+
+            if buffer_body and request.content_length is None and len(request.get_data(cache=True)) > max_body_bytes:
+                return jsonify(too_large), 413
+
+            reason = shedder.try_enter()
+            if reason is not None:
+                response = jsonify({"error": reason})
+                response.headers["Retry-After"] = "1"
+                return response, 503
+
+            start = time.perf_counter()
+            try:
+                result = view(*args, **kwargs)
+            except BaseException:
+                shedder.exit(time.perf_counter() - start)
+                raise
+
+            if isinstance(result, Response) and result.is_streamed:
+                # Streamed bodies hold the slot until the client has them all;
+                # their duration says nothing about per-request latency
+                result.call_on_close(shedder.exit)
+            else:
+                shedder.exit(time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time. Callers arriving while
+    it runs wait for it and receive the same result (or exception). Nothing is
+    cached once the computation finishes.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (result, shared) where shared is True for callers that waited."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+def canonical_request_key(role: str, student_profile: Dict[str, Any], *options: Any) -> str:
+    """Order-independent hash of role, profile and any extra options."""
+    profile = sorted(
+        (skill, value.strip().lower() if isinstance(value, str) else value)
+        for skill, value in student_profile.items()
+    )
+    payload = json.dumps([role, profile, list(options)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --------------------------------------------------
+# Demo
+# --------------------------------------------------
+if __name__ == "__main__":
+    limiter = TokenBucketLimiter(rate=1.0, burst=5.0)
+    decisions = [limiter.allow("10.0.0.1")[0] for _ in range(8)]
+    print("Burst of 8 with burst=5:", decisions)
+
+    runs = 200000
+    t0 = time.perf_counter()
+    for i in range(runs):
+        limiter.allow(f"client-{i % 1000}")
+    print(f"allow(): {(time.perf_counter() - t0) * 1e6 / runs:.2f} us per check")
+
+    shedder = LoadShedder(max_in_flight=2)
+    print("Admit, admit, third:", shedder.try_enter(), shedder.try_enter(), shedder.try_enter())
+
+    flights = SingleFlight()
+    calls = []
+
+    def slow_evaluation():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"readiness_score": 0.5}
+
+    key = canonical_request_key("SDE", {"DSA": 0.6, "OS": "Beginner"})
+    assert key == canonical_request_key("SDE", {"OS": "beginner", "DSA": 0.6})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do(key, slow_evaluation))) for _ in range(50)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    print(f"50 concurrent identical requests -> {len(calls)} computation(s), "
+          f"{sum(shared for _, shared in results)} shared results")
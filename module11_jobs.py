@@ -0,0 +1,382 @@
+# module11_jobs.py
+"""
+Background job queue for work that outlives an HTTP request (a whole class
+evaluated and planned at once).
+
+Jobs live in SQLite next to the evaluations:
+
+    jobs        : id, kind, status, total, completed, payload (JSON),
+                  error, lease_until, created_at, updated_at
+    job_results : (job_id, item_index) -> result JSON
+
+A pool of worker threads claims queued jobs and runs the registered handler
+over CHUNK_SIZE items at a time. Each chunk's results and the new progress
+counter are committed in one transaction, so `completed` is a checkpoint: a
+job whose worker died (its lease expired) is claimed again and resumes at
+the first unfinished chunk. Claims are atomic in SQLite, so several processes
+can share one queue. In production the threads run in one separate process
+(`python module11_jobs.py work`, spawned by gunicorn.conf.py), not in the
+web workers, where they would compete with requests for the GIL. That
+process also runs the evaluation partition maintenance.
+
+Handlers take (items, options) and return one JSON-serializable result per
+item; per-item problems belong in that item's result, an exception fails the
+whole job.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+Handler = Callable[[List[Any], Dict[str, Any]], List[Any]]
+
+CHUNK_SIZE = 64
+DEFAULT_WORKERS = 2
+# A running job is re-claimable once its worker has not checkpointed for this long
+LEASE_SECONDS = 60.0
+# Idle workers re-check the table this often (jobs may come from other
+# processes); the check is a plain read, the write lock is only taken to claim
+POLL_SECONDS = 1.0
+MAX_JOB_ITEMS = 10000
+MAX_RESULTS_PAGE = 500
+
+STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobQueue:
+
+    def __init__(self, db_path: str, handlers: Optional[Dict[str, Handler]] = None,
+                 num_workers: int = DEFAULT_WORKERS, chunk_size: int = CHUNK_SIZE):
+        self.db_path = db_path
+        self.handlers: Dict[str, Handler] = dict(handlers or {})
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._started_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    # --------------------------------------------------
+    # Schema / connections
+    # --------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_schema(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                payload TEXT NOT NULL,
+                error TEXT,
+                lease_until REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                item_index INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (job_id, item_index)
+            )
+            """)
+        finally:
+            conn.close()
+
+    # --------------------------------------------------
+    # Client side
+    # --------------------------------------------------
+
+    def submit(self, kind: str, items: List[Any], options: Optional[Dict[str, Any]] = None) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if not items:
+            raise ValueError("A job needs at least one item")
+        if len(items) > MAX_JOB_ITEMS:
+            raise ValueError(f"Too many items (max {MAX_JOB_ITEMS})")
+
+        job_id = uuid.uuid4().hex
+        payload = json.dumps({"items": items, "options": options or {}})
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, total, payload) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, len(items), payload)
+            )
+        finally:
+            conn.close()
+        self._wake.set()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, kind, status, total, completed, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "total": row["total"],
+            "completed": row["completed"],
+            "progress": row["completed"] / row["total"] if row["total"] else 1.0,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def results(self, job_id: str, offset: int = 0, limit: int = MAX_RESULTS_PAGE) -> List[Any]:
+        """Checkpointed results from item `offset` on (available while the job still runs)."""
+        limit = max(0, min(limit, MAX_RESULTS_PAGE))
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT result FROM job_results WHERE job_id = ? AND item_index >= ? "
+                "ORDER BY item_index LIMIT ?", (job_id, offset, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [json.loads(row["result"]) for row in rows]
+
+    # --------------------------------------------------
+    # Worker side
+    # --------------------------------------------------
+
+    def _claim(self, conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        """Atomically takes the oldest queued job, or a running one whose lease expired."""
+        now = time.time()
+        claimable = ("WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                     "ORDER BY created_at LIMIT 1")
+        # Idle polls stop at this read and never queue up for the write lock
+        if conn.execute("SELECT 1 FROM jobs " + claimable, (now,)).fetchone() is None:
+            return None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-checked under the lock: another worker may have claimed it
+            row = conn.execute(
+                "SELECT id, kind, total, completed, payload FROM jobs " + claimable, (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', lease_until = ?, "
+                    "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (now + LEASE_SECONDS, row["id"])
+                )
+            conn.execute("COMMIT")
+            return row
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _run_job(self, conn: sqlite3.Connection, job: sqlite3.Row) -> None:
+        job_id = job["id"]
+        payload = json.loads(job["payload"])
+        items, options = payload["items"], payload["options"]
+        handler = self.handlers.get(job["kind"])
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind: {job['kind']}")
+
+            # Resume after the last checkpointed chunk
+            for start in range(job["completed"], job["total"], self.chunk_size):
+                if self._stop.is_set():
+                    return  # lease expires and another worker resumes here
+                chunk = items[start:start + self.chunk_size]
+                results = handler(chunk, options)
+                if len(results) != len(chunk):
+                    raise RuntimeError(f"Handler returned {len(results)} results for {len(chunk)} items")
+
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO job_results (job_id, item_index, result) VALUES (?, ?, ?)",
+                    [(job_id, start + i, json.dumps(result)) for i, result in enumerate(results)]
+                )
+                conn.execute(
+                    "UPDATE jobs SET completed = ?, lease_until = ?, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE id = ?", (start + len(chunk), time.time() + LEASE_SECONDS, job_id)
+                )
+                conn.execute("COMMIT")
+
+            conn.execute(
+                "UPDATE jobs SET status = 'done', lease_until = NULL, updated_at = CURRENT_TIMESTAMP "
+                "WHERE id = ?", (job_id,)
+            )
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, "
+                "updated_at = CURRENT_TIMESTAMP WHERE id = ?", (str(e), job_id)
+            )
+
+    def _worker(self) -> None:
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                try:
+                    job = self._claim(conn)
+                except sqlite3.OperationalError as e:
+                    print(f"[WARN] Job claim failed: {e}")
+                    job = None
+                if job is None:
+                    self._wake.wait(POLL_SECONDS)
+                    self._wake.clear()
+                    continue
+                try:
+                    self._run_job(conn, job)
+                except sqlite3.Error as e:
+                    # A checkpoint or the status update itself failed (e.g. the
+                    # database stayed locked); the job keeps its lease, which
+                    # expires, and it is claimed again from its last checkpoint
+                    print(f"[WARN] Job {job['id']} could not be updated: {e}")
+                    if conn.in_transaction:
+                        try:
+                            conn.execute("ROLLBACK")
+                        except sqlite3.Error:
+                            pass
+        finally:
+            conn.close()
+
+    def run_until_idle(self) -> int:
+        """Processes jobs in the calling thread until none are claimable. Returns jobs run."""
+        conn = self._connect()
+        runs = 0
+        try:
+            while True:
+                job = self._claim(conn)
+                if job is None:
+                    return runs
+                self._run_job(conn, job)
+                runs += 1
+        finally:
+            conn.close()
+
+    def ensure_started(self) -> None:
+        """Starts the worker threads once per process (threads do not survive fork)."""
+        if self.num_workers <= 0 or self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.num_workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._started_pid = os.getpid()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._started_pid = None
+
+
+# --------------------------------------------------
+# Standalone worker / demo
+#   python module11_jobs.py work   -> run the app's job workers (and partition
+#                                     maintenance) in this process
+#   python module11_jobs.py        -> demo on a temporary database
+# --------------------------------------------------
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 2 and sys.argv[1] == "work":
+        import signal
+
+        # Not app: the evaluation pipeline and the database paths only, so
+        # this process starts without Flask, the student index or DB setup
+        import module12_partitions as partmod
+        import module17_pipeline as pipeline
+
+        queue = JobQueue(pipeline.DB_PATH, pipeline.JOB_HANDLERS, num_workers=DEFAULT_WORKERS)
+        queue.init_schema()
+        queue.ensure_started()
+        # The one process per server, so archival and VACUUM run only here
+        maintainer = partmod.PartitionMaintainer(pipeline.DB_PATH, pipeline.ARCHIVE_DIR,
+                                                 pipeline.HOT_MONTHS, pipeline.RETENTION_MONTHS)
+        maintainer.ensure_started()
+        # gunicorn's master sends SIGTERM on shutdown; stop between chunks
+        signal.signal(signal.SIGTERM, lambda signum, frame: queue._stop.set())
+        print(f"Job workers running against {pipeline.DB_PATH} (Ctrl+C to stop)")
+        try:
+            while not queue._stop.wait(3600):
+                pass
+        except KeyboardInterrupt:
+            pass
+        queue.stop(timeout=5.0)
+        maintainer.stop()
+        sys.exit(0)
+
+    import tempfile
+
+    calls = []
+    shutdown_after = [2]  # chunks, once
+
+    def square(items: List[Any], options: Dict[str, Any]) -> List[Any]:
+        calls.append(items[0])
+        if shutdown_after and len(calls) == shutdown_after[0]:
+            shutdown_after.clear()
+            queue._stop.set()  # the process is shutting down mid-job
+        if "boom" in items:
+            raise RuntimeError("bad item")
+        return [x * x for x in items]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(os.path.join(tmp, "jobs.db"), {"square": square}, num_workers=0, chunk_size=10)
+        queue.init_schema()
+
+        job_id = queue.submit("square", list(range(35)))
+        queue.run_until_idle()
+        status = queue.status(job_id)
+        print("interrupted :", status["status"], status["completed"], "/ 35")
+
+        # Another worker picks it up once the lease has expired
+        queue._stop.clear()
+        conn = queue._connect()
+        conn.execute("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job_id,))
+        conn.close()
+        calls.clear()
+        queue.run_until_idle()
+        status = queue.status(job_id)
+        print("resumed     :", status["status"], status["completed"], "/ 35, chunks starting at", calls)
+        assert queue.results(job_id) == [x * x for x in range(35)]
+
+        failed = queue.submit("square", [1, 2, "boom"])
+        queue.run_until_idle()
+        print("failed job  :", queue.status(failed)["status"], queue.status(failed)["error"])
+
+        queue.num_workers = 2
+        queue.ensure_started()
+        ids = [queue.submit("square", list(range(100))) for _ in range(5)]
+        t0 = time.perf_counter()
+        while any(queue.status(j)["status"] != "done" for j in ids):
+            time.sleep(0.01)
+        print(f"5 jobs x 100 items on 2 worker threads: {(time.perf_counter() - t0) * 1000:.1f} ms")
+        queue.stop()
@@ -0,0 +1,392 @@
+# module12_partitions.py
+"""
+Month-partitioned evaluations storage with archival and retention.
+
+Rows live in one table per UTC month (evaluations_pYYYYMM) inside
+evaluations.db, and `evaluations` is a UNION ALL view over the partitions
+still in the database, so existing readers (SELECT ... FROM evaluations
+WHERE id > ?) keep working. SQLite pushes the id range into every
+partition's integer primary key.
+
+Ids stay globally increasing through a one-row counter (evaluation_sequence),
+so an insert is one UPDATE plus one INSERT into the current partition,
+whatever the table sizes.
+
+Maintenance (run in the background by the job worker process, or from cron
+with `python module12_partitions.py maintain <db_path>`; one process only,
+since VACUUM needs the database to itself):
+- partitions older than hot_months are copied to a gzip-compressed SQLite
+  file in the archive directory, dropped from the main database and removed
+  from the view; the database is then VACUUMed, which is cheap because only
+  hot months are left;
+- archives older than retention_months are deleted (0 keeps them forever).
+
+restore_partition() brings an archived month back into the view.
+"""
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+PARTITION_PREFIX = "evaluations_p"
+VIEW_NAME = "evaluations"
+ARCHIVE_SUFFIX = ".db.gz"
+
+# Months kept in the main database (the current month counts as one)
+DEFAULT_HOT_MONTHS = 3
+# Months after which archives are deleted; 0 keeps them forever
+DEFAULT_RETENTION_MONTHS = 0
+MAINTENANCE_INTERVAL_SECONDS = 6 * 3600
+
+_PARTITION_RE = re.compile(r"^" + PARTITION_PREFIX + r"(\d{6})$")
+
+PARTITION_COLUMNS = """
+    id INTEGER PRIMARY KEY,
+    role TEXT NOT NULL,
+    alignment REAL NOT NULL,
+    readiness REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    student_vector BLOB
+"""
+COLUMN_NAMES = "id, role, alignment, readiness, created_at, student_vector"
+
+
+# --------------------------------------------------
+# Month helpers
+# --------------------------------------------------
+
+def current_month(now: Optional[float] = None) -> str:
+    """UTC month as YYYYMM (CURRENT_TIMESTAMP is UTC too)."""
+    return time.strftime("%Y%m", time.gmtime(now))
+
+
+def shift_month(month: str, delta: int) -> str:
+    index = int(month[:4]) * 12 + int(month[4:]) - 1 + delta
+    return f"{index // 12:04d}{index % 12 + 1:02d}"
+
+
+def partition_name(month: str) -> str:
+    if not re.fullmatch(r"\d{6}", month):
+        raise ValueError(f"Invalid partition month: {month}")
+    return PARTITION_PREFIX + month
+
+
+def list_partitions(conn: sqlite3.Connection) -> List[str]:
+    """Months with a partition table in the database, oldest first."""
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    return sorted(m.group(1) for (name,) in rows for m in [_PARTITION_RE.match(name)] if m)
+
+
+# --------------------------------------------------
+# Schema
+# --------------------------------------------------
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def _rebuild_view(conn: sqlite3.Connection) -> None:
+    months = list_partitions(conn)
+    conn.execute(f"DROP VIEW IF EXISTS {VIEW_NAME}")
+    if months:
+        body = " UNION ALL ".join(f"SELECT {COLUMN_NAMES} FROM {partition_name(m)}" for m in months)
+    else:
+        body = ("SELECT NULL AS id, NULL AS role, NULL AS alignment, NULL AS readiness, "
+                "NULL AS created_at, NULL AS student_vector WHERE 0")
+    conn.execute(f"CREATE VIEW {VIEW_NAME} AS {body}")
+
+
+def _ensure_partition(conn: sqlite3.Connection, month: str) -> None:
+    """Creates the month's table and adds it to the view; call inside a write transaction."""
+    table = partition_name(month)
+    if not _table_exists(conn, table):
+        conn.execute(f"CREATE TABLE {table} ({PARTITION_COLUMNS})")
+        _rebuild_view(conn)
+
+
+def _migrate_legacy_table(conn: sqlite3.Connection) -> None:
+    """Moves rows of a pre-partitioning `evaluations` table into monthly partitions."""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({VIEW_NAME})")}
+    vector = "student_vector" if "student_vector" in columns else "NULL"
+    months = [m for (m,) in conn.execute(
+        f"SELECT DISTINCT strftime('%Y%m', COALESCE(created_at, CURRENT_TIMESTAMP)) FROM {VIEW_NAME}"
+    )]
+    for month in months:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {partition_name(month)} ({PARTITION_COLUMNS})")
+        conn.execute(
+            f"INSERT INTO {partition_name(month)} ({COLUMN_NAMES}) "
+            f"SELECT id, role, alignment, readiness, created_at, {vector} FROM {VIEW_NAME} "
+            f"WHERE strftime('%Y%m', COALESCE(created_at, CURRENT_TIMESTAMP)) = ?", (month,)
+        )
+    conn.execute(f"DROP TABLE {VIEW_NAME}")
+
+
+def init_storage(db_path: str) -> None:
+    """Creates (or migrates to) the partitioned layout. Safe to call from every process."""
+    conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("CREATE TABLE IF NOT EXISTS evaluation_sequence (last_id INTEGER NOT NULL)")
+        if conn.execute("SELECT COUNT(*) FROM evaluation_sequence").fetchone()[0] == 0:
+            # Continue after the legacy AUTOINCREMENT ids (including deleted ones)
+            seq = None
+            if _table_exists(conn, "sqlite_sequence"):
+                seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (VIEW_NAME,)).fetchone()
+            conn.execute("INSERT INTO evaluation_sequence (last_id) VALUES (?)", (seq[0] if seq else 0,))
+
+        legacy = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (VIEW_NAME,)
+        ).fetchone()
+        if legacy:
+            max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {VIEW_NAME}").fetchone()[0]
+            conn.execute("UPDATE evaluation_sequence SET last_id = MAX(last_id, ?)", (max_id,))
+            _migrate_legacy_table(conn)
+            _rebuild_view(conn)
+        _ensure_partition(conn, current_month())
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+# --------------------------------------------------
+# Writes
+# --------------------------------------------------
+
+# Months this process has already seen a partition for
+_known_partitions = set()
+_known_lock = threading.Lock()
+
+
+def insert_evaluation(conn: sqlite3.Connection, role: str, alignment: float, readiness: float,
+                      student_vector: Optional[bytes] = None) -> int:
+    """Inserts into the current month's partition and commits. Returns the new id."""
+    month = current_month()
+    if month not in _known_partitions:
+        # First insert of a month in this process (or a fresh process)
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        _ensure_partition(conn, month)
+        conn.commit()
+        with _known_lock:
+            _known_partitions.add(month)
+
+    try:
+        conn.execute("UPDATE evaluation_sequence SET last_id = last_id + 1")
+        eval_id = conn.execute("SELECT last_id FROM evaluation_sequence").fetchone()[0]
+        conn.execute(
+            f"INSERT INTO {partition_name(month)} (id, role, alignment, readiness, student_vector) "
+            f"VALUES (?, ?, ?, ?, ?)",
+            (eval_id, role, float(alignment), float(readiness), student_vector)
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return eval_id
+
+
+# --------------------------------------------------
+# Archival and retention
+# --------------------------------------------------
+
+def archive_path(archive_dir: str, month: str) -> str:
+    return os.path.join(archive_dir, partition_name(month) + ARCHIVE_SUFFIX)
+
+
+def archive_partition(db_path: str, month: str, archive_dir: str) -> int:
+    """
+    Copies one partition to <archive_dir>/evaluations_pYYYYMM.db.gz, then
+    drops it from the main database. Returns the number of rows archived.
+    """
+    table = partition_name(month)
+    os.makedirs(archive_dir, exist_ok=True)
+    final_path = archive_path(archive_dir, month)
+
+    with tempfile.TemporaryDirectory(dir=archive_dir) as tmp:
+        plain_path = os.path.join(tmp, table + ".db")
+        conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+        try:
+            if not _table_exists(conn, table):
+                return 0
+            conn.execute("ATTACH DATABASE ? AS archive", (plain_path,))
+            conn.execute(f"CREATE TABLE archive.{table} ({PARTITION_COLUMNS})")
+            conn.execute(f"INSERT INTO archive.{table} SELECT {COLUMN_NAMES} FROM main.{table}")
+            rows = conn.execute(f"SELECT COUNT(*) FROM archive.{table}").fetchone()[0]
+            conn.execute("DETACH DATABASE archive")
+
+            gz_tmp = os.path.join(tmp, os.path.basename(final_path))
+            with open(plain_path, "rb") as src, gzip.open(gz_tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            with open(gz_tmp, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(gz_tmp, final_path)
+
+            # The archive is durable; only now does the partition leave the database
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            _rebuild_view(conn)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    with _known_lock:
+        _known_partitions.discard(month)
+    return rows
+
+
+def restore_partition(db_path: str, month: str, archive_dir: str) -> int:
+    """Loads an archived month back into the main database and the view. Returns rows restored."""
+    table = partition_name(month)
+    with tempfile.TemporaryDirectory(dir=archive_dir) as tmp:
+        plain_path = os.path.join(tmp, table + ".db")
+        with gzip.open(archive_path(archive_dir, month), "rb") as src, open(plain_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+        conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("ATTACH DATABASE ? AS archive", (plain_path,))
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS main.{table} ({PARTITION_COLUMNS})")
+            conn.execute(f"INSERT OR IGNORE INTO main.{table} SELECT {COLUMN_NAMES} FROM archive.{table}")
+            rows = conn.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+            _rebuild_view(conn)
+            conn.execute("COMMIT")
+            conn.execute("DETACH DATABASE archive")
+        finally:
+            conn.close()
+    return rows
+
+
+def maintain(db_path: str, archive_dir: str, hot_months: int = DEFAULT_HOT_MONTHS,
+             retention_months: int = DEFAULT_RETENTION_MONTHS, now: Optional[float] = None) -> dict:
+    """Archives cold partitions and applies retention to the archives. Idempotent."""
+    this_month = current_month(now)
+    oldest_hot = shift_month(this_month, -(max(1, hot_months) - 1))
+
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    try:
+        cold = [m for m in list_partitions(conn) if m < oldest_hot]
+    finally:
+        conn.close()
+
+    archived = {month: archive_partition(db_path, month, archive_dir) for month in cold}
+    if archived:
+        conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            print(f"[WARN] VACUUM skipped: {e}")
+        finally:
+            conn.close()
+
+    deleted = []
+    if retention_months > 0 and os.path.isdir(archive_dir):
+        oldest_kept = shift_month(this_month, -(retention_months - 1))
+        for name in sorted(os.listdir(archive_dir)):
+            m = _PARTITION_RE.match(name[:-len(ARCHIVE_SUFFIX)]) if name.endswith(ARCHIVE_SUFFIX) else None
+            if m and m.group(1) < oldest_kept:
+                os.remove(os.path.join(archive_dir, name))
+                deleted.append(m.group(1))
+
+    return {"archived": archived, "deleted_archives": deleted}
+
+
+class PartitionMaintainer:
+    """
+    Runs maintain() every MAINTENANCE_INTERVAL_SECONDS in a daemon thread.
+    Start it in one process per database, not in every web worker.
+    """
+
+    def __init__(self, db_path: str, archive_dir: str, hot_months: int = DEFAULT_HOT_MONTHS,
+                 retention_months: int = DEFAULT_RETENTION_MONTHS,
+                 interval: float = MAINTENANCE_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.archive_dir = archive_dir
+        self.hot_months = hot_months
+        self.retention_months = retention_months
+        self.interval = interval
+        self._stop = threading.Event()
+        self._started_pid: Optional[int] = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                maintain(self.db_path, self.archive_dir, self.hot_months, self.retention_months)
+            except (OSError, sqlite3.Error) as e:
+                print(f"[WARN] Partition maintenance failed: {e}")
+            self._stop.wait(self.interval)
+
+    def ensure_started(self) -> None:
+        if self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+        threading.Thread(target=self._run, name="partition-maintenance", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# --------------------------------------------------
+# CLI / demo
+#   python module12_partitions.py maintain <db_path> [archive_dir]
+#   python module12_partitions.py              -> demo on a temporary database
+# --------------------------------------------------
+if __name__ == "__main__":
+    if len(sys.argv) in (3, 4) and sys.argv[1] == "maintain":
+        db = sys.argv[2]
+        archive_dir = sys.argv[3] if len(sys.argv) == 4 else os.path.join(os.path.dirname(os.path.abspath(db)), "archive")
+        init_storage(db)
+        print(maintain(db, archive_dir))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "evaluations.db")
+        archive_dir = os.path.join(tmp, "archive")
+
+        # A pre-partitioning database with rows from three months
+        conn = sqlite3.connect(db)
+        conn.execute("""
+        CREATE TABLE evaluations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, role TEXT NOT NULL, alignment REAL NOT NULL,
+            readiness REAL NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+        old = [shift_month(current_month(), -d) for d in (5, 4, 0)]
+        for i in range(300):
+            month = old[i % 3]
+            conn.execute("INSERT INTO evaluations (role, alignment, readiness, created_at) VALUES (?, ?, ?, ?)",
+                         ("SDE", 0.5, 0.5, f"{month[:4]}-{month[4:]}-15 12:00:00"))
+        conn.commit()
+        conn.close()
+
+        init_storage(db)
+        conn = sqlite3.connect(db)
+        print("partitions:", list_partitions(conn), "rows in view:", conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0])
+
+        runs = 2000
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            last = insert_evaluation(conn, "SDE", 0.7, 0.6)
+        print(f"insert: {(time.perf_counter() - t0) * 1e6 / runs:.0f} us per row (last id {last})")
+        t0 = time.perf_counter()
+        recent = conn.execute("SELECT COUNT(*) FROM evaluations WHERE id > ?", (last - 100,)).fetchone()[0]
+        print(f"recent-range query: {recent} rows in {(time.perf_counter() - t0) * 1e3:.2f} ms")
+        conn.close()
+
+        print("maintain:", maintain(db, archive_dir, hot_months=3))
+        conn = sqlite3.connect(db)
+        print("partitions:", list_partitions(conn), "rows in view:", conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0])
+        conn.close()
+        print("archives:", sorted(os.listdir(archive_dir)))
+        print("restored rows:", restore_partition(db, old[0], archive_dir))
+        print("retention:", maintain(db, archive_dir, hot_months=12, retention_months=5))
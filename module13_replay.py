@@ -0,0 +1,400 @@
+# module13_replay.py
+"""
+Replays a recorded request corpus against two versions of the backend and
+reports output differences and per-request latency deltas, so a change to
+the scoring or the recommender (calculate_priority, should_skim, the week
+scheduler, ...) can be checked before deploy.
+
+    python module13_replay.py run corpus.jsonl [--base HEAD] [--head WORKTREE]
+                                               [--workers 2] [--repeat 3]
+    python module13_replay.py sample 500 > corpus.jsonl
+
+Corpus: JSON lines, each either a request body for POST /evaluate or
+{"path": "/simulate", "body": {...}}. Only stateless endpoints replay
+deterministically (/evaluate, /simulate); handles and neighbors depend on
+what the worker stored earlier.
+
+Versions: a git ref (exported with `git archive`) or WORKTREE (the tracked
+and untracked files of this checkout). Each version runs in its own pool of
+worker processes; every worker imports the app from a private copy of the
+version's tree, database included, and replays through the Flask test
+client, so neither version touches this checkout's evaluations.db.
+
+Compared per request: status, error, alignment_score, readiness_score,
+gaps, top_gaps and plan. Floats match within a tolerance (scores and gaps:
+--score-tol, plan hours: --plan-tol); anything else must be equal. Latency
+is the fastest of --repeat runs. Exit status 1 on any difference or when
+the median latency grew by more than --max-slowdown.
+
+Only the standard library is imported here, so worker processes load
+nothing but the version they replay.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKTREE = "WORKTREE"
+# Left out of every version tree (not needed to serve requests)
+EXCLUDED_PATHS = ("frontend", "archive", "student_index")
+
+DEFAULT_WORKERS = 2
+DEFAULT_REPEAT = 3
+# Requests sent to a worker per task
+CHUNK_SIZE = 16
+SCORE_TOLERANCE = 1e-6
+PLAN_TOLERANCE = 1e-6
+# Allowed growth of the median latency (0.2 = 20 % slower)
+MAX_SLOWDOWN = 0.2
+# Differences listed per request in the report
+MAX_LISTED_DIFFS = 5
+
+SCORE_FIELDS = ("alignment_score", "readiness_score", "gaps", "top_gaps")
+COMPARED_FIELDS = ("status", "error") + SCORE_FIELDS + ("plan",)
+
+Request = Tuple[int, str, Dict[str, Any]]  # (index, path, body)
+
+
+# --------------------------------------------------
+# Corpus
+# --------------------------------------------------
+
+def load_corpus(path: str) -> List[Request]:
+    requests = []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({e})")
+            if not isinstance(entry, dict):
+                raise ValueError(f"{path}:{line_no}: expected an object")
+            if "body" in entry:
+                requests.append((len(requests), entry.get("path", "/evaluate"), entry["body"]))
+            else:
+                requests.append((len(requests), "/evaluate", entry))
+    return requests
+
+
+def sample_corpus(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Random /evaluate bodies over the roles of this checkout (module14_synthetic profiles)."""
+    sys.path.insert(0, BASE_DIR)
+    import module2_models as m2
+    import module14_synthetic as synthetic
+
+    rng = random.Random(seed)
+    corpus = []
+    for body in synthetic.generate_profiles(m2.ROLES, n, seed):
+        if rng.random() < 0.2:
+            body["selection"] = "submodular"
+        corpus.append(body)
+    return corpus
+
+
+# --------------------------------------------------
+# Version trees
+# --------------------------------------------------
+
+def _excluded(rel_path: str) -> bool:
+    return rel_path.split("/", 1)[0] in EXCLUDED_PATHS
+
+
+def materialize(ref: str, dest: str) -> None:
+    """Writes the files of `ref` (a git ref, or WORKTREE) to dest."""
+    os.makedirs(dest, exist_ok=True)
+    if ref == WORKTREE:
+        listed = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=BASE_DIR, check=True, capture_output=True
+        ).stdout.decode("utf-8").split("\0")
+        for rel_path in filter(None, listed):
+            src = os.path.join(BASE_DIR, rel_path)
+            if _excluded(rel_path) or not os.path.isfile(src):
+                continue
+            os.makedirs(os.path.dirname(os.path.join(dest, rel_path)), exist_ok=True)
+            shutil.copy2(src, os.path.join(dest, rel_path))
+        return
+
+    archive = subprocess.run(["git", "archive", "--format=tar", ref],
+                             cwd=BASE_DIR, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        members = [m for m in tar.getmembers() if not _excluded(m.name)]
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(dest, members=members, filter="data")
+        else:
+            tar.extractall(dest, members=members)
+
+
+# --------------------------------------------------
+# Worker processes
+# --------------------------------------------------
+
+_client = None
+
+
+def _init_worker(version_dir: str, scratch_root: str) -> None:
+    """Imports the app from a private copy of the version tree (its own database)."""
+    global _client
+    tree = tempfile.mkdtemp(dir=scratch_root)
+    shutil.copytree(version_dir, tree, dirs_exist_ok=True)
+    os.environ["SKILLGAP_JOB_WORKERS"] = "0"
+    sys.path.insert(0, tree)
+    os.chdir(tree)
+    import app
+
+    for name in ("RATE_LIMITER", "UPDATE_RATE_LIMITER"):
+        limiter = getattr(app, name, None)
+        if limiter is not None:  # versions with admission control
+            limiter.rate = limiter.burst = float("inf")
+    _client = app.app.test_client()
+
+
+def _summarize(status: int, body: Any) -> Dict[str, Any]:
+    summary = {"status": status}
+    if isinstance(body, dict):
+        for field in COMPARED_FIELDS[1:]:
+            if field in body:
+                summary[field] = body[field]
+    return summary
+
+
+def _replay_chunk(chunk: List[Request], repeat: int) -> List[Tuple[int, Dict[str, Any], float]]:
+    """(index, summary of the first response, fastest latency in ms) per request."""
+    results = []
+    for index, path, body in chunk:
+        summary, best = None, math.inf
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            response = _client.post(path, json=body)
+            payload = response.get_json(silent=True)
+            best = min(best, (time.perf_counter() - t0) * 1000.0)
+            if summary is None:
+                summary = _summarize(response.status_code, payload)
+        results.append((index, summary, best))
+    return results
+
+
+# --------------------------------------------------
+# Comparison
+# --------------------------------------------------
+
+def _keyed_by_id(items: List[Any]) -> bool:
+    ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+    return bool(items) and None not in ids and len(set(ids)) == len(ids)
+
+
+def _diff_by_id(old: List[Dict[str, Any]], new: List[Dict[str, Any]], tol: float, path: str) -> List[str]:
+    """Lists of entries with unique ids (plan resources) are matched by id, not position."""
+    old_by_id = {item["id"]: item for item in old}
+    new_by_id = {item["id"]: item for item in new}
+    diffs = [f"{path}: added {rid}" for rid in new_by_id if rid not in old_by_id]
+    diffs.extend(f"{path}: removed {rid}" for rid in old_by_id if rid not in new_by_id)
+    kept_old = [rid for rid in old_by_id if rid in new_by_id]
+    kept_new = [rid for rid in new_by_id if rid in old_by_id]
+    if kept_old != kept_new:
+        diffs.append(f"{path}: order {kept_old} -> {kept_new}")
+    for rid in kept_new:
+        diffs.extend(diff_values(old_by_id[rid], new_by_id[rid], tol, f"{path}[{rid}]"))
+    return diffs
+
+
+def diff_values(old: Any, new: Any, tol: float, path: str = "") -> List[str]:
+    """Differences between two JSON values; numbers match within tol."""
+    if isinstance(old, bool) or isinstance(new, bool) or old is None or new is None:
+        return [] if old == new else [f"{path or '.'}: {old!r} -> {new!r}"]
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        if math.isclose(old, new, rel_tol=0.0, abs_tol=tol):
+            return []
+        return [f"{path or '.'}: {old!r} -> {new!r}"]
+    if isinstance(old, dict) and isinstance(new, dict):
+        diffs = []
+        for key in sorted(set(old) | set(new), key=str):
+            sub = f"{path}.{key}"
+            if key not in old:
+                diffs.append(f"{sub}: added {new[key]!r}")
+            elif key not in new:
+                diffs.append(f"{sub}: removed")
+            else:
+                diffs.extend(diff_values(old[key], new[key], tol, sub))
+        return diffs
+    if isinstance(old, list) and isinstance(new, list):
+        if _keyed_by_id(old) and _keyed_by_id(new):
+            return _diff_by_id(old, new, tol, path)
+        if len(old) != len(new):
+            return [f"{path or '.'}: length {len(old)} -> {len(new)}"]
+        diffs = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            diffs.extend(diff_values(a, b, tol, f"{path}[{i}]"))
+        return diffs
+    return [] if old == new else [f"{path or '.'}: {old!r} -> {new!r}"]
+
+
+def diff_summaries(old: Dict[str, Any], new: Dict[str, Any],
+                   score_tol: float = SCORE_TOLERANCE, plan_tol: float = PLAN_TOLERANCE) -> List[str]:
+    diffs = []
+    for field in COMPARED_FIELDS:
+        if field not in old and field not in new:
+            continue
+        if field not in old or field not in new:
+            diffs.append(f"{field}: {'added' if field in new else 'removed'}")
+            continue
+        tol = score_tol if field in SCORE_FIELDS else plan_tol if field == "plan" else 0.0
+        diffs.extend(diff_values(old[field], new[field], tol, field))
+    return diffs
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# --------------------------------------------------
+# Replay
+# --------------------------------------------------
+
+def replay(requests: List[Request], base: str = "HEAD", head: str = WORKTREE,
+           workers: int = DEFAULT_WORKERS, repeat: int = DEFAULT_REPEAT,
+           score_tol: float = SCORE_TOLERANCE, plan_tol: float = PLAN_TOLERANCE) -> Dict[str, Any]:
+    """Runs the corpus through both versions (in parallel pools) and compares them."""
+    chunks = [requests[i:i + CHUNK_SIZE] for i in range(0, len(requests), CHUNK_SIZE)]
+    results: Dict[str, Dict[int, Tuple[Dict[str, Any], float]]] = {"base": {}, "head": {}}
+
+    with tempfile.TemporaryDirectory(prefix="skillgap-replay-") as scratch:
+        pools, futures = {}, []
+        try:
+            for name, ref in (("base", base), ("head", head)):
+                version_dir = os.path.join(scratch, name)
+                materialize(ref, version_dir)
+                pools[name] = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=get_context("spawn"),
+                    initializer=_init_worker, initargs=(version_dir, scratch)
+                )
+            # Interleaved, so both versions see the same machine load
+            for chunk in chunks:
+                for name, pool in pools.items():
+                    futures.append((name, pool.submit(_replay_chunk, chunk, repeat)))
+            for name, future in futures:
+                for index, summary, latency in future.result():
+                    results[name][index] = (summary, latency)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(cancel_futures=True)
+
+    entries = []
+    for index, path, _ in requests:
+        old, old_ms = results["base"][index]
+        new, new_ms = results["head"][index]
+        entries.append({
+            "index": index,
+            "path": path,
+            "diffs": diff_summaries(old, new, score_tol, plan_tol),
+            "base_ms": old_ms,
+            "head_ms": new_ms,
+            "delta_ms": new_ms - old_ms,
+        })
+
+    base_ms = [e["base_ms"] for e in entries]
+    head_ms = [e["head_ms"] for e in entries]
+    return {
+        "base": base,
+        "head": head,
+        "requests": len(entries),
+        "mismatched": sum(1 for e in entries if e["diffs"]),
+        "latency_ms": {
+            "base": {"p50": _percentile(base_ms, 0.5), "p95": _percentile(base_ms, 0.95)},
+            "head": {"p50": _percentile(head_ms, 0.5), "p95": _percentile(head_ms, 0.95)},
+        },
+        "entries": entries,
+    }
+
+
+def slowdown(report: Dict[str, Any]) -> float:
+    """Relative growth of the median latency from base to head."""
+    base = report["latency_ms"]["base"]["p50"]
+    return report["latency_ms"]["head"]["p50"] / base - 1.0 if base > 0 else 0.0
+
+
+def format_report(report: Dict[str, Any], top: int = 5) -> str:
+    lines = [f"Replayed {report['requests']} requests: {report['base']} -> {report['head']}"]
+    for entry in report["entries"]:
+        if not entry["diffs"]:
+            continue
+        lines.append(f"  #{entry['index']} {entry['path']}: {len(entry['diffs'])} difference(s)")
+        lines.extend(f"      {d}" for d in entry["diffs"][:MAX_LISTED_DIFFS])
+        if len(entry["diffs"]) > MAX_LISTED_DIFFS:
+            lines.append(f"      ... {len(entry['diffs']) - MAX_LISTED_DIFFS} more")
+    lines.append(f"Outputs: {report['mismatched']} of {report['requests']} requests differ")
+
+    latency = report["latency_ms"]
+    lines.append(
+        f"Latency (ms): p50 {latency['base']['p50']:.2f} -> {latency['head']['p50']:.2f} "
+        f"({slowdown(report):+.1%}), p95 {latency['base']['p95']:.2f} -> {latency['head']['p95']:.2f}"
+    )
+    slowest = sorted(report["entries"], key=lambda e: e["delta_ms"], reverse=True)[:top]
+    for entry in slowest:
+        if entry["delta_ms"] <= 0:
+            break
+        lines.append(f"  #{entry['index']} {entry['path']}: {entry['base_ms']:.2f} -> "
+                     f"{entry['head_ms']:.2f} ms ({entry['delta_ms']:+.2f})")
+    return "\n".join(lines)
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a request corpus against two backend versions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="replay a corpus and compare versions")
+    run.add_argument("corpus")
+    run.add_argument("--base", default="HEAD", help="git ref or WORKTREE (default HEAD)")
+    run.add_argument("--head", default=WORKTREE, help="git ref or WORKTREE (default WORKTREE)")
+    run.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="worker processes per version")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per request (fastest counts)")
+    run.add_argument("--score-tol", type=float, default=SCORE_TOLERANCE)
+    run.add_argument("--plan-tol", type=float, default=PLAN_TOLERANCE)
+    run.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN)
+    run.add_argument("--json", help="also write the full report to this file")
+
+    sample = commands.add_parser("sample", help="print a random /evaluate corpus")
+    sample.add_argument("n", type=int)
+    sample.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "sample":
+        for body in sample_corpus(args.n, args.seed):
+            print(json.dumps(body))
+        return 0
+
+    report = replay(load_corpus(args.corpus), args.base, args.head, max(1, args.workers),
+                    args.repeat, args.score_tol, args.plan_tol)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    regressed = report["mismatched"] > 0 or slowdown(report) > args.max_slowdown
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+# module14_synthetic.py
+"""
+Seeded synthetic roles, skills, catalogs and student profiles for scaling
+studies, in the formats the rest of the backend already uses:
+
+    skills        : module2_models.SKILLS format  {name: {"id", "group"}}
+    prerequisites : module2_models.SKILL_PREREQUISITES format (acyclic)
+    roles         : module2_models.ROLES format; weights sum to 1
+    resources     : module2_models.DEFAULT_RESOURCES format (module9 can convert them)
+    profiles      : {"role", "student_profile"} items, as /evaluate,
+                    /evaluate/stream and module13_replay take them
+
+Skill popularity follows a Zipf law over skill ranks: a few skills appear
+in most roles and resources, most skills in only a handful. Roles pick
+their skills and resources their covered skills by that popularity.
+
+install() swaps a dataset into module2_models in place (and bumps
+ROLES_GENERATION so every per-role cache rebuilds); installed() restores
+the original definitions afterwards.
+
+    python module14_synthetic.py generate <out_dir> [--skills 500] [--roles 200]
+                                 [--resources 50000] [--profiles 10000] [--seed 0]
+    python module14_synthetic.py bench
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+import module2_models as m2
+
+ZIPF_EXPONENT = 1.1
+NUM_SKILL_GROUPS = 12
+# Skills per role (inclusive range)
+ROLE_SKILLS = (6, 24)
+# Skills covered per resource follow 1 + Poisson(mean), capped
+RESOURCE_EXTRA_SKILLS_MEAN = 0.8
+MAX_RESOURCE_SKILLS = 4
+# Share of skills that have prerequisites, and at most how many
+PREREQUISITE_SHARE = 0.3
+MAX_PREREQUISITES = 2
+
+RESOURCE_TYPES = ["course", "practice", "theory", "video"]
+ICON_TYPES = {"course": "university", "practice": "code", "theory": "docs", "video": "youtube"}
+PROFICIENCY_LEVELS = ["none", "beginner", "intermediate", "strong"]
+
+
+class SyntheticDataset:
+
+    def __init__(self, skills: Dict[str, Dict[str, Any]], prerequisites: Dict[str, List[str]],
+                 roles: Dict[str, Dict[str, Dict[str, float]]], resources: List[Dict[str, Any]],
+                 seed: int = 0):
+        self.skills = skills
+        self.prerequisites = prerequisites
+        self.roles = roles
+        self.resources = resources
+        self.seed = seed
+
+    def profiles(self, n: int, seed: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        return generate_profiles(self.roles, n, self.seed + 1 if seed is None else seed)
+
+    def describe(self) -> str:
+        nnz = sum(len(r["coverage"]) for r in self.resources)
+        return (f"{len(self.skills)} skills, {len(self.roles)} roles, {len(self.resources)} resources "
+                f"({nnz / max(1, len(self.resources)):.2f} skills per resource)")
+
+
+# --------------------------------------------------
+# Generators
+# --------------------------------------------------
+
+def skill_popularity(num_skills: int, exponent: float = ZIPF_EXPONENT) -> np.ndarray:
+    """Zipf probabilities over skill ranks (rank 0 is the most popular skill)."""
+    p = 1.0 / np.arange(1, num_skills + 1, dtype=np.float64) ** exponent
+    return p / p.sum()
+
+
+def generate_skills(num_skills: int, rng: np.random.Generator,
+                    num_groups: int = NUM_SKILL_GROUPS) -> Dict[str, Dict[str, Any]]:
+    groups = rng.integers(num_groups, size=num_skills)
+    return {f"skill_{i:04d}": {"id": i, "group": f"group_{int(g):02d}"} for i, g in enumerate(groups)}
+
+
+def generate_prerequisites(skill_names: List[str], rng: np.random.Generator) -> Dict[str, List[str]]:
+    """Prerequisites point at more popular (lower-ranked) skills only, so the graph is acyclic."""
+    prerequisites = {}
+    for i in range(1, len(skill_names)):
+        if rng.random() >= PREREQUISITE_SHARE:
+            continue
+        k = min(i, int(rng.integers(1, MAX_PREREQUISITES + 1)))
+        before = rng.choice(i, size=k, replace=False)
+        prerequisites[skill_names[i]] = [skill_names[j] for j in sorted(before)]
+    return prerequisites
+
+
+def generate_roles(skill_names: List[str], popularity: np.ndarray, num_roles: int,
+                   rng: np.random.Generator) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Roles with weights summing to 1; the heaviest skills get the highest required levels."""
+    roles = {}
+    high = min(ROLE_SKILLS[1], len(skill_names))
+    low = min(ROLE_SKILLS[0], high)
+    for i in range(num_roles):
+        k = int(rng.integers(low, high + 1))
+        chosen = rng.choice(len(skill_names), size=k, replace=False, p=popularity)
+        weights = rng.gamma(1.0, size=k)
+        weights /= weights.sum()
+        rank = np.argsort(np.argsort(-weights)) / max(1, k - 1)  # 0 = heaviest
+        required = np.clip(1.0 - 0.6 * rank + rng.normal(0.0, 0.1, size=k), 0.2, 1.0)
+        roles[f"role_{i:03d}"] = {
+            skill_names[j]: {"required": round(float(req) * 20) / 20, "weight": float(w)}
+            for j, req, w in zip(chosen, required, weights)
+        }
+    return roles
+
+
+def generate_resources(skill_names: List[str], popularity: np.ndarray, num_resources: int,
+                       rng: np.random.Generator) -> List[Dict[str, Any]]:
+    sizes = np.minimum(1 + rng.poisson(RESOURCE_EXTRA_SKILLS_MEAN, size=num_resources), MAX_RESOURCE_SKILLS)
+    sizes = np.minimum(sizes, len(skill_names))
+    hours = np.clip(np.round(rng.lognormal(2.0, 0.7, size=num_resources), 1), 1.0, 60.0)
+    types = rng.integers(len(RESOURCE_TYPES), size=num_resources)
+    # Candidate skills drawn in one go; duplicates within a resource are dropped
+    draws = rng.choice(len(skill_names), size=(num_resources, 2 * MAX_RESOURCE_SKILLS), p=popularity)
+
+    resources = []
+    for i in range(num_resources):
+        covered = list(dict.fromkeys(draws[i].tolist()))[:sizes[i]]
+        values = np.round(rng.uniform(0.2, 1.0, size=len(covered)), 2)
+        kind = RESOURCE_TYPES[types[i]]
+        resources.append({
+            "id": f"res_syn_{i}",
+            "title": f"Synthetic resource {i}",
+            "url": f"https://example.com/resources/{i}",
+            "time": float(hours[i]),
+            "coverage": {skill_names[j]: float(v) for j, v in zip(covered, values)},
+            "type": kind,
+            "icon_type": ICON_TYPES[kind],
+        })
+    return resources
+
+
+def generate_profiles(roles: Dict[str, Dict[str, Dict[str, float]]], n: int,
+                      seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    A lazy stream of {"role", "student_profile"} items. Each student rates a
+    random part of the target role's skills, mostly as scores around the
+    required level and sometimes as proficiency labels.
+    """
+    rng = np.random.default_rng(seed)
+    role_names = sorted(roles)
+    for _ in range(n):
+        role = role_names[int(rng.integers(len(role_names)))]
+        specs = roles[role]
+        skills = list(specs)
+        rated = rng.choice(len(skills), size=int(rng.integers(1, len(skills) + 1)), replace=False)
+        profile: Dict[str, Any] = {}
+        for j in rated:
+            skill = skills[j]
+            if rng.random() < 0.25:
+                profile[skill] = PROFICIENCY_LEVELS[int(rng.integers(len(PROFICIENCY_LEVELS)))]
+            else:
+                level = specs[skill]["required"] * rng.uniform(0.2, 1.2)
+                profile[skill] = round(float(min(1.0, level)), 2)
+        yield {"role": role, "student_profile": profile}
+
+
+def generate_dataset(num_skills: int = 500, num_roles: int = 200, num_resources: int = 50000,
+                     seed: int = 0, exponent: float = ZIPF_EXPONENT) -> SyntheticDataset:
+    rng = np.random.default_rng(seed)
+    skills = generate_skills(num_skills, rng)
+    names = list(skills)
+    popularity = skill_popularity(num_skills, exponent)
+    return SyntheticDataset(
+        skills,
+        generate_prerequisites(names, rng),
+        generate_roles(names, popularity, num_roles, rng),
+        generate_resources(names, popularity, num_resources, rng),
+        seed,
+    )
+
+
+# --------------------------------------------------
+# Loading into module2_models
+# --------------------------------------------------
+
+def install(dataset: SyntheticDataset) -> Dict[str, Any]:
+    """
+    Replaces module2_models' skills, prerequisites and roles with the
+    dataset's (validating every role) and returns what was there before.
+    """
+    previous = {
+        "skills": dict(m2.SKILLS),
+        "prerequisites": dict(m2.SKILL_PREREQUISITES),
+        "roles": dict(m2.ROLES),
+    }
+    _replace(dataset.skills, dataset.prerequisites, dataset.roles)
+    return previous
+
+
+def _replace(skills: Dict[str, Any], prerequisites: Dict[str, List[str]], roles: Dict[str, Any]) -> None:
+    # Validate against the new skills before anything else is touched
+    saved = dict(m2.SKILLS)
+    m2.SKILLS.clear()
+    m2.SKILLS.update(skills)
+    try:
+        compiled = m2.compile_prerequisites(prerequisites)
+        for role_name, role_def in roles.items():
+            m2.validate_role(role_name, role_def)
+    except ValueError:
+        m2.SKILLS.clear()
+        m2.SKILLS.update(saved)
+        raise
+
+    m2.SKILL_PREREQUISITES.clear()
+    m2.SKILL_PREREQUISITES.update(prerequisites)
+    m2.SKILL_TOPO_ORDER, m2.SKILL_LEVELS, m2.SKILL_PREREQ_CLOSURE = compiled
+    m2.ROLES.clear()
+    m2.ROLES.update(roles)
+    m2.ROLES_GENERATION += 1
+
+
+@contextlib.contextmanager
+def installed(dataset: SyntheticDataset) -> Iterator[SyntheticDataset]:
+    previous = install(dataset)
+    try:
+        yield dataset
+    finally:
+        _replace(previous["skills"], previous["prerequisites"], previous["roles"])
+
+
+# --------------------------------------------------
+# Files
+# --------------------------------------------------
+
+def write_dataset(dataset: SyntheticDataset, out_dir: str, num_profiles: int = 0) -> None:
+    """skills/prerequisites/roles/resources as JSON, profiles as NDJSON (module13 corpus format)."""
+    os.makedirs(out_dir, exist_ok=True)
+    for name in ("skills", "prerequisites", "roles", "resources"):
+        with open(os.path.join(out_dir, f"{name}.json"), "w") as f:
+            json.dump(getattr(dataset, name), f)
+    if num_profiles:
+        with open(os.path.join(out_dir, "profiles.ndjson"), "w") as f:
+            for item in dataset.profiles(num_profiles):
+                f.write(json.dumps(item) + "\n")
+
+
+def load_dataset(in_dir: str) -> SyntheticDataset:
+    parts = {}
+    for name in ("skills", "prerequisites", "roles", "resources"):
+        with open(os.path.join(in_dir, f"{name}.json")) as f:
+            parts[name] = json.load(f)
+    return SyntheticDataset(parts["skills"], parts["prerequisites"], parts["roles"], parts["resources"])
+
+
+# --------------------------------------------------
+# Scaling benchmark
+# --------------------------------------------------
+
+# Catalog sizes recommend_learning_plan is timed on, for PLAN_PROFILES students each
+PLAN_CATALOG_SIZES = (250, 500, 1000)
+PLAN_PROFILES = 3
+
+
+def benchmark(sizes=((12, 2, 12), (100, 40, 5000), (500, 200, 50000)), num_profiles: int = 200) -> None:
+    import module3_evaluator as evalmod
+    import module4_recommender as recmod
+
+    for num_skills, num_roles, num_resources in sizes:
+        t0 = time.perf_counter()
+        dataset = generate_dataset(num_skills, num_roles, num_resources)
+        gen_ms = (time.perf_counter() - t0) * 1000.0
+        print(f"{dataset.describe()}  (generated in {gen_ms:.0f} ms)")
+
+        with installed(dataset):
+            t0 = time.perf_counter()
+            for role_name, role_def in dataset.roles.items():
+                m2.validate_role(role_name, role_def)
+            print(f"  validate_role       : {(time.perf_counter() - t0) * 1e6 / num_roles:9.1f} us per role")
+
+            profiles = list(dataset.profiles(num_profiles))
+            evaluations = []
+            t0 = time.perf_counter()
+            for item in profiles:
+                evaluations.append(evalmod.evaluate_student(item["student_profile"], item["role"]))
+            print(f"  evaluate_student    : {(time.perf_counter() - t0) * 1e6 / num_profiles:9.1f} us per profile")
+
+            by_role: Dict[str, List[Dict[str, Any]]] = {}
+            for item in profiles:
+                by_role.setdefault(item["role"], []).append(item["student_profile"])
+            t0 = time.perf_counter()
+            for role_name, batch in by_role.items():
+                evalmod.evaluate_students_batch(batch, role_name)
+            print(f"  evaluate_batch      : {(time.perf_counter() - t0) * 1e6 / num_profiles:9.1f} us per profile")
+
+            # Planning grows much faster than linearly with the catalog, so it
+            # is timed on growing catalog prefixes for a few students
+            for size in PLAN_CATALOG_SIZES:
+                catalog = dataset.resources[:size]
+                t0 = time.perf_counter()
+                for item, evaluation in zip(profiles[:PLAN_PROFILES], evaluations):
+                    numeric = {s: v if isinstance(v, float) else 0.0 for s, v in item["student_profile"].items()}
+                    recmod.recommend_learning_plan(evaluation, catalog, dataset.roles[item["role"]], numeric)
+                elapsed = (time.perf_counter() - t0) * 1000 / PLAN_PROFILES
+                print(f"  recommend_plan      : {elapsed:9.2f} ms per plan over {len(catalog)} resources")
+                if len(catalog) < size:
+                    break
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic roles, skills, catalogs and profiles.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write a dataset to a directory")
+    generate.add_argument("out_dir")
+    generate.add_argument("--skills", type=int, default=500)
+    generate.add_argument("--roles", type=int, default=200)
+    generate.add_argument("--resources", type=int, default=50000)
+    generate.add_argument("--profiles", type=int, default=10000)
+    generate.add_argument("--seed", type=int, default=0)
+    commands.add_parser("bench", help="scaling benchmark of validation, evaluation and planning")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        dataset = generate_dataset(args.skills, args.roles, args.resources, args.seed)
+        with installed(dataset):
+            pass  # validates the dataset against module2_models
+        write_dataset(dataset, args.out_dir, args.profiles)
+        print(f"Wrote {dataset.describe()} and {args.profiles} profiles to {args.out_dir}")
+    else:
+        benchmark()
+    sys.exit(0)
@@ -0,0 +1,134 @@
+# module15_compression.py
+"""
+Response compression negotiated from Accept-Encoding.
+
+JSON responses of at least COMPRESS_MIN_BYTES are sent brotli-encoded when
+the client accepts "br" and the optional `brotli` package is installed,
+gzip-encoded when it accepts "gzip", and unchanged otherwise. Small bodies
+are left alone (compression would cost more than the bytes it saves), and
+so are streamed responses, which must not be buffered.
+
+    install_compression(app)          # registers an after_request hook
+    python module15_compression.py    # bytes / latency benchmark per response mode
+"""
+
+import gzip
+from typing import Optional
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = 1024
+# Fast settings suited to per-request compression of dynamic JSON
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = ("application/json",)
+
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The best supported encoding the client accepts (q > 0), or None."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():  # server preference breaks ties
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_response(response: Response, accept_encoding: str,
+                      min_bytes: int = COMPRESS_MIN_BYTES) -> Response:
+    if (response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+    response.vary.add("Accept-Encoding")
+
+    data = response.get_data()
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or len(data) < min_bytes:
+        return response
+
+    response.set_data(compress_body(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)  # the bytes now differ per encoding
+    return response
+
+
+def install_compression(app: Flask, min_bytes: int = COMPRESS_MIN_BYTES) -> None:
+    @app.after_request
+    def _compress(response: Response) -> Response:
+        return compress_response(response, request.headers.get("Accept-Encoding", ""), min_bytes)
+
+
+# --------------------------------------------------
+# Benchmark: bytes and transfer time per response mode and encoding
+# --------------------------------------------------
+if __name__ == "__main__":
+    import json
+    import time
+
+    import app as backend
+
+    backend.RATE_LIMITER.rate = backend.RATE_LIMITER.burst = float("inf")
+    client = backend.app.test_client()
+    body = {"role": "SDE", "student_profile": {"DSA": 0.4, "OS": "beginner", "C++": 0.7, "Git": 0.8}}
+    # Downlink throughput (bits per second) and round trip of a slow mobile connection
+    link_bps, rtt_ms = 1.6e6, 150.0
+
+    print(f"Accept-Encoding supported: {', '.join(supported_encodings())}")
+    print(f"{'mode':24s} {'encoding':9s} {'bytes':>7s} {'server ms':>10s} {'mobile ms':>10s}")
+    # /simulate answers with the /evaluate fields (plus a trajectory) without storing anything
+    for mode, query in (("full", ""), ("compact", "?compact=1"),
+                        ("fields=scores,plan", "?fields=alignment_score,readiness_score,plan")):
+        for encoding in ("identity",) + supported_encodings():
+            runs = []
+            for _ in range(20):
+                t0 = time.perf_counter()
+                response = client.post(f"/simulate{query}", json=body, headers={"Accept-Encoding": encoding})
+                runs.append((time.perf_counter() - t0) * 1000.0)
+            size = len(response.get_data())
+            server_ms = sorted(runs)[len(runs) // 2]
+            mobile_ms = server_ms + rtt_ms + size * 8 / link_bps * 1000.0
+            print(f"{mode:24s} {encoding:9s} {size:7d} {server_ms:10.2f} {mobile_ms:10.1f}")
+
+    sample = json.dumps(client.post("/simulate", json=body).get_json()).encode("utf-8")
+    for encoding in supported_encodings():
+        t0 = time.perf_counter()
+        for _ in range(200):
+            compress_body(sample, encoding)
+        print(f"{encoding} of {len(sample)} bytes: {(time.perf_counter() - t0) * 1e6 / 200:.0f} us")
@@ -0,0 +1,311 @@
+# module16_sessions.py
+"""
+Persistent student sessions: a returning student sends a session id and the
+skills that changed instead of the whole profile.
+
+A session keeps what /evaluate would otherwise rebuild on every call: the
+normalized profile, the compiled student vector, and the last evaluation and
+plan. Two tiers:
+
+    hot  : per-worker LRU of live Session objects (IncrementalEvaluation +
+           IncrementalResourceScores), so an update costs O(changed skills)
+           plus the plan scheduling
+    cold : the `sessions` table in SQLite next to the evaluations, the source
+           of truth shared by every worker and surviving restarts
+
+    sessions : id, role, selection, evaluation_id, profile (JSON),
+               student_vector (float64 BLOB), evaluation (JSON), plan (JSON),
+               plan_version, version, created_at, updated_at
+
+Reads check the row's `version` with one primary-key read, so a hot copy
+that another worker has moved on (or deleted) is reloaded rather than served
+stale. Writes are optimistic: save() only succeeds against the version it
+was loaded at (and before the session expired), so an update starts from the
+hot copy without that read and retries on a fresh load when save() fails.
+Each thread keeps one SQLite connection open. Sessions expire
+SESSION_TTL_SECONDS after their last change.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+import module2_models as m2
+import module3_evaluator as evalmod
+import module4_recommender as recmod
+
+MAX_HOT_SESSIONS = 1024
+SESSION_TTL_SECONDS = 30 * 24 * 3600.0
+# Expired rows are deleted at most this often per process (on create)
+PURGE_INTERVAL_SECONDS = 3600.0
+SELECTION_MODES = ("greedy", "submodular")
+VECTOR_DTYPE = np.float64  # exact: a restored session scores like the live one
+
+
+class Session:
+    """One student's live state. Hold `lock` while reading or changing it."""
+
+    def __init__(self, session_id: str, selection: str, evaluation_id: Optional[int],
+                 state: evalmod.IncrementalEvaluation, scores: recmod.IncrementalResourceScores,
+                 evaluation: Dict[str, Any], plan: Dict[str, Any], plan_version: str, version: int):
+        self.id = session_id
+        self.selection = selection
+        self.evaluation_id = evaluation_id
+        self.state = state
+        self.scores = scores
+        self.evaluation = evaluation
+        self.plan = plan
+        self.plan_version = plan_version
+        self.version = version
+        self.generation = m2.ROLES_GENERATION
+        self.lock = threading.Lock()
+
+    @property
+    def role(self) -> str:
+        return self.state.role
+
+
+class SessionStore:
+
+    def __init__(self, db_path: str, resources: recmod.Catalog,
+                 max_hot: int = MAX_HOT_SESSIONS, ttl_seconds: float = SESSION_TTL_SECONDS):
+        self.db_path = db_path
+        self.resources = resources
+        self.max_hot = max_hot
+        self.ttl_seconds = ttl_seconds
+        self._hot: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._local = threading.local()
+        self.hits = 0
+        self.loads = 0
+
+    # --------------------------------------------------
+    # Schema / connections
+    # --------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use (and again after a fork)."""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.conn = self._connect()
+            local.pid = os.getpid()
+        return local.conn
+
+    def init_schema(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                role TEXT NOT NULL,
+                selection TEXT NOT NULL,
+                evaluation_id INTEGER,
+                profile TEXT NOT NULL,
+                student_vector BLOB NOT NULL,
+                evaluation TEXT NOT NULL,
+                plan TEXT NOT NULL,
+                plan_version TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+        finally:
+            conn.close()
+
+    # --------------------------------------------------
+    # Hot tier
+    # --------------------------------------------------
+
+    def _remember(self, session: Session) -> None:
+        with self._lock:
+            self._hot[session.id] = session
+            self._hot.move_to_end(session.id)
+            while len(self._hot) > self.max_hot:
+                self._hot.popitem(last=False)
+
+    def evict(self, session_id: str) -> None:
+        """Drops the hot copy (e.g. after a failed update left it half-applied)."""
+        with self._lock:
+            self._hot.pop(session_id, None)
+
+    def _from_row(self, row: sqlite3.Row) -> Optional[Session]:
+        profile = json.loads(row["profile"])
+        vector = np.frombuffer(row["student_vector"], dtype=VECTOR_DTYPE)
+        try:
+            try:
+                state = evalmod.IncrementalEvaluation.from_compiled(profile, vector, row["role"])
+            except ValueError:
+                # The skill vocabulary changed since the session was stored
+                state = evalmod.IncrementalEvaluation(profile, row["role"])
+        except ValueError:
+            return None  # its role no longer exists
+        return Session(
+            row["id"], row["selection"], row["evaluation_id"], state,
+            recmod.IncrementalResourceScores(self.resources, state.gaps),
+            json.loads(row["evaluation"]), json.loads(row["plan"]), row["plan_version"], row["version"]
+        )
+
+    # --------------------------------------------------
+    # Lookups / writes
+    # --------------------------------------------------
+
+    def create(self, state: evalmod.IncrementalEvaluation, selection: str, evaluation_id: Optional[int],
+               evaluation: Dict[str, Any], plan: Dict[str, Any], plan_version: str) -> Session:
+        if selection not in SELECTION_MODES:
+            raise ValueError(f"Unknown selection mode: {selection}")
+        now = time.time()
+        session = Session(uuid.uuid4().hex, selection, evaluation_id, state,
+                          recmod.IncrementalResourceScores(self.resources, state.gaps),
+                          evaluation, plan, plan_version, version=1)
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO sessions (id, role, selection, evaluation_id, profile, student_vector, "
+            "evaluation, plan, plan_version, version, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)",
+            (session.id, state.role, selection, evaluation_id, json.dumps(state.profile),
+             np.asarray(state.s, dtype=VECTOR_DTYPE).tobytes(), json.dumps(evaluation),
+             json.dumps(plan), plan_version, now, now)
+        )
+        if now - self._last_purge >= PURGE_INTERVAL_SECONDS:
+            self._last_purge = now
+            self._purge(conn, now)
+        self._remember(session)
+        return session
+
+    def get(self, session_id: str, verify: bool = True) -> Optional[Session]:
+        """
+        The live session, from the hot tier when it is current, else from
+        SQLite. verify=False returns a hot copy without reading its version;
+        only for callers that write through save(), which rejects stale copies.
+        """
+        with self._lock:
+            session = self._hot.get(session_id)
+            if session is not None:
+                self._hot.move_to_end(session_id)
+        if session is not None and session.generation != m2.ROLES_GENERATION:
+            session = None  # recompiled from the row below
+        if session is not None and not verify:
+            self.hits += 1
+            return session
+
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT version, updated_at FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None or row["updated_at"] < time.time() - self.ttl_seconds:
+            self.evict(session_id)
+            return None
+        if session is not None and session.version == row["version"]:
+            self.hits += 1
+            return session
+        row = conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+
+        session = self._from_row(row) if row is not None else None
+        if session is None:
+            self.evict(session_id)
+            return None
+        self.loads += 1
+        self._remember(session)
+        return session
+
+    def save(self, session: Session) -> bool:
+        """
+        Writes the session's current state through to SQLite (caller holds
+        session.lock). False when another worker changed it first, or it was
+        deleted or expired; the hot copy is then dropped and the caller
+        retries on a fresh get().
+        """
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE sessions SET profile = ?, student_vector = ?, evaluation = ?, plan = ?, "
+            "plan_version = ?, version = version + 1, updated_at = ? "
+            "WHERE id = ? AND version = ? AND updated_at >= ?",
+            (json.dumps(session.state.profile), np.asarray(session.state.s, dtype=VECTOR_DTYPE).tobytes(),
+             json.dumps(session.evaluation), json.dumps(session.plan), session.plan_version,
+             now, session.id, session.version, now - self.ttl_seconds)
+        )
+        if cursor.rowcount != 1:
+            self.evict(session.id)
+            return False
+        session.version += 1
+        return True
+
+    def delete(self, session_id: str) -> bool:
+        self.evict(session_id)
+        return self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount == 1
+
+    def _purge(self, conn: sqlite3.Connection, now: float) -> int:
+        return conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+
+    def purge_expired(self) -> int:
+        """Deletes sessions not changed within the TTL. Returns the number deleted."""
+        return self._purge(self._conn(), time.time())
+
+
+# --------------------------------------------------
+# Benchmark: stateless /evaluate vs session updates (hot and cold tier)
+#   python module16_sessions.py     (uses a temporary database)
+# --------------------------------------------------
+if __name__ == "__main__":
+    import tempfile
+
+    import app as backend
+    import module12_partitions as partmod
+
+    def median_ms(fn, runs: int = 50) -> float:
+        times = []
+        for i in range(runs):
+            t0 = time.perf_counter()
+            fn(i)
+            times.append((time.perf_counter() - t0) * 1000.0)
+        return sorted(times)[len(times) // 2]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend.DB_PATH = os.path.join(tmp, "evaluations.db")
+        partmod.init_storage(backend.DB_PATH)
+        store = backend.SESSIONS = SessionStore(backend.DB_PATH, backend.RESOURCE_CATALOG)
+        store.init_schema()
+        for limiter in (backend.RATE_LIMITER, backend.UPDATE_RATE_LIMITER):
+            limiter.rate = limiter.burst = float("inf")
+        client = backend.app.test_client()
+
+        profile = {skill: "intermediate" if i % 3 else 0.35 for i, skill in enumerate(m2.SKILLS)}
+        body = {"role": "SDE", "student_profile": profile}
+        created = client.post("/sessions", json=body).get_json()
+        session_id = created["session_id"]
+
+        def stateless(i):
+            changed = dict(profile, DSA=0.3 + (i % 5) / 10)
+            assert client.post("/evaluate", json={"role": "SDE", "student_profile": changed}).status_code == 200
+
+        def update(i):
+            changes = {"DSA": 0.3 + (i % 5) / 10}
+            assert client.post(f"/sessions/{session_id}/update", json={"changes": changes}).status_code == 200
+
+        def cold_update(i):
+            store.evict(session_id)  # as if another worker (or a restart) served it last
+            update(i)
+
+        print(f"{len(profile)}-skill profile, {len(backend.RESOURCE_CATALOG)} resources")
+        print(f"  stateless /evaluate       : {median_ms(stateless):7.2f} ms")
+        print(f"  session update (hot tier) : {median_ms(update):7.2f} ms")
+        print(f"  session update (cold)     : {median_ms(cold_update):7.2f} ms")
+        print(f"  GET /sessions/<id>        : {median_ms(lambda i: client.get(f'/sessions/{session_id}')):7.2f} ms")
+        print(f"  hot hits {store.hits}, loads from SQLite {store.loads}")
@@ -0,0 +1,328 @@
+# module17_pipeline.py
+"""
+The /evaluate pipeline without HTTP or request state: where evaluations are
+stored, the resource catalog (the shared store under gunicorn), role
+requirements and explanation templates, the response shape and its
+trimming, and evaluate_items for batches.
+
+app.py serves it over Flask. The job process (python module11_jobs.py work)
+imports only this module, so it starts without Flask, the student index or
+the database setup of the web workers.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import module1_vectors as m1
+import module2_models as m2
+import module3_evaluator as evalmod
+import module4_recommender as recmod
+import module8_shared_store as storemod
+import module9_catalog_file as catalogmod
+import module12_partitions as partmod
+
+# DB path (single file). Change if you prefer another directory.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "evaluations.db")
+# Evaluations are stored in monthly partitions (module12_partitions.py); months
+# older than SKILLGAP_HOT_MONTHS move to compressed files in ARCHIVE_DIR, and
+# archives older than SKILLGAP_RETENTION_MONTHS are deleted (0 keeps them).
+ARCHIVE_DIR = os.path.join(BASE_DIR, "archive")
+HOT_MONTHS = int(os.environ.get("SKILLGAP_HOT_MONTHS", partmod.DEFAULT_HOT_MONTHS))
+RETENTION_MONTHS = int(os.environ.get("SKILLGAP_RETENTION_MONTHS", partmod.DEFAULT_RETENTION_MONTHS))
+# Binary resource catalog (python module9_catalog_file.py convert ...) used in
+# place of the built-in DEFAULT_RESOURCES list when set
+CATALOG_PATH = os.environ.get("SKILLGAP_CATALOG_PATH")
+# Largest accepted student_profile / changes object (number of skills)
+MAX_PROFILE_SKILLS = 256
+
+# --------- Shared store (see gunicorn.conf.py) ---------
+# Under gunicorn the master publishes the compiled roles and catalog once and
+# hands the segment to its workers and the job process in SKILLGAP_STORE_PATH;
+# every role kernel and the catalog below are then zero-copy views into it.
+# None without a master (python app.py, flask run) or if the segment is unusable.
+SHARED_STORE = None
+if os.environ.get(storemod.STORE_ENV):
+    try:
+        SHARED_STORE = storemod.SharedStore()
+        m2.attach_role_matrices(SHARED_STORE.role_names, SHARED_STORE.role_required,
+                                SHARED_STORE.role_weight, SHARED_STORE.role_wr)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Shared store unavailable: {e}")
+        SHARED_STORE = None
+
+# The catalog everything below works on, as module9_catalog_file columns: the
+# recommender scores its CSR coverage arrays directly and only the resources
+# a response lists are decoded. SKILLGAP_CATALOG_PATH is mapped read-only with
+# no parse step; otherwise the built-in list is compiled once, at load.
+if SHARED_STORE is not None:
+    RESOURCE_CATALOG = SHARED_STORE.catalog
+elif CATALOG_PATH:
+    RESOURCE_CATALOG = catalogmod.open_catalog(CATALOG_PATH)
+else:
+    RESOURCE_CATALOG = catalogmod.CatalogView(catalogmod.compile_catalog_sections(m2.DEFAULT_RESOURCES))
+
+# --------- Request helpers ---------
+def parse_evaluate_payload(data: Any):
+    """Returns (role, student_profile, error_message) for an /evaluate-style body."""
+    if not data:
+        return None, None, "Invalid JSON body"
+
+    # Required fields
+    role = data.get("role")
+    student_profile = data.get("student_profile")
+
+    # Minimal presence checks
+    if role is None or student_profile is None:
+        return None, None, "Missing required fields: role, student_profile"
+
+    # A blend of roles ({"SDE": 0.6, "DataAnalyst": 0.4}) is one composite target
+    if isinstance(role, dict) or (isinstance(role, str) and role not in m2.ROLES and m2.BLEND_SEPARATOR in role):
+        try:
+            role = m2.composite_role_name(role)
+        except ValueError as e:
+            return None, None, str(e)
+
+    # Unknown role -> 400 (explicit check)
+    if not isinstance(role, str) or not m2.role_exists(role):
+        return None, None, f"Unknown role: {role}"
+
+    # student_profile must be a dict/object
+    if not isinstance(student_profile, dict):
+        return None, None, "student_profile must be an object mapping skill->proficiency"
+
+    if len(student_profile) > MAX_PROFILE_SKILLS:
+        return None, None, f"student_profile has too many skills (max {MAX_PROFILE_SKILLS})"
+
+    return role, student_profile, None
+
+def to_numeric_profile(student_profile: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Convert student_profile to numeric format for recommender.
+    Frontend sends numeric values (0-1), but handle strings if present.
+    """
+    numeric_student_profile = {}
+    for skill, prof in student_profile.items():
+        if isinstance(prof, (int, float)):
+            numeric_student_profile[skill] = float(prof)
+        elif isinstance(prof, str):
+            # Use evaluator's conversion function for string proficiency values
+            try:
+                numeric_student_profile[skill] = m1.map_proficiency_to_score(prof)
+            except:
+                numeric_student_profile[skill] = 0.0
+        else:
+            numeric_student_profile[skill] = 0.0
+    return numeric_student_profile
+
+# --------- Response helpers ---------
+def build_role_requirements(role: str) -> Dict[str, Dict[str, float]]:
+    """Role requirements for priority/skim calculations and the response (shared, read-only)."""
+    get_explanation_template(role)  # rebuilds both when roles changed
+    requirements = _role_requirements.get(role)
+    if requirements is None:
+        # Composite targets: module2's cached definition already has this shape
+        return m2.get_role(role) if m2.role_exists(role) else {}
+    return requirements
+
+# --------- Explanation templates ---------
+# The static half of the Dashboard's gap explanations: per role, each skill's
+# required level, weight and the resources covering it. Compiled for every
+# role when the catalog loads and again whenever ROLES_GENERATION moves.
+# GET /roles/<role>/explanations serves a template under its content hash;
+# a request with "explanations": "template" gets that explanation_template_id
+# in place of role_requirements / role_requirements_full, next to its gaps.
+# Composite targets get theirs on first use (LRU, see m2.MAX_COMPOSITE_ROLES).
+EXPLANATION_MODES = ("full", "template")
+# Browser cache lifetime of a served template; a response naming another
+# explanation_template_id means the roles changed and the template is refetched
+EXPLANATION_MAX_AGE = 300
+_explanation_templates: Dict[str, Dict[str, Any]] = {}
+_composite_templates: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_skill_resources: Dict[str, List[Dict[str, Any]]] = {}
+_role_requirements: Dict[str, Dict[str, Dict[str, float]]] = {}
+_explanation_generation = None
+_explanation_lock = threading.Lock()
+
+def compile_skill_resources() -> Dict[str, List[Dict[str, Any]]]:
+    """skill -> [{"id", "coverage"}] of the catalog resources covering it, best first."""
+    covering: Dict[str, List[Dict[str, Any]]] = {}
+    for skill in RESOURCE_CATALOG.coverage_skill_names:
+        positions, coverage = RESOURCE_CATALOG.skill_coverage(skill)
+        entries = [
+            {"id": RESOURCE_CATALOG.ids[pos], "coverage": cov}
+            for pos, cov in zip(positions.tolist(), coverage.tolist()) if cov > 0
+        ]
+        if entries:
+            entries.sort(key=lambda entry: -entry["coverage"])
+            covering[skill] = entries
+    return covering
+
+def compile_explanation_template(role: str, specs: Dict[str, Dict[str, float]],
+                                 covering: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """{"template_id", "role", "skills": {skill: {"required", "weight", "resources"}}}."""
+    skills = {
+        skill: {"required": spec["required"], "weight": spec["weight"], "resources": covering.get(skill, [])}
+        for skill, spec in specs.items()
+    }
+    digest = hashlib.sha256(json.dumps([role, skills], sort_keys=True).encode("utf-8")).hexdigest()
+    return {"template_id": digest[:16], "role": role, "skills": skills}
+
+def refresh_explanation_templates() -> None:
+    global _explanation_templates, _skill_resources, _role_requirements, _explanation_generation
+    with _explanation_lock:
+        generation = m2.ROLES_GENERATION
+        if _explanation_generation == generation:
+            return
+        covering = compile_skill_resources()
+        templates = {role: compile_explanation_template(role, specs, covering) for role, specs in m2.ROLES.items()}
+        _role_requirements = {
+            role: {skill: {"required": spec["required"], "weight": spec["weight"]}
+                   for skill, spec in template["skills"].items()}
+            for role, template in templates.items()
+        }
+        _explanation_templates = templates
+        _skill_resources = covering
+        _composite_templates.clear()
+        _explanation_generation = generation
+
+def get_explanation_template(role: str) -> Optional[Dict[str, Any]]:
+    if _explanation_generation != m2.ROLES_GENERATION:
+        refresh_explanation_templates()
+    template = _explanation_templates.get(role)
+    if template is not None or not m2.role_exists(role):
+        return template
+
+    with _explanation_lock:
+        template = _composite_templates.get(role)
+        if template is None:
+            template = _composite_templates[role] = compile_explanation_template(
+                role, m2.get_role(role), _skill_resources)
+            while len(_composite_templates) > m2.MAX_COMPOSITE_ROLES:
+                _composite_templates.popitem(last=False)
+        else:
+            _composite_templates.move_to_end(role)
+    return template
+
+def use_explanation_template(response: Dict[str, Any], role: str) -> None:
+    """Replaces the role requirements of a composed response with explanation_template_id."""
+    template = get_explanation_template(role)
+    if template is None:
+        return
+    response.pop("role_requirements", None)
+    response.pop("role_requirements_full", None)
+    response["explanation_template_id"] = template["template_id"]
+
+# --------- Response trimming ---------
+def _without(mapping: Dict[str, Any], key: str) -> Dict[str, Any]:
+    # Copies: plans are shared with the plan-version cache and coalesced requests
+    return {k: v for k, v in mapping.items() if k != key}
+
+def trim_response(response: Dict[str, Any], role: str, options: Optional[Dict[str, Any]]) -> None:
+    """Applies parse_response_options' options to a composed response in place."""
+    if not options:
+        return
+    if options["compact"] or options["explanations"] == "template":
+        use_explanation_template(response, role)
+    if options["compact"]:
+        if "gaps" in response:
+            response["gaps"] = {skill: gap for skill, gap in response["gaps"].items() if gap > 0}
+        if "plan" in response:
+            plan = _without(response["plan"], "weeks")
+            plan["selected_resources"] = [_without(entry, "coverage") for entry in plan["selected_resources"]]
+            response["plan"] = plan
+        if "plan_delta" in response:
+            delta = dict(response["plan_delta"])
+            delta["added"] = [_without(entry, "coverage") for entry in delta["added"]]
+            delta["changed"] = [dict(c, fields=_without(c["fields"], "coverage")) for c in delta["changed"]]
+            delta["plan_fields"] = _without(delta["plan_fields"], "weeks")
+            delta["removed_plan_fields"] = [key for key in delta["removed_plan_fields"] if key != "weeks"]
+            response["plan_delta"] = delta
+    if options["fields"] is not None:
+        keep = set(options["fields"])
+        for key in [key for key in response if key not in keep]:
+            del response[key]
+
+def enrich_plan_resources(plan: Dict[str, Any]) -> None:
+    """Enrich selected_resources with URLs, coverage, and icon_type from the catalog."""
+    for resource in plan["selected_resources"]:
+        pos = RESOURCE_CATALOG.find(resource["id"])
+        if pos is not None:
+            full_resource = RESOURCE_CATALOG[pos]
+            resource["url"] = full_resource["url"]
+            resource["coverage"] = full_resource["coverage"]  # Include coverage for skill updates
+            resource["icon_type"] = full_resource["icon_type"]  # Include icon_type for display
+
+def compose_response(eval_id: int, evaluation: Dict[str, Any], plan: Dict[str, Any],
+                     role_requirements: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    return {
+        "evaluation_id": eval_id,
+        "alignment_score": evaluation["alignment_score"],
+        "readiness_score": evaluation["readiness_score"],
+        "top_gaps": evaluation["top_gaps"],
+        "gaps": evaluation.get("gaps", {}),  # Include full gaps object for explanations
+        "plan": plan,
+        "role_requirements": {skill: req["required"] for skill, req in role_requirements.items()},  # Simplified for frontend compatibility
+        "role_requirements_full": role_requirements  # Include full role requirements with weights for explanations
+    }
+
+# --------- Plans ---------
+def build_learning_plan(evaluation: Dict[str, Any], selection: str,
+                        role_requirements: Dict[str, Dict[str, float]],
+                        numeric_student_profile: Dict[str, float]) -> Dict[str, Any]:
+    scored = None
+    if selection == "submodular":
+        scored = recmod.select_resources_lazy_greedy(RESOURCE_CATALOG, evaluation["gaps"])
+    plan = recmod.recommend_learning_plan(evaluation, RESOURCE_CATALOG, role_requirements,
+                                          numeric_student_profile, scored=scored)
+    enrich_plan_resources(plan)
+    return plan
+
+def evaluate_items(items: List[Any], selection: str,
+                   options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    /evaluate without persistence for a chunk of {role, student_profile}
+    items: one vectorized evaluation pass per role, then a plan per student.
+    Results are in item order; a failing item gets {"error": ...}.
+    """
+    results: List[Dict[str, Any]] = [None] * len(items)
+    by_role: Dict[str, List[int]] = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = {"error": "Item must be an object with role and student_profile"}
+            continue
+        role, _, error = parse_evaluate_payload(item)
+        if error:
+            results[i] = {"error": error}
+        else:
+            by_role.setdefault(role, []).append(i)
+
+    for role, indices in by_role.items():
+        role_requirements = build_role_requirements(role)
+        evaluations = evalmod.evaluate_students_batch([items[i]["student_profile"] for i in indices], role)
+        for i, evaluation in zip(indices, evaluations):
+            if "error" in evaluation:
+                results[i] = evaluation
+                continue
+            try:
+                plan = build_learning_plan(evaluation, selection, role_requirements,
+                                           to_numeric_profile(items[i]["student_profile"]))
+            except Exception as e:
+                results[i] = {"error": "Error building learning plan", "details": str(e)}
+                continue
+            response = compose_response(None, evaluation, plan, role_requirements)
+            del response["evaluation_id"]
+            trim_response(response, role, options)
+            results[i] = response
+    return results
+
+# --------- Background jobs (see module11_jobs.py) ---------
+def run_evaluate_job(items, options):
+    """Job handler: evaluate_items over one checkpoint chunk."""
+    return evaluate_items(items, options.get("selection", "greedy"), options.get("response"))
+
+JOB_HANDLERS = {"evaluate": run_evaluate_job}
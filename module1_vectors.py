@@ -1,6 +1,14 @@
 import numpy as np
 from typing import Dict, List, Union, Optional, Tuple
 
+# Default dtype of the batch (many students at once) paths. Proficiencies,
+# requirements and weights all live in [0, 1], where float32 keeps ~7
+# significant digits, so batches use half the memory bandwidth of float64.
+# Single-student paths stay float64.
+BATCH_DTYPE = np.float32
+# Largest difference from the float64 reference accepted for float32 scores
+FLOAT32_TOLERANCE = 1e-5
+
 
 # --------------------------------------------------
 # 1. Proficiency mapping
@@ -42,9 +50,10 @@ def build_vocab(skills_list: List[str]) -> Dict[str, int]:
 
 def build_vector(
     skill_input: Dict[str, Union[str, float]],
-    vocab: Dict[str, int]
+    vocab: Dict[str, int],
+    dtype: np.dtype = np.float64
 ) -> np.ndarray:
-    vec = np.zeros(len(vocab), dtype=np.float64)
+    vec = np.zeros(len(vocab), dtype=dtype)
 
     for skill, value in skill_input.items():
         if skill not in vocab:
@@ -74,11 +83,8 @@ def weighted_cosine_similarity(
     r: np.ndarray,
     w: Optional[np.ndarray] = None
 ) -> float:
-    if w is None:
-        w = np.ones_like(r)
-
-    # Apply weights to role vector
-    wr = w * r
+    # Apply weights to role vector (unweighted: w = 1, so w*r is r itself)
+    wr = r if w is None else w * r
 
     numerator = np.dot(s, wr)
     denom = np.linalg.norm(s) * np.linalg.norm(wr)
@@ -109,6 +115,162 @@ def compute_weighted_gaps(
     return weighted_gaps, total_gap
 
 
+# --------------------------------------------------
+# 5b. Batched variants (one student vector per row)
+# --------------------------------------------------
+
+def batch_weighted_cosine_similarity(
+    S: np.ndarray,
+    r: np.ndarray,
+    w: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Row-wise weighted_cosine_similarity for a (n, k) matrix of student vectors.
+    Computed in S's dtype.
+    """
+    wr = (r if w is None else w * r).astype(S.dtype, copy=False)
+    numerator = S @ wr
+    denom = np.linalg.norm(S, axis=1) * np.linalg.norm(wr)
+
+    sim = np.divide(numerator, denom, out=np.zeros_like(numerator), where=denom != 0.0)
+    return np.clip(sim, 0.0, 1.0)
+
+
+def batch_weighted_gaps(
+    S: np.ndarray,
+    r: np.ndarray,
+    w: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise compute_weighted_gaps: (n, k) weighted gaps and (n,) totals.
+    Computed in S's dtype.
+    """
+    r = r.astype(S.dtype, copy=False)
+    w = w.astype(S.dtype, copy=False)
+    weighted_gaps = w * np.maximum(S.dtype.type(0.0), r - S)
+    return weighted_gaps, weighted_gaps.sum(axis=1)
+
+
+# --------------------------------------------------
+# 5c. Allocation-free kernels
+# --------------------------------------------------
+
+class RoleKernel:
+    """
+    Read-only per-role constants for the *_into kernels: r, w, w*r, ||w*r||
+    and sum(w*r). Built once per role (see module2_models.get_role_kernel)
+    and safe to share between threads; scratch space is always passed in.
+    """
+
+    def __init__(self, r: np.ndarray, w: Optional[np.ndarray] = None, dtype: np.dtype = np.float64):
+        self.dtype = np.dtype(dtype)
+        self.r = np.array(r, dtype=self.dtype)
+        self.w = np.ones_like(self.r) if w is None else np.array(w, dtype=self.dtype)
+        self._set_arrays(self.r, self.w, self.w * self.r)
+
+    @classmethod
+    def from_views(cls, r: np.ndarray, w: np.ndarray, wr: np.ndarray) -> "RoleKernel":
+        """
+        A kernel over existing arrays, e.g. rows of the shared store's
+        memory-mapped role matrices, without copying them. wr must be w * r.
+        """
+        kernel = cls.__new__(cls)
+        kernel.dtype = r.dtype
+        kernel._set_arrays(r, w, wr)
+        return kernel
+
+    def _set_arrays(self, r: np.ndarray, w: np.ndarray, wr: np.ndarray) -> None:
+        self.r, self.w, self.wr = r, w, wr
+        # Proficiencies, requirements and weights are in [0, 1], so the plain
+        # sqrt(x·x) norm cannot overflow or underflow
+        self.wr_norm = float(np.sqrt(np.dot(self.wr, self.wr)))
+        self.total_required = float(np.sum(self.wr))
+        for arr in (self.r, self.w, self.wr):
+            arr.flags.writeable = False
+        self._casts: Dict[np.dtype, "RoleKernel"] = {self.dtype: self}
+
+    def astype(self, dtype: np.dtype) -> "RoleKernel":
+        """The same role's kernel in another dtype (built once, then cached)."""
+        dtype = np.dtype(dtype)
+        kernel = self._casts.get(dtype)
+        if kernel is None:
+            kernel = self._casts[dtype] = RoleKernel(self.r, self.w, dtype=dtype)
+        return kernel
+
+
+def weighted_cosine_similarity_into(s: np.ndarray, kernel: RoleKernel) -> float:
+    """weighted_cosine_similarity using the cached w*r and ||w*r||; allocates nothing."""
+    denom = np.sqrt(np.dot(s, s)) * kernel.wr_norm
+    if denom == 0.0:
+        return 0.0
+    return float(min(max(np.dot(s, kernel.wr) / denom, 0.0), 1.0))
+
+
+def weighted_gaps_into(s: np.ndarray, kernel: RoleKernel, out: np.ndarray) -> float:
+    """compute_weighted_gaps writing the per-skill gaps into `out`; returns the total."""
+    np.subtract(kernel.r, s, out=out)
+    np.maximum(out, 0.0, out=out)
+    np.multiply(out, kernel.w, out=out)
+    return float(out.sum())
+
+
+def top_gap_indices(weighted_gaps: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """
+    Indices of the k largest positive gaps, largest first (all positive gaps
+    when k is None). Equal gaps keep index order when everything is sorted;
+    with a smaller k, argpartition only sorts the k survivors.
+    """
+    n_positive = int(np.count_nonzero(weighted_gaps > 0.0))
+    if k is None or k >= n_positive:
+        return np.argsort(-weighted_gaps, kind="stable")[:n_positive]
+
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    n = weighted_gaps.shape[0]
+    top = np.argpartition(weighted_gaps, n - k)[n - k:]
+    return top[np.argsort(-weighted_gaps[top], kind="stable")]
+
+
+def batch_weighted_cosine_similarity_into(
+    S: np.ndarray,
+    kernel: RoleKernel,
+    out: np.ndarray,
+    scratch: np.ndarray
+) -> np.ndarray:
+    """
+    batch_weighted_cosine_similarity into `out` (n,), using `scratch` (n,)
+    for the row norms. S is left untouched. `out` and `scratch` must have S's
+    dtype; the kernel is cast to it.
+    """
+    kernel = kernel.astype(S.dtype)
+    np.dot(S, kernel.wr, out=out)
+    np.einsum("ij,ij->i", S, S, out=scratch)
+    np.sqrt(scratch, out=scratch)
+    scratch *= kernel.wr_norm
+    # A zero denominator means a zero row (or role), whose dot is already 0
+    np.divide(out, scratch, out=out, where=scratch != 0.0)
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+def batch_weighted_gaps_into(
+    S: np.ndarray,
+    kernel: RoleKernel,
+    out: np.ndarray,
+    totals: np.ndarray
+) -> np.ndarray:
+    """
+    batch_weighted_gaps into `out` (n, k) and `totals` (n,). `out` may be S
+    itself when the student vectors are no longer needed. Buffers must have
+    S's dtype; the kernel is cast to it.
+    """
+    kernel = kernel.astype(S.dtype)
+    np.subtract(kernel.r, S, out=out)
+    np.maximum(out, 0.0, out=out)
+    np.multiply(out, kernel.w, out=out)
+    out.sum(axis=1, out=totals)
+    return totals
+
+
 # --------------------------------------------------
 # 6. Resource scoring
 # --------------------------------------------------
@@ -211,3 +373,68 @@ if __name__ == "__main__":
     print("\nTop resource recommendations:")
     for res in scored[:3]:
         print(res)
+
+    # --------------------------------------------------
+    # Kernel micro-benchmark
+    # --------------------------------------------------
+    import time
+
+    kernel = RoleKernel(r, w)
+    runs = 100000
+    buf = np.empty_like(s)
+
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        weighted_cosine_similarity(s, r, w)
+        compute_weighted_gaps(s, r, w)
+    eager_us = (time.perf_counter() - t0) * 1e6 / runs
+
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        weighted_cosine_similarity_into(s, kernel)
+        weighted_gaps_into(s, kernel, buf)
+    kernel_us = (time.perf_counter() - t0) * 1e6 / runs
+
+    assert abs(weighted_cosine_similarity_into(s, kernel) - cos_sim) < 1e-12
+    assert abs(weighted_gaps_into(s, kernel, buf) - total_gap) < 1e-12
+    print(f"\nPer evaluation: eager {eager_us:.2f} us, kernels {kernel_us:.2f} us")
+
+    rng = np.random.default_rng(0)
+    S = rng.random((200000, len(vocab)))
+    sims = np.empty(S.shape[0])
+    scratch = np.empty(S.shape[0])
+    totals = np.empty(S.shape[0])
+    G = np.empty_like(S)
+
+    t0 = time.perf_counter()
+    ref_sims = batch_weighted_cosine_similarity(S, r, w)
+    _, ref_totals = batch_weighted_gaps(S, r, w)
+    eager_ms = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    batch_weighted_cosine_similarity_into(S, kernel, sims, scratch)
+    batch_weighted_gaps_into(S, kernel, G, totals)
+    kernel_ms = (time.perf_counter() - t0) * 1000.0
+
+    assert np.allclose(sims, ref_sims, atol=1e-12) and np.allclose(totals, ref_totals, atol=1e-12)
+    print(f"Batch of {S.shape[0]:,}: eager {eager_ms:.1f} ms, kernels into preallocated buffers {kernel_ms:.1f} ms")
+
+    # float32 vs the float64 reference
+    S32 = S.astype(np.float32)
+    sims32 = np.empty(S.shape[0], dtype=np.float32)
+    scratch32 = np.empty(S.shape[0], dtype=np.float32)
+    totals32 = np.empty(S.shape[0], dtype=np.float32)
+    G32 = np.empty_like(S32)
+
+    batch_weighted_cosine_similarity_into(S32, kernel, sims32, scratch32)  # warm up the cast
+    t0 = time.perf_counter()
+    batch_weighted_cosine_similarity_into(S32, kernel, sims32, scratch32)
+    batch_weighted_gaps_into(S32, kernel, G32, totals32)
+    f32_ms = (time.perf_counter() - t0) * 1000.0
+
+    sim_err = float(np.max(np.abs(sims32 - ref_sims)))
+    gap_err = float(np.max(np.abs(totals32 - ref_totals)))
+    assert sim_err < FLOAT32_TOLERANCE and gap_err < FLOAT32_TOLERANCE
+    assert np.allclose(batch_weighted_cosine_similarity(S32, r, w), ref_sims, atol=FLOAT32_TOLERANCE)
+    print(f"Batch of {S.shape[0]:,} in float32: {f32_ms:.1f} ms "
+          f"(max error: similarity {sim_err:.1e}, total gap {gap_err:.1e})")
@@ -1,8 +1,12 @@
 # module2_models.py
 
-from typing import Dict, List, Tuple
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple, Union
 import numpy as np
 
+import module1_vectors as m1
+
 SKILLS = {
     "DSA":        {"id": 0, "group": "Core CS"},
     "OS":         {"id": 1, "group": "Core CS"},
@@ -21,6 +25,16 @@ SKILLS = {
     "Pandas":     {"id":11, "group": "Libraries"},
 }
 
+# Skill prerequisite DAG: skill -> skills that should be learned before it.
+# Compiled once at import (cycle check, transitive closure, topological levels).
+SKILL_PREREQUISITES = {
+    "OS":     ["Linux"],
+    "CN":     ["OS"],
+    "DBMS":   ["SQL"],
+    "NumPy":  ["Python"],
+    "Pandas": ["Python", "NumPy"],
+}
+
 ROLES = {
     "SDE": {
         "DSA":        {"required": 1.0, "weight": 0.30},
@@ -46,7 +60,131 @@ ROLES = {
     }
 }
 
+# Static curated resources (MVP), in the dict format module4_recommender and
+# module9_catalog_file take. They live next to the skills and roles so the
+# gunicorn master can compile them without importing the app.
+DEFAULT_RESOURCES = [
+    {
+        "id": "res_cs50_py", 
+        "title": "CS50's Intro to Python (Lectures Only)", 
+        "url": "https://cs50.harvard.edu/python/",
+        "time": 16.0, 
+        "coverage": {"Python": 0.9, "Programming": 0.6}, 
+        "type": "course",
+        "icon_type": "university"  # <--- Harvard/University Icon
+    },
+    {
+        "id": "res_neetcode", 
+        "title": "NeetCode 150 (Walkthrough Videos)", 
+        "url": "https://neetcode.io/roadmap",
+        "time": 25.0, 
+        "coverage": {"DSA": 0.9, "Python": 0.3}, 
+        "type": "practice",
+        "icon_type": "code"        # <--- Coding/Terminal Icon
+    },
+    {
+        "id": "res_ostep", 
+        "title": "OSTEP: Operating Systems (Chapters 1-10)", 
+        "url": "https://pages.cs.wisc.edu/~remzi/OSTEP/",
+        "time": 12.0, 
+        "coverage": {"OS": 0.9, "Linux": 0.3}, 
+        "type": "theory",
+        "icon_type": "docs"        # <--- Book/Docs Icon
+    },
+    {
+        "id": "res_fcc_sql", 
+        "title": "Full Database Course for Beginners (FreeCodeCamp)", 
+        "url": "https://www.youtube.com/watch?v=HXV3zeQKqGY",
+        "time": 4.5, 
+        "coverage": {"SQL": 0.9, "DBMS": 0.5}, 
+        "type": "video",
+        "icon_type": "youtube"     # <--- YouTube Icon
+    },
+    {
+        "id": "res_dbms_gate", 
+        "title": "Gate Smashers: DBMS (Core Playlist)", 
+        "url": "https://www.youtube.com/playlist?list=PLxCzCOWd7aiFAN6I8CuViBuCdJgiOkT2Y",
+        "time": 20.0, 
+        "coverage": {"DBMS": 0.9}, 
+        "type": "video",
+        "icon_type": "youtube"     # <--- YouTube Icon
+    },
+    {
+        "id": "res_git_doc", 
+        "title": "Pro Git Book (Ch 1-3)", 
+        "url": "https://git-scm.com/book/en/v2",
+        "time": 4.0, 
+        "coverage": {"Git": 1.0}, 
+        "type": "theory",
+        "icon_type": "docs"        # <--- Book/Docs Icon
+    },
+    {
+        "id": "res_pandas_kaggle", 
+        "title": "Kaggle Pandas Course", 
+        "url": "https://www.kaggle.com/learn/pandas",
+        "time": 4.0, 
+        "coverage": {"Pandas": 0.9, "Python": 0.2}, 
+        "type": "practice",
+        "icon_type": "code"        # <--- Coding/Terminal Icon
+    },
+    {
+        "id": "res_stats_fcc", 
+        "title": "Statistics for Data Science (FreeCodeCamp)", 
+        "url": "https://www.youtube.com/watch?v=LHBE6Q9XlzI",
+        "time": 8.0, 
+        "coverage": {"Statistics": 0.9}, 
+        "type": "video",
+        "icon_type": "youtube"     # <--- YouTube Icon
+    },
+    {
+        "id": "res_cn_gate", 
+        "title": "Gate Smashers: Computer Networks (Complete Playlist)", 
+        "url": "https://www.youtube.com/playlist?list=PLxCzCOWd7aiGFBD2-2joCpWOLUrDLvVV_",
+        "time": 15.0, 
+        "coverage": {"CN": 0.9, "OS": 0.2}, 
+        "type": "video",
+        "icon_type": "youtube"     # <--- YouTube Icon
+    },
+    {
+        "id": "res_cpp_fcc", 
+        "title": "C++ Full Course for Beginners (FreeCodeCamp)", 
+        "url": "https://www.youtube.com/watch?v=vLnPwxZdW4Y",
+        "time": 4.5, 
+        "coverage": {"C++": 0.9, "DSA": 0.2}, 
+        "type": "video",
+        "icon_type": "youtube"     # <--- YouTube Icon
+    },
+    {
+        "id": "res_linux_fcc", 
+        "title": "Linux Command Line Basics (FreeCodeCamp)", 
+        "url": "https://www.youtube.com/watch?v=ROjZy1ZbBwY",
+        "time": 3.0, 
+        "coverage": {"Linux": 0.9, "OS": 0.1}, 
+        "type": "video",
+        "icon_type": "youtube"     # <--- YouTube Icon
+    },
+    {
+        "id": "res_numpy_kaggle", 
+        "title": "Kaggle NumPy Course", 
+        "url": "https://www.kaggle.com/learn/numpy",
+        "time": 4.0, 
+        "coverage": {"NumPy": 0.9, "Python": 0.2}, 
+        "type": "practice",
+        "icon_type": "code"        # <--- Coding/Terminal Icon
+    }
+]
+
+# Blend names join role names with these (see parse_blend below), so a role
+# name may not contain them
+BLEND_SEPARATOR = "+"
+SHARE_SEPARATOR = "*"
+
 def validate_role(role_name: str, role_def: Dict):
+    if BLEND_SEPARATOR in role_name or SHARE_SEPARATOR in role_name:
+        raise ValueError(
+            f"[{role_name}] Role names may not contain '{BLEND_SEPARATOR}' or '{SHARE_SEPARATOR}'"
+        )
+
     total_weight = 0.0
 
     for skill, spec in role_def.items():
@@ -70,14 +208,76 @@ def validate_role(role_name: str, role_def: Dict):
 for role_name, role_def in ROLES.items():
     validate_role(role_name, role_def)
 
+def compile_prerequisites(
+    prerequisites: Dict[str, List[str]]
+) -> Tuple[List[str], Dict[str, int], Dict[str, frozenset]]:
+    """
+    Topologically sorts SKILLS under `prerequisites` (Kahn's algorithm).
+    Returns (topological order, level per skill, transitive prerequisites per
+    skill). Level 0 skills have no prerequisites; otherwise a skill sits one
+    level above its deepest prerequisite. Raises ValueError on unknown skills
+    or cycles.
+    """
+    for skill, before in prerequisites.items():
+        for s in [skill] + list(before):
+            if s not in SKILLS:
+                raise ValueError(f"[prerequisites] Unknown skill: {s}")
+
+    indegree = {skill: 0 for skill in SKILLS}
+    dependents: Dict[str, List[str]] = {skill: [] for skill in SKILLS}
+    for skill, before in prerequisites.items():
+        for p in set(before):
+            indegree[skill] += 1
+            dependents[p].append(skill)
+
+    order = [skill for skill in SKILLS if indegree[skill] == 0]
+    for skill in order:  # order grows while iterating
+        for d in dependents[skill]:
+            indegree[d] -= 1
+            if indegree[d] == 0:
+                order.append(d)
+
+    if len(order) != len(SKILLS):
+        cyclic = sorted(skill for skill, deg in indegree.items() if deg > 0)
+        raise ValueError(f"[prerequisites] Cycle detected among: {cyclic}")
+
+    levels: Dict[str, int] = {}
+    closure: Dict[str, frozenset] = {}
+    for skill in order:
+        before = prerequisites.get(skill, [])
+        levels[skill] = 1 + max((levels[p] for p in before), default=-1)
+        closure[skill] = frozenset(before).union(*(closure[p] for p in before))
+
+    return order, levels, closure
+
+SKILL_TOPO_ORDER, SKILL_LEVELS, SKILL_PREREQ_CLOSURE = compile_prerequisites(SKILL_PREREQUISITES)
+
+# Bumped whenever ROLES changes through register_role/remove_role, so caches
+# built on top of ROLES can check freshness in O(1).
+ROLES_GENERATION = 0
+
+def register_role(role_name: str, role_def: Dict):
+    global ROLES_GENERATION
+    validate_role(role_name, role_def)
+    ROLES[role_name] = role_def
+    ROLES_GENERATION += 1
+
+def remove_role(role_name: str):
+    global ROLES_GENERATION
+    if role_name not in ROLES:
+        raise ValueError(f"Unknown role: {role_name}")
+    del ROLES[role_name]
+    ROLES_GENERATION += 1
+
 def build_vocab() -> Dict[str, int]:
     return {skill: data["id"] for skill, data in SKILLS.items()}
 
-def get_role_vectors(role_name: str, vocab: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
-    role = ROLES[role_name]
+def get_role_vectors(role_name: str, vocab: Dict[str, int],
+                     dtype: np.dtype = np.float64) -> Tuple[np.ndarray, np.ndarray]:
+    role = get_role(role_name)
 
-    r = np.zeros(len(vocab))
-    w = np.zeros(len(vocab))
+    r = np.zeros(len(vocab), dtype=dtype)
+    w = np.zeros(len(vocab), dtype=dtype)
 
     for skill, spec in role.items():
         idx = vocab[skill]
@@ -86,8 +286,9 @@ def get_role_vectors(role_name: str, vocab: Dict[str, int]) -> Tuple[np.ndarray,
 
     return r, w
 
-def get_student_vector(student_profile: Dict[str, float], vocab: Dict[str, int]) -> np.ndarray:
-    s = np.zeros(len(vocab))
+def get_student_vector(student_profile: Dict[str, float], vocab: Dict[str, int],
+                       dtype: np.dtype = np.float64) -> np.ndarray:
+    s = np.zeros(len(vocab), dtype=dtype)
 
     for skill, prof in student_profile.items():
         if skill not in vocab:
@@ -98,3 +299,196 @@ def get_student_vector(student_profile: Dict[str, float], vocab: Dict[str, int])
         s[vocab[skill]] = prof
 
     return s
+
+def get_role_matrices(vocab: Dict[str, int],
+                      dtype: np.dtype = np.float64) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Stacks every role's vectors: returns (role_names, R, W) with R and W of
+    shape (roles, skills), rows in role_names order.
+    """
+    role_names = list(ROLES.keys())
+    R = np.zeros((len(role_names), len(vocab)), dtype=dtype)
+    W = np.zeros((len(role_names), len(vocab)), dtype=dtype)
+
+    for i, role_name in enumerate(role_names):
+        R[i], W[i] = get_role_vectors(role_name, vocab)
+
+    return role_names, R, W
+
+def get_student_matrix(profiles: List[Dict[str, float]], vocab: Dict[str, int],
+                       dtype: np.dtype = m1.BATCH_DTYPE) -> np.ndarray:
+    """Stacks numeric profiles into a (students, skills) matrix, float32 by default."""
+    S = np.zeros((len(profiles), len(vocab)), dtype=dtype)
+    for i, profile in enumerate(profiles):
+        row = S[i]
+        for skill, prof in profile.items():
+            if skill not in vocab:
+                continue
+            if not (0.0 <= prof <= 1.0):
+                raise ValueError(f"Invalid proficiency for {skill}")
+            row[vocab[skill]] = prof
+    return S
+
+# role name -> (ROLES_GENERATION it was built at, kernel)
+_role_kernels: Dict[str, Tuple[int, m1.RoleKernel]] = {}
+
+def get_role_kernel(role_name: str) -> m1.RoleKernel:
+    """
+    Cached m1.RoleKernel (r, w, w*r, ||w*r||, sum(w*r)) over build_vocab(),
+    rebuilt when ROLES_GENERATION moves.
+    """
+    cached = _role_kernels.get(role_name)
+    if cached is not None and cached[0] == ROLES_GENERATION:
+        return cached[1]
+
+    if role_name not in ROLES:
+        return _get_composite(role_name)[2]
+    generation = ROLES_GENERATION
+    kernel = m1.RoleKernel(*get_role_vectors(role_name, build_vocab()))
+    _role_kernels[role_name] = (generation, kernel)
+    return kernel
+
+# --------------------------------------------------
+# Composite (multi-role) targets
+# --------------------------------------------------
+# A blend such as {"SDE": 0.6, "DataAnalyst": 0.4} is a role whose required and
+# weight vectors are that convex combination of the blended roles' rows of
+# get_role_matrices(), so its weights still sum to 1. It goes by a canonical
+# name ("DataAnalyst*0.4+SDE*0.6") that get_role() and get_role_kernel()
+# resolve like any role name; definitions and kernels are cached per blend
+# (LRU) and rebuilt when ROLES_GENERATION moves.
+# Shares are rounded to this many decimals (whole percent), which bounds the
+# number of distinct blends
+BLEND_SHARE_DECIMALS = 2
+MAX_BLEND_ROLES = 4
+MAX_COMPOSITE_ROLES = 1024
+
+# canonical name -> (generation, role definition, kernel)
+_composite_roles: "OrderedDict[str, Tuple[int, Dict, m1.RoleKernel]]" = OrderedDict()
+_composite_lock = threading.Lock()
+# (generation, role_names, R, W) for the float64 role matrices over build_vocab()
+_role_matrix_cache: List[Any] = [None]
+
+def parse_blend(blend: Union[str, Dict[str, float]]) -> List[Tuple[str, float]]:
+    """
+    Validates a blend ({role: share} or a canonical name) and returns its
+    (role, share) pairs sorted by role, shares rounded and summing to 1.
+    """
+    if isinstance(blend, str):
+        pairs = []
+        for part in blend.split(BLEND_SEPARATOR):
+            role_name, sep, share = part.rpartition(SHARE_SEPARATOR)
+            try:
+                pairs.append((role_name, float(share)) if sep else (part, 1.0))
+            except ValueError:
+                raise ValueError(f"Invalid blend: {blend}")
+    elif isinstance(blend, dict):
+        pairs = list(blend.items())
+    else:
+        raise ValueError("A blend must be an object mapping role -> share")
+
+    shares: Dict[str, float] = {}
+    for role_name, share in pairs:
+        if role_name not in ROLES:
+            raise ValueError(f"Unknown role: {role_name}")
+        if isinstance(share, bool) or not isinstance(share, (int, float)) or not share >= 0:
+            raise ValueError(f"Invalid share for {role_name}: {share}")
+        shares[role_name] = shares.get(role_name, 0.0) + float(share)
+
+    total = sum(shares.values())
+    if not np.isfinite(total) or total <= 0:
+        raise ValueError("Blend shares must add up to a positive number")
+    rounded = [(role_name, round(share / total, BLEND_SHARE_DECIMALS))
+               for role_name, share in sorted(shares.items())]
+    rounded = [(role_name, share) for role_name, share in rounded if share > 0]
+    if len(rounded) > MAX_BLEND_ROLES:
+        raise ValueError(f"A blend may combine at most {MAX_BLEND_ROLES} roles")
+    total = sum(share for _, share in rounded)
+    return [(role_name, share / total) for role_name, share in rounded]
+
+def composite_role_name(blend: Union[str, Dict[str, float]]) -> str:
+    """Canonical name of a blend; a blend of one role is just that role's name."""
+    pairs = parse_blend(blend)
+    if len(pairs) == 1:
+        return pairs[0][0]
+    return BLEND_SEPARATOR.join(
+        f"{role_name}{SHARE_SEPARATOR}{round(share, BLEND_SHARE_DECIMALS):g}" for role_name, share in pairs
+    )
+
+def _role_matrices() -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+    cached = _role_matrix_cache[0]
+    if cached is None or cached[0] != ROLES_GENERATION:
+        generation = ROLES_GENERATION
+        role_names, R, W = get_role_matrices(build_vocab())
+        cached = _role_matrix_cache[0] = (generation, {name: i for i, name in enumerate(role_names)}, R, W)
+    return cached[1], cached[2], cached[3]
+
+def attach_role_matrices(role_names: List[str], R: np.ndarray, W: np.ndarray, WR: np.ndarray) -> None:
+    """
+    Serves get_role_kernel() and blends from role matrices compiled elsewhere
+    (module8_shared_store's segment) without copying them: each role's kernel
+    is a row view. The rows must match ROLES; once register_role/remove_role
+    moves ROLES_GENERATION, kernels are built locally again.
+    """
+    vocab = build_vocab()
+    role_names = list(role_names)
+    if role_names != list(ROLES.keys()) or not (R.shape == W.shape == WR.shape == (len(role_names), len(vocab))):
+        raise ValueError("Role matrices do not match ROLES")
+    for i, role_name in enumerate(role_names):
+        r, w = get_role_vectors(role_name, vocab)
+        if not (np.array_equal(R[i], r) and np.array_equal(W[i], w) and np.array_equal(WR[i], w * r)):
+            raise ValueError(f"Role matrices do not match ROLES for {role_name}")
+
+    generation = ROLES_GENERATION
+    rows = {role_name: i for i, role_name in enumerate(role_names)}
+    _role_matrix_cache[0] = (generation, rows, R, W)
+    for role_name, i in rows.items():
+        _role_kernels[role_name] = (generation, m1.RoleKernel.from_views(R[i], W[i], WR[i]))
+
+def _get_composite(role_name: str) -> Tuple[int, Dict, m1.RoleKernel]:
+    with _composite_lock:
+        cached = _composite_roles.get(role_name)
+        if cached is not None and cached[0] == ROLES_GENERATION:
+            _composite_roles.move_to_end(role_name)
+            return cached
+
+    if BLEND_SEPARATOR not in role_name:
+        raise ValueError(f"Unknown role: {role_name}")
+    pairs = parse_blend(role_name)
+    if composite_role_name(role_name) != role_name:
+        raise ValueError(f"Unknown role: {role_name} (blends go by their canonical name)")
+
+    generation = ROLES_GENERATION
+    rows, R, W = _role_matrices()
+    idx = [rows[name] for name, _ in pairs]
+    alpha = np.array([share for _, share in pairs])
+    r, w = alpha @ R[idx], alpha @ W[idx]
+
+    vocab = build_vocab()
+    role_def = {
+        skill: {"required": float(r[i]), "weight": float(w[i])}
+        for skill, i in sorted(vocab.items(), key=lambda kv: kv[1]) if w[i] > 0 or r[i] > 0
+    }
+    entry = (generation, role_def, m1.RoleKernel(r, w))
+    with _composite_lock:
+        _composite_roles[role_name] = entry
+        _composite_roles.move_to_end(role_name)
+        while len(_composite_roles) > MAX_COMPOSITE_ROLES:
+            _composite_roles.popitem(last=False)
+    return entry
+
+def get_role(role_name: str) -> Dict[str, Dict[str, float]]:
+    """A role definition from ROLES, or a composite built from its canonical name."""
+    role = ROLES.get(role_name)
+    if role is not None:
+        return role
+    if not isinstance(role_name, str):
+        raise ValueError(f"Unknown role: {role_name}")
+    return _get_composite(role_name)[1]
+
+def role_exists(role_name: str) -> bool:
+    try:
+        get_role(role_name)
+    except ValueError:
+        return False
+    return True
@@ -1,16 +1,54 @@
-from typing import Dict, Any
+from typing import Dict, List, Any, Optional
 import sys
+import bisect
+import threading
+from itertools import takewhile
 import numpy as np
 
 import module1_vectors as m1
 import module2_models as m2
 
 
+def normalize_student_profile(
+    student_profile: Dict[str, Any],
+    vocab: Dict[str, int]
+) -> Dict[str, float]:
+    """
+    Converts a raw profile (proficiency strings or numbers) into skill -> [0,1].
+    Unknown skills are ignored with a warning.
+    """
+    numeric_profile: Dict[str, float] = {}
+
+    for skill, prof in student_profile.items():
+        if skill not in vocab:
+            print(f"[WARN] Ignoring unknown skill in student profile: {skill}")
+            continue
+
+        numeric_profile[skill] = normalize_proficiency(skill, prof)
+
+    return numeric_profile
+
+
+def normalize_proficiency(skill: str, prof: Any) -> float:
+    if isinstance(prof, str):
+        return m1.map_proficiency_to_score(prof)
+
+    try:
+        val = float(prof)
+    except Exception:
+        raise ValueError(f"Invalid proficiency value for {skill}: {prof}")
+
+    if not (0.0 <= val <= 1.0):
+        raise ValueError(f"Proficiency for {skill} out of range [0,1]: {val}")
+
+    return val
+
+
 def evaluate_student(student_profile: Dict[str, Any], role_name: str) -> Dict[str, Any]:
     # --------------------------------------------------
     # 1. Validate role existence
     # --------------------------------------------------
-    if role_name not in m2.ROLES:
+    if not m2.role_exists(role_name):
         raise ValueError(f"Unknown role: {role_name}")
 
     # --------------------------------------------------
@@ -22,39 +60,23 @@ def evaluate_student(student_profile: Dict[str, Any], role_name: str) -> Dict[st
     # --------------------------------------------------
     # 3. Normalize student profile (string -> numeric)
     # --------------------------------------------------
-    numeric_profile: Dict[str, float] = {}
-
-    for skill, prof in student_profile.items():
-        if skill not in vocab:
-            print(f"[WARN] Ignoring unknown skill in student profile: {skill}")
-            continue
-
-        if isinstance(prof, str):
-            numeric_profile[skill] = m1.map_proficiency_to_score(prof)
-        else:
-            try:
-                val = float(prof)
-            except Exception:
-                raise ValueError(f"Invalid proficiency value for {skill}: {prof}")
-
-            if not (0.0 <= val <= 1.0):
-                raise ValueError(f"Proficiency for {skill} out of range [0,1]: {val}")
-
-            numeric_profile[skill] = val
+    numeric_profile = normalize_student_profile(student_profile, vocab)
 
     # --------------------------------------------------
-    # 4. Build vectors
+    # 4. Build student vector (role vectors, w*r and ||w*r|| are cached)
     # --------------------------------------------------
     s = m2.get_student_vector(numeric_profile, vocab)
-    r, w = m2.get_role_vectors(role_name, vocab)
+    kernel = m2.get_role_kernel(role_name)
 
     # --------------------------------------------------
     # 5. Compute similarity and readiness
     # --------------------------------------------------
-    alignment = m1.weighted_cosine_similarity(s, r, w)
+    alignment = m1.weighted_cosine_similarity_into(s, kernel)
 
-    weighted_gaps, total_gap = m1.compute_weighted_gaps(s, r, w)
-    total_required = float(np.sum(w * r))
+    # s is not needed any more; the gaps overwrite it
+    weighted_gaps = s
+    total_gap = m1.weighted_gaps_into(s, kernel, out=weighted_gaps)
+    total_required = kernel.total_required
 
     if total_required > 0:
         readiness = 1.0 - (total_gap / total_required)
@@ -64,16 +86,12 @@ def evaluate_student(student_profile: Dict[str, Any], role_name: str) -> Dict[st
     # --------------------------------------------------
     # 6. Human-readable gap breakdown
     # --------------------------------------------------
-    gaps: Dict[str, float] = {}
-    for idx, wg in enumerate(weighted_gaps):
-        skill = inv_vocab[idx]
-        gaps[skill] = float(wg)
+    gap_values = weighted_gaps.tolist()
+    gaps: Dict[str, float] = {inv_vocab[idx]: gap for idx, gap in enumerate(gap_values)}
 
-    top_gaps = sorted(
-        [(skill, gap) for skill, gap in gaps.items() if gap > 0.0],
-        key=lambda x: x[1],
-        reverse=True
-    )
+    top_gaps = [
+        (inv_vocab[idx], gap_values[idx]) for idx in m1.top_gap_indices(weighted_gaps)
+    ]
 
     # --------------------------------------------------
     # 7. Output contract
@@ -87,6 +105,439 @@ def evaluate_student(student_profile: Dict[str, Any], role_name: str) -> Dict[st
     }
 
 
+def evaluate_students_batch(
+    student_profiles: List[Dict[str, Any]],
+    role_name: str,
+    dtype: np.dtype = np.float64
+) -> List[Dict[str, Any]]:
+    """
+    evaluate_student for many profiles against one role, scored in a single
+    vectorized pass. A profile that fails validation gets {"error": message}
+    in its slot instead of raising. float64 by default so results match
+    evaluate_student; pass m1.BATCH_DTYPE when only the scores matter.
+    """
+    if not m2.role_exists(role_name):
+        raise ValueError(f"Unknown role: {role_name}")
+
+    vocab = m2.build_vocab()
+    inv_vocab = {idx: skill for skill, idx in vocab.items()}
+
+    results: List[Dict[str, Any]] = [None] * len(student_profiles)
+    rows: List[int] = []
+    numeric_profiles: List[Dict[str, float]] = []
+    for i, profile in enumerate(student_profiles):
+        try:
+            numeric_profiles.append(normalize_student_profile(profile, vocab))
+        except ValueError as e:
+            results[i] = {"error": str(e)}
+            continue
+        rows.append(i)
+
+    if not rows:
+        return results
+
+    S = m2.get_student_matrix(numeric_profiles, vocab, dtype=dtype)
+    kernel = m2.get_role_kernel(role_name)
+    alignment = np.empty(len(rows), dtype=S.dtype)
+    totals = np.empty(len(rows), dtype=S.dtype)
+    m1.batch_weighted_cosine_similarity_into(S, kernel, out=alignment, scratch=totals)
+    # The gaps overwrite the student vectors
+    m1.batch_weighted_gaps_into(S, kernel, out=S, totals=totals)
+
+    for j, i in enumerate(rows):
+        gap_values = [float(gap) for gap in S[j]]
+        if kernel.total_required > 0:
+            readiness = 1.0 - float(totals[j]) / kernel.total_required
+        else:
+            readiness = 1.0
+        results[i] = {
+            "role": role_name,
+            "alignment_score": float(alignment[j]),
+            "readiness_score": float(readiness),
+            "top_gaps": [(inv_vocab[idx], gap_values[idx]) for idx in m1.top_gap_indices(S[j])],
+            "gaps": {inv_vocab[idx]: gap for idx, gap in enumerate(gap_values)}
+        }
+
+    return results
+
+
+# --------------------------------------------------
+# Incremental re-evaluation
+# --------------------------------------------------
+
+# Number of incremental updates after which running sums are rebuilt from the
+# vectors, so floating point drift never accumulates.
+RESYNC_EVERY = 256
+
+
+class IncrementalEvaluation:
+    """
+    Evaluation state for one student/role pair that absorbs changed skills
+    in O(changed skills) instead of rebuilding every vector.
+
+    Keeps s·(w*r), ||s||^2, ||w*r||, the per-skill weighted gaps and their
+    total, which is everything weighted_cosine_similarity and
+    compute_weighted_gaps need. The gaps are also kept ranked, as a sorted
+    list of (-gap, skill id), so top_gaps needs no sort per update.
+    """
+
+    def __init__(self, student_profile: Dict[str, Any], role_name: str):
+        self._bind_role(role_name)
+        self.profile = normalize_student_profile(student_profile, self.vocab)
+        self.s = m2.get_student_vector(self.profile, self.vocab)
+        self._resync()
+
+    @classmethod
+    def from_compiled(cls, profile: Dict[str, float], student_vector: np.ndarray,
+                      role_name: str) -> "IncrementalEvaluation":
+        """
+        Rebuilds the state from an already normalized profile and its student
+        vector (as kept by a stored session), skipping profile parsing.
+        """
+        state = cls.__new__(cls)
+        state._bind_role(role_name)
+        if np.shape(student_vector) != (len(state.vocab),):
+            raise ValueError("Student vector does not match the skill vocabulary")
+        state.profile = dict(profile)
+        state.s = np.array(student_vector, dtype=np.float64)  # own copy: updated in place
+        state._resync()
+        return state
+
+    def copy(self) -> "IncrementalEvaluation":
+        """Independent state with the same profile; role constants stay shared."""
+        state = self.__class__.__new__(self.__class__)
+        state.__dict__.update(self.__dict__)
+        state.profile = dict(self.profile)
+        state.s = self.s.copy()
+        state.weighted_gaps = self.weighted_gaps.copy()
+        state.gaps = dict(self.gaps)
+        state.gap_order = list(self.gap_order)
+        return state
+
+    def _bind_role(self, role_name: str) -> None:
+        if not m2.role_exists(role_name):
+            raise ValueError(f"Unknown role: {role_name}")
+
+        self.role = role_name
+        self.vocab = m2.build_vocab()
+        self.inv_vocab = {idx: skill for skill, idx in self.vocab.items()}
+        # Shared read-only role constants; only s and the gaps are mutated
+        kernel = m2.get_role_kernel(role_name)
+        self.r, self.w, self.wr = kernel.r, kernel.w, kernel.wr
+        self.wr_norm = kernel.wr_norm
+        self.total_required = kernel.total_required
+
+    def _resync(self) -> None:
+        self.dot = float(np.dot(self.s, self.wr))
+        self.s_sq = float(np.dot(self.s, self.s))
+        self.weighted_gaps, self.total_gap = m1.compute_weighted_gaps(self.s, self.r, self.w)
+        self.gaps = {
+            self.inv_vocab[idx]: float(wg) for idx, wg in enumerate(self.weighted_gaps)
+        }
+        # Ascending -gap, then skill id: the order of m1.top_gap_indices
+        self.gap_order = sorted((-float(wg), idx) for idx, wg in enumerate(self.weighted_gaps))
+        self.updates_since_resync = 0
+
+    def update(self, changed_skills: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Applies changed skills and returns skill -> weighted gap delta for the
+        skills whose gap actually moved (consumed by the recommender).
+        """
+        # Validate everything first so a bad value leaves the state untouched
+        changes = normalize_student_profile(changed_skills, self.vocab)
+        gap_deltas: Dict[str, float] = {}
+
+        for skill, new in changes.items():
+            idx = self.vocab[skill]
+            old = float(self.s[idx])
+            if new == old:
+                continue
+
+            self.s[idx] = new
+            self.profile[skill] = new
+            self.dot += (new - old) * self.wr[idx]
+            self.s_sq += new * new - old * old
+
+            new_gap = float(self.w[idx] * max(0.0, self.r[idx] - new))
+            old_gap = float(self.weighted_gaps[idx])
+            delta = new_gap - old_gap
+            if delta != 0.0:
+                del self.gap_order[bisect.bisect_left(self.gap_order, (-old_gap, idx))]
+                bisect.insort(self.gap_order, (-new_gap, idx))
+                self.weighted_gaps[idx] = new_gap
+                self.total_gap += delta
+                self.gaps[skill] = new_gap
+                gap_deltas[skill] = delta
+
+        self.updates_since_resync += 1
+        if self.updates_since_resync >= RESYNC_EVERY:
+            self._resync()
+
+        return gap_deltas
+
+    def result(self) -> Dict[str, Any]:
+        denom = np.sqrt(max(self.s_sq, 0.0)) * self.wr_norm
+        alignment = 0.0 if denom == 0.0 else float(np.clip(self.dot / denom, 0.0, 1.0))
+
+        if self.total_required > 0:
+            readiness = 1.0 - (self.total_gap / self.total_required)
+        else:
+            readiness = 1.0
+
+        top_gaps = [
+            (self.inv_vocab[idx], -neg_gap)
+            for neg_gap, idx in takewhile(lambda entry: entry[0] < 0.0, self.gap_order)
+        ]
+
+        return {
+            "role": self.role,
+            "alignment_score": alignment,
+            "readiness_score": float(readiness),
+            "top_gaps": top_gaps,
+            "gaps": dict(self.gaps)
+        }
+
+
+# --------------------------------------------------
+# Monte Carlo confidence intervals
+# --------------------------------------------------
+
+# Standard deviation of the true proficiency around the point value a
+# self-rating maps to. Numeric (slider) inputs use NUMERIC_UNCERTAINTY.
+PROFICIENCY_UNCERTAINTY = {
+    "none": 0.05,
+    "beginner": 0.10,
+    "intermediate": 0.12,
+    "strong": 0.08,
+}
+NUMERIC_UNCERTAINTY = 0.05
+
+DEFAULT_MC_SAMPLES = 2000
+# Upper bound on samples * skills per request; keeps the batch at a few
+# milliseconds no matter what the client asks for.
+MAX_MC_CELLS = 200_000
+
+
+def evaluate_uncertainty(
+    student_profile: Dict[str, Any],
+    role_name: str,
+    samples: int = DEFAULT_MC_SAMPLES,
+    confidence: float = 0.9,
+    seed: Any = None,
+    dtype: np.dtype = m1.BATCH_DTYPE
+) -> Dict[str, Any]:
+    """
+    Samples perturbed student vectors around the self-ratings and returns
+    readiness/alignment confidence intervals. All samples are scored in one
+    batched pass (m1.batch_weighted_cosine_similarity_into /
+    batch_weighted_gaps_into) in `dtype`.
+    """
+    if not m2.role_exists(role_name):
+        raise ValueError(f"Unknown role: {role_name}")
+    if not (0.0 < confidence < 1.0):
+        raise ValueError(f"Confidence must be in (0, 1), got {confidence}")
+
+    vocab = m2.build_vocab()
+    numeric_profile = normalize_student_profile(student_profile, vocab)
+    s = m2.get_student_vector(numeric_profile, vocab)
+    kernel = m2.get_role_kernel(role_name)
+
+    # Per-skill noise; skills the student did not report stay exactly 0
+    sigma = np.zeros(len(vocab))
+    for skill, prof in student_profile.items():
+        if skill not in vocab:
+            continue
+        if isinstance(prof, str):
+            sigma[vocab[skill]] = PROFICIENCY_UNCERTAINTY[prof.strip().lower()]
+        else:
+            sigma[vocab[skill]] = NUMERIC_UNCERTAINTY
+
+    samples = int(max(1, min(samples, MAX_MC_CELLS // max(1, len(vocab)))))
+    rng = np.random.default_rng(seed)
+    S = rng.standard_normal((samples, len(vocab)), dtype=dtype)
+    S *= sigma.astype(dtype)
+    S += s.astype(dtype)
+    np.clip(S, 0.0, 1.0, out=S)
+
+    alignment = np.empty(samples, dtype=dtype)
+    readiness = np.empty(samples, dtype=dtype)
+    m1.batch_weighted_cosine_similarity_into(S, kernel, out=alignment, scratch=readiness)
+    # The samples are not needed after this, so their gaps overwrite them
+    m1.batch_weighted_gaps_into(S, kernel, out=S, totals=readiness)
+    if kernel.total_required > 0:
+        readiness /= -kernel.total_required
+        readiness += 1.0
+    else:
+        readiness.fill(1.0)
+
+    tail = (1.0 - confidence) / 2.0 * 100.0
+
+    def summarize(values: np.ndarray) -> Dict[str, float]:
+        low, median, high = np.percentile(values, [tail, 50.0, 100.0 - tail])
+        return {
+            "mean": float(values.mean()),
+            "median": float(median),
+            "low": float(low),
+            "high": float(high),
+        }
+
+    return {
+        "samples": samples,
+        "confidence": confidence,
+        "alignment": summarize(alignment),
+        "readiness": summarize(readiness),
+    }
+
+
+# --------------------------------------------------
+# Quantized lookup tables
+# --------------------------------------------------
+
+# Scores of the four proficiency strings (m1.map_proficiency_to_score). A
+# profile whose role skills all sit on this grid is evaluated from a per-role
+# table indexed by a base-4 key (one digit per role skill).
+QUANTIZED_LEVELS = np.array([0.0, 0.25, 0.6, 1.0])
+_LEVEL_CODES = {float(level): code for code, level in enumerate(QUANTIZED_LEVELS)}
+
+# Roles with at most this many skills get the whole 4^k table up front
+# (4^8 = 65536 rows, ~2 MB); larger roles fill rows lazily on first use.
+MAX_PRECOMPUTED_SKILLS = 8
+MAX_LAZY_ENTRIES = 100_000
+# Beyond this many role skills a repeat of the exact same profile is too
+# unlikely for a lazy row cache to pay off; those roles use evaluate_student
+MAX_QUANTIZED_SKILLS = 16
+
+
+class QuantizedEvaluationTable:
+    """
+    Per-role table of s·(w*r), the role part of ||s||^2, the total weighted
+    gap and the top-gap order for every quantized profile. Skills outside the
+    role only add to ||s||^2, so they may take any value in [0, 1].
+    """
+
+    def __init__(self, role_name: str):
+        if role_name not in m2.ROLES:
+            raise ValueError(f"Unknown role: {role_name}")
+
+        self.role = role_name
+        self.generation = m2.ROLES_GENERATION
+        self.vocab = m2.build_vocab()
+        self.inv_vocab = {idx: skill for skill, idx in self.vocab.items()}
+
+        kernel = m2.get_role_kernel(role_name)
+        r, w = kernel.r, kernel.w
+        self.wr_norm = kernel.wr_norm
+        self.total_required = kernel.total_required
+
+        # Role skills in vocab order; digit j of the key is skill j's level code
+        self.skill_ids = sorted(self.vocab[skill] for skill in m2.ROLES[role_name])
+        self.position = {self.inv_vocab[idx]: j for j, idx in enumerate(self.skill_ids)}
+        self.k = len(self.skill_ids)
+        self.wr = (w * r)[self.skill_ids]
+        # gap_levels[j, code] = w_j * max(0, r_j - level)
+        self.gap_levels = w[self.skill_ids, None] * np.maximum(0.0, r[self.skill_ids, None] - QUANTIZED_LEVELS)
+
+        self.precomputed = self.k <= MAX_PRECOMPUTED_SKILLS
+        self._lazy: Dict[int, tuple] = {}
+        if self.precomputed:
+            codes = (np.arange(4 ** self.k)[:, None] // (4 ** np.arange(self.k))) % 4
+            self.dot, self.sq, self.total_gap, self.order, self.n_gaps = self._rows(codes)
+
+    def _rows(self, codes: np.ndarray):
+        S = QUANTIZED_LEVELS[codes]
+        G = self.gap_levels[np.arange(self.k), codes]
+        # Stable sort keeps vocab order among equal gaps, like evaluate_student
+        order = np.argsort(-G, axis=1, kind="stable").astype(np.intp)
+        return S @ self.wr, np.sum(S * S, axis=1), G.sum(axis=1), order, np.count_nonzero(G > 0.0, axis=1)
+
+    def _row(self, key: int, codes: List[int]) -> tuple:
+        if self.precomputed:
+            return self.dot[key], self.sq[key], self.total_gap[key], self.order[key], self.n_gaps[key]
+
+        row = self._lazy.get(key)
+        if row is None:
+            # The digits are already at hand; decoding the key with 4 ** j
+            # would overflow int64 for k >= 32
+            dot, sq, total_gap, order, n_gaps = self._rows(np.array(codes, dtype=np.intp)[None, :])
+            row = (dot[0], sq[0], total_gap[0], order[0], n_gaps[0])
+            if len(self._lazy) < MAX_LAZY_ENTRIES:
+                self._lazy[key] = row
+        return row
+
+    def lookup(self, student_profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Returns the evaluate_student result, or None when the profile is off
+        the grid (or has unknown skills) and needs the exact computation.
+        """
+        key = 0
+        codes = [0] * self.k
+        off_role_sq = 0.0
+        for skill, prof in student_profile.items():
+            j = self.position.get(skill)
+            if j is None:
+                if skill not in self.vocab:
+                    return None
+                val = normalize_proficiency(skill, prof)
+                off_role_sq += val * val
+                continue
+            code = _LEVEL_CODES.get(normalize_proficiency(skill, prof))
+            if code is None:
+                return None
+            codes[j] = code
+            key += code * 4 ** j
+
+        dot, sq, total_gap, order, n_gaps = self._row(key, codes)
+
+        denom = np.sqrt(sq + off_role_sq) * self.wr_norm
+        alignment = 0.0 if denom == 0.0 else float(np.clip(dot / denom, 0.0, 1.0))
+        if self.total_required > 0:
+            readiness = 1.0 - (total_gap / self.total_required)
+        else:
+            readiness = 1.0
+
+        gaps = {skill: 0.0 for skill in self.vocab}
+        for j, idx in enumerate(self.skill_ids):
+            gaps[self.inv_vocab[idx]] = float(self.gap_levels[j, codes[j]])
+        top_gaps = []
+        for j in order[:n_gaps]:
+            skill = self.inv_vocab[self.skill_ids[j]]
+            top_gaps.append((skill, gaps[skill]))
+
+        return {
+            "role": self.role,
+            "alignment_score": alignment,
+            "readiness_score": float(readiness),
+            "top_gaps": top_gaps,
+            "gaps": gaps
+        }
+
+
+_quantized_tables: Dict[str, QuantizedEvaluationTable] = {}
+_quantized_lock = threading.Lock()
+
+
+def get_quantized_table(role_name: str) -> QuantizedEvaluationTable:
+    """Returns the role's table, rebuilding it if ROLES changed."""
+    table = _quantized_tables.get(role_name)
+    if table is not None and table.generation == m2.ROLES_GENERATION:
+        return table
+
+    with _quantized_lock:
+        table = _quantized_tables.get(role_name)
+        if table is None or table.generation != m2.ROLES_GENERATION:
+            table = _quantized_tables[role_name] = QuantizedEvaluationTable(role_name)
+        return table
+
+
+def evaluate_student_quantized(student_profile: Dict[str, Any], role_name: str) -> Dict[str, Any]:
+    """Same contract as evaluate_student; table lookup for on-grid profiles."""
+    if role_name in m2.ROLES and len(m2.ROLES[role_name]) <= MAX_QUANTIZED_SKILLS:
+        result = get_quantized_table(role_name).lookup(student_profile)
+        if result is not None:
+            return result
+    return evaluate_student(student_profile, role_name)
+
+
 # --------------------------------------------------
 # Demo
 # --------------------------------------------------
@@ -121,3 +572,61 @@ if __name__ == "__main__":
         else:
             print("  None — student meets all role requirements.")
         print()
+
+    print("=" * 45)
+    print("Batch evaluation (SDE)")
+    batch = evaluate_students_batch([student, {"DSA": "wizard"}, {**student, "DSA": 1.0}], "SDE")
+    assert batch[0]["top_gaps"] == evaluate_student(student, "SDE")["top_gaps"]
+    for entry in batch:
+        print(" ", entry.get("error") or f"readiness {entry['readiness_score']:.3f}")
+
+    print("=" * 45)
+    print("Incremental update (SDE, DSA -> 0.9, OS -> intermediate)")
+    state = IncrementalEvaluation(student, "SDE")
+    state.update({"DSA": 0.9, "OS": "intermediate"})
+    inc = state.result()
+    full = evaluate_student({**student, "DSA": 0.9, "OS": "intermediate"}, "SDE")
+    print(f"Alignment score : {inc['alignment_score']:.3f} (full: {full['alignment_score']:.3f})")
+    print(f"Readiness score : {inc['readiness_score']:.3f} (full: {full['readiness_score']:.3f})")
+
+    import time
+    print("=" * 45)
+    print("Monte Carlo intervals (SDE, self-ratings)")
+    rated = {"DSA": "intermediate", "OS": "beginner", "C++": "strong", "Git": "beginner"}
+    evaluate_uncertainty(rated, "SDE", samples=10)  # warm up
+    t0 = time.perf_counter()
+    ci = evaluate_uncertainty(rated, "SDE", seed=0)
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+    for key in ("alignment", "readiness"):
+        band = ci[key]
+        print(f"{key:10s}: {band['median']:.3f} [{band['low']:.3f}, {band['high']:.3f}]")
+    print(f"{ci['samples']} samples in {elapsed_ms:.2f} ms")
+    for dtype in (np.float64, np.float32):
+        evaluate_uncertainty(rated, "SDE", samples=10, dtype=dtype)
+        t0 = time.perf_counter()
+        big = evaluate_uncertainty(rated, "SDE", samples=MAX_MC_CELLS, seed=0, dtype=dtype)
+        print(f"  {np.dtype(dtype).name}: {big['samples']} samples in {(time.perf_counter() - t0) * 1000.0:.2f} ms, "
+              f"readiness median {big['readiness']['median']:.4f}")
+
+    print("=" * 45)
+    print("Quantized lookup (SDE, self-ratings)")
+    t0 = time.perf_counter()
+    get_quantized_table("SDE")
+    print(f"Table build: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    rng = np.random.default_rng(0)
+    levels = ["none", "beginner", "intermediate", "strong"]
+    profiles = [
+        {skill: levels[rng.integers(4)] for skill in m2.SKILLS if rng.random() < 0.7}
+        for _ in range(2000)
+    ]
+    for profile in profiles:
+        exact = evaluate_student(profile, "SDE")
+        fast = evaluate_student_quantized(profile, "SDE")
+        assert abs(fast["alignment_score"] - exact["alignment_score"]) < 1e-12
+        assert abs(fast["readiness_score"] - exact["readiness_score"]) < 1e-12
+        assert fast["top_gaps"] == exact["top_gaps"] and fast["gaps"] == exact["gaps"]
+    for label, fn in (("exact", evaluate_student), ("quantized", evaluate_student_quantized)):
+        t0 = time.perf_counter()
+        for profile in profiles:
+            fn(profile, "SDE")
+        print(f"{label:10s}: {(time.perf_counter() - t0) * 1e6 / len(profiles):.1f} us per evaluation")
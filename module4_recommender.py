@@ -1,12 +1,26 @@
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Union
 import sys
 import math
+import bisect
+import heapq
+import hashlib
+import json
+import time as _time
 
+import numpy as np
+
+import module1_vectors as m1
+import module2_models as m2
 import module3_evaluator as evalmod
+import module9_catalog_file as catalogmod
 
 # Maximum weekly hours (moderate pace)
 MAX_WEEKLY_HOURS = 15.0
 
+# A catalog is a list of resource dicts or a module9_catalog_file.CatalogView,
+# whose CSR coverage columns are scored without decoding its entries
+Catalog = Union[List[Dict[str, Any]], catalogmod.CatalogView]
+
 def score_resources_against_gaps(
     resources: List[Dict[str, Any]],
     gaps: Dict[str, float]
@@ -26,6 +40,254 @@ def score_resources_against_gaps(
     scored.sort(key=lambda r: (r["benefit_per_hour"], r["benefit"]), reverse=True)
     return scored
 
+def resource_hours(resources: Catalog) -> List[float]:
+    """Each resource's time in catalog order (0.0 when missing)."""
+    if isinstance(resources, catalogmod.CatalogView):
+        return resources.time.tolist()
+    return [float(res.get("time", 0.0)) if res.get("time", None) is not None else 0.0 for res in resources]
+
+def resource_benefits(resources: Catalog, gaps: Dict[str, float]) -> List[float]:
+    """
+    Each resource's benefit (sum of gap * coverage) in catalog order, summed
+    in coverage order like score_resources_against_gaps.
+    """
+    if isinstance(resources, catalogmod.CatalogView):
+        return resources.coverage_dot(gaps).tolist()
+    benefits = []
+    for res in resources:
+        benefit = 0.0
+        for skill, cov in res.get("coverage", {}).items():
+            if skill in gaps:
+                benefit += gaps[skill] * float(cov)
+        benefits.append(benefit)
+    return benefits
+
+def rank_beneficial_resources(
+    resources: Catalog,
+    gaps: Dict[str, float],
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    The benefit > 0 entries of score_resources_against_gaps, in its order
+    (at most `limit` of them). A CatalogView is scored from its columns and
+    only the returned entries are decoded.
+    """
+    if not isinstance(resources, catalogmod.CatalogView):
+        return [r for r in score_resources_against_gaps(resources, gaps) if r["benefit"] > 0][:limit]
+
+    benefit = resources.coverage_dot(gaps)
+    hours = resources.time
+    per_hour = np.divide(benefit, hours, out=np.zeros_like(benefit), where=hours > 0)
+    positions = np.flatnonzero(benefit > 0)
+    # Benefit per hour, then benefit, descending; catalog order on ties (a stable sort)
+    positions = positions[np.lexsort((positions, -benefit[positions], -per_hour[positions]))][:limit]
+
+    ranked = []
+    for pos in positions.tolist():
+        entry = resources[pos]
+        entry["benefit"] = float(benefit[pos])
+        entry["benefit_per_hour"] = float(per_hour[pos])
+        ranked.append(entry)
+    return ranked
+
+class IncrementalResourceScores:
+    """
+    Per-resource benefits kept in sync with changing gaps.
+    A gap change on one skill only touches the resources that cover it: a
+    CatalogView answers that from its by-skill index, a dict list gets a
+    skill -> [(position, coverage)] index built once. The ranking is kept as
+    a sorted list of (-benefit_per_hour, -benefit, position) keys, and only
+    the touched resources are re-inserted.
+    """
+
+    def __init__(self, resources: Catalog, gaps: Dict[str, float]):
+        self.resources = resources
+        self.skill_index: Optional[Dict[str, List[Tuple[int, float]]]] = None
+        if not isinstance(resources, catalogmod.CatalogView):
+            self.skill_index = {}
+            for pos, res in enumerate(resources):
+                for skill, cov in res.get("coverage", {}).items():
+                    self.skill_index.setdefault(skill, []).append((pos, float(cov)))
+
+        self.hours = resource_hours(resources)
+        self.benefit = resource_benefits(resources, gaps)
+        # Catalog position breaks ties, like the stable sort in score_resources_against_gaps
+        self.keys = [(-self._per_hour(pos), -b, pos) for pos, b in enumerate(self.benefit)]
+        self.order = sorted(self.keys)
+
+    def _per_hour(self, pos: int) -> float:
+        hours = self.hours[pos]
+        return (self.benefit[pos] / hours) if hours > 0 else 0.0
+
+    def _covering(self, skill: str):
+        if self.skill_index is not None:
+            return self.skill_index.get(skill, [])
+        positions, coverage = self.resources.skill_coverage(skill)
+        return zip(positions.tolist(), coverage.tolist())
+
+    def apply_gap_deltas(self, gap_deltas: Dict[str, float]) -> None:
+        touched = set()
+        for skill, delta in gap_deltas.items():
+            for pos, cov in self._covering(skill):
+                self.benefit[pos] += delta * cov
+                touched.add(pos)
+
+        for pos in touched:
+            del self.order[bisect.bisect_left(self.order, self.keys[pos])]
+            self.keys[pos] = (-self._per_hour(pos), -self.benefit[pos], pos)
+            bisect.insort(self.order, self.keys[pos])
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        """
+        The beneficial prefix of score_resources_against_gaps' order (all that
+        recommend_learning_plan looks at), as fresh entries it may annotate.
+        """
+        ranked = []
+        for neg_per_hour, neg_benefit, pos in self.order:
+            if neg_benefit >= 0:
+                break  # benefit > 0 sorts before benefit <= 0 at every benefit_per_hour >= 0
+            entry = dict(self.resources[pos])
+            entry["benefit"] = -neg_benefit
+            entry["benefit_per_hour"] = -neg_per_hour
+            ranked.append(entry)
+        return ranked
+
+def get_primary_skill(resource: Dict[str, Any]) -> Optional[str]:
+    """The known skill a resource covers most (first one on ties), or None."""
+    best, best_cov = None, 0.0
+    for skill, cov in resource.get("coverage", {}).items():
+        if skill in m2.SKILL_LEVELS and cov and cov > best_cov:
+            best, best_cov = skill, cov
+    return best
+
+def order_by_prerequisites(resources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reorders priority-sorted resources so that a resource teaching a
+    prerequisite (module2_models.SKILL_PREREQ_CLOSURE) of another resource's
+    primary skill comes first, in one linear pass over the input.
+
+    A prerequisite inherits the highest priority of the resources that depend
+    on it (stored as _schedule_priority; the displayed _priority is kept), and
+    resources are then bucketed by (schedule priority, skill level). Bucketing
+    is stable, so benefit order is preserved inside each bucket.
+    """
+    priority_order = {"high": 3, "medium": 2, "low": 1}
+    rank_to_priority = {v: k for k, v in priority_order.items()}
+
+    # Highest priority among resources that need each skill learned first
+    demand: Dict[str, int] = {}
+    for res in resources:
+        primary = get_primary_skill(res)
+        res["_primary_skill"] = primary
+        if primary is None:
+            continue
+        rank = priority_order.get(res.get("_priority", "low"), 1)
+        for p in m2.SKILL_PREREQ_CLOSURE[primary]:
+            demand[p] = max(demand.get(p, 0), rank)
+
+    max_level = max(m2.SKILL_LEVELS.values(), default=0)
+    buckets: List[List[Dict[str, Any]]] = [[] for _ in range(3 * (max_level + 1))]
+    for res in resources:
+        primary = res["_primary_skill"]
+        rank = priority_order.get(res.get("_priority", "low"), 1)
+        level = 0
+        if primary is not None:
+            rank = max(rank, demand.get(primary, 0))
+            level = m2.SKILL_LEVELS[primary]
+        res["_schedule_priority"] = rank_to_priority[rank]
+        res["_has_dependents"] = primary is not None and primary in demand
+        buckets[(3 - rank) * (max_level + 1) + level].append(res)
+
+    return [res for bucket in buckets for res in bucket]
+
+# Lazy-greedy selection stops once the best remaining resource closes less
+# weighted gap than this
+DEFAULT_MIN_MARGINAL_GAIN = 0.005
+# ... or once the picks have closed this share of the total weighted gap;
+# past it, resources mostly re-teach skills that are already covered
+DEFAULT_TARGET_COVERAGE = 0.9
+
+def select_resources_lazy_greedy(
+    resources: Catalog,
+    gaps: Dict[str, float],
+    max_hours: Optional[float] = None,
+    min_gain: float = DEFAULT_MIN_MARGINAL_GAIN,
+    target_coverage: float = DEFAULT_TARGET_COVERAGE
+) -> List[Dict[str, Any]]:
+    """
+    Diminishing-returns selection. Picking a resource shrinks the gaps it
+    covers (remaining_gap *= 1 - coverage, the same model as
+    simulate_plan_progress), so a second resource on an already covered skill
+    is credited only with what is left. The benefit is submodular, which lets
+    lazy greedy skip rescoring: cached benefit/hour values are upper bounds,
+    and only the heap top is re-evaluated.
+
+    Selection stops when the marginal gain is exhausted: no resource closes
+    more than min_gain, or the picks already close target_coverage of the
+    total gap (1.0 runs until the gains fall under min_gain).
+
+    Returns entries in pick order with "benefit"/"benefit_per_hour" set to
+    the marginal values at pick time, ready for recommend_learning_plan(scored=...),
+    which schedules exactly these entries.
+    """
+    remaining = dict(gaps)
+    remaining_total = sum(remaining.values())
+    stop_at = (1.0 - target_coverage) * remaining_total
+
+    if isinstance(resources, catalogmod.CatalogView):
+        names, indptr = resources.coverage_skill_names, resources.coverage_indptr
+
+        def coverage_of(pos: int):
+            start, end = int(indptr[pos]), int(indptr[pos + 1])
+            return zip([names[j] for j in resources.coverage_indices[start:end].tolist()],
+                       resources.coverage_data[start:end].tolist())
+    else:
+        def coverage_of(pos: int):
+            return resources[pos].get("coverage", {}).items()
+
+    def marginal_gain(pos: int) -> float:
+        return sum(remaining[s] * float(cov) for s, cov in coverage_of(pos) if s in remaining)
+
+    # The first round's gains are the plain benefits (one pass over a CatalogView's columns)
+    times = resource_hours(resources)
+    heap = []
+    for pos, (time, gain) in enumerate(zip(times, resource_benefits(resources, gaps))):
+        if time > 0 and gain > min_gain:
+            # (-bound, position, round in which the bound was computed)
+            heap.append((-gain / time, pos, 0))
+    heapq.heapify(heap)
+
+    selected: List[Dict[str, Any]] = []
+    hours = 0.0
+    while heap and remaining_total > stop_at:
+        neg_bound, pos, computed_at = heapq.heappop(heap)
+        time = times[pos]
+
+        if computed_at != len(selected):
+            gain = marginal_gain(pos)
+            if gain <= min_gain:
+                continue  # gains only shrink; drop for good
+            heapq.heappush(heap, (-gain / time, pos, len(selected)))
+            continue
+
+        if max_hours is not None and hours + time > max_hours:
+            continue
+
+        gain = -neg_bound * time
+        entry = dict(resources[pos])
+        entry["benefit"] = gain
+        entry["benefit_per_hour"] = gain / time
+        selected.append(entry)
+        hours += time
+
+        for s, cov in coverage_of(pos):
+            if s in remaining:
+                before = remaining[s]
+                remaining[s] *= 1.0 - min(1.0, float(cov))
+                remaining_total -= before - remaining[s]
+
+    return selected
+
 def calculate_priority(
     resource: Dict[str, Any],
     gaps: Dict[str, float],
@@ -180,21 +442,23 @@ def get_covered_skills(resource: Dict[str, Any]) -> List[str]:
 
 def recommend_learning_plan(
     evaluation_result: Dict[str, Any],
-    resources: List[Dict[str, Any]],
+    resources: Catalog,
     role_requirements: Dict[str, Dict[str, float]],
-    student_profile: Dict[str, float]
+    student_profile: Dict[str, float],
+    scored: Optional[List[Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
     """
     Recommend a learning plan automatically based on resource time requirements.
     No longer requires weekly_hours or weeks parameters.
+    Pass `scored` (e.g. from IncrementalResourceScores.ranked()) to skip rescoring.
     """
     gaps = evaluation_result.get("gaps", {})
     
-    # Score resources
-    scored = score_resources_against_gaps(resources, gaps)
-    
-    # Filter resources with benefit > 0
-    beneficial_resources = [r for r in scored if r["benefit"] > 0]
+    # Score resources, keeping those with benefit > 0
+    if scored is None:
+        beneficial_resources = rank_beneficial_resources(resources, gaps)
+    else:
+        beneficial_resources = [r for r in scored if r["benefit"] > 0]
     
     if not beneficial_resources:
         return {
@@ -240,17 +504,77 @@ def recommend_learning_plan(
     week_hours_remaining = {i+1: MAX_WEEKLY_HOURS for i in range(optimal_weeks)}
     resource_week_assignments = {}  # Track which weeks each resource spans
     
+    # Prerequisite ordering state, kept current as resources are placed and
+    # moved: the weeks each primary skill is taught in (week -> resources),
+    # its (first, last) week, and the placed skills that build on each skill.
+    # Checks then compare a few integers per related skill instead of
+    # scanning every selected resource.
+    skill_week_counts: Dict[str, Dict[int, int]] = {}
+    skill_span: Dict[str, Tuple[int, int]] = {}
+    skill_dependents: Dict[str, set] = {}
+    
+    def earliest_allowed_week(res) -> int:
+        primary = res.get("_primary_skill")
+        if primary is None:
+            return 1
+        return max([1] + [skill_span[p][1] for p in m2.SKILL_PREREQ_CLOSURE[primary] if p in skill_span])
+    
+    def record_placement(res, old_weeks, new_weeks):
+        primary = res.get("_primary_skill")
+        if primary is None or old_weeks == new_weeks:
+            return
+        counts = skill_week_counts.get(primary)
+        if counts is None:
+            counts = skill_week_counts[primary] = {}
+            for p in m2.SKILL_PREREQ_CLOSURE[primary]:
+                skill_dependents.setdefault(p, set()).add(primary)
+        for wk in old_weeks:
+            counts[wk] -= 1
+            if counts[wk] == 0:
+                del counts[wk]
+        for wk in new_weeks:
+            counts[wk] = counts.get(wk, 0) + 1
+        if counts:
+            skill_span[primary] = (min(counts), max(counts))
+        else:
+            skill_span.pop(primary, None)
+    
+    def assigned_weeks_of(res_id) -> List[int]:
+        return list(resource_week_assignments.get(res_id, {}).get("weeks", []))
+    
+    def respects_prerequisites(res, week) -> bool:
+        """Whether `res` may sit in `week` without breaking prerequisite order."""
+        primary = res["_primary_skill"] if "_primary_skill" in res else get_primary_skill(res)
+        if primary is None:
+            return True
+        for p in m2.SKILL_PREREQ_CLOSURE[primary]:
+            span = skill_span.get(p)
+            if span is not None and span[1] > week:
+                return False
+        for q in skill_dependents.get(primary, ()):
+            span = skill_span.get(q)
+            if span is not None and span[0] < week:
+                return False
+        return True
+    
     def assign_resource_to_weeks(res):
+        weeks = _assign_resource_to_weeks(res)
+        record_placement(res, [], resource_week_assignments[res["id"]]["weeks"])
+        return weeks
+    
+    def _assign_resource_to_weeks(res):
         time_needed = float(res.get("time", 0.0))
         res_id = res["id"]
-        priority = res.get("_priority", "low")
+        priority = res.get("_schedule_priority", res.get("_priority", "low"))
+        min_week = earliest_allowed_week(res)
         
         # For high-priority resources, try to place in earlier weeks
         # For low-priority/skim resources, can place later
-        week_range = range(1, optimal_weeks + 1)
-        if priority == "low" or res.get("_can_skim", False):
+        # Prerequisites of other selected resources always fill from the front
+        week_range = range(min_week, optimal_weeks + 1)
+        if (priority == "low" or res.get("_can_skim", False)) and not res.get("_has_dependents", False):
             # Low priority: try later weeks first
-            week_range = range(optimal_weeks, 0, -1)
+            week_range = range(optimal_weeks, min_week - 1, -1)
         
         # If resource is too long, split it across multiple weeks
         if time_needed > MAX_WEEKLY_HOURS:
@@ -259,6 +583,7 @@ def recommend_learning_plan(
             
             # For high priority, start from week 1; for low priority, start from later weeks
             start_week = 1 if priority == "high" else max(1, optimal_weeks - num_weeks + 1)
+            start_week = min(max(start_week, min_week), optimal_weeks)
             
             # Find consecutive weeks with enough space
             for wk in range(start_week, optimal_weeks + 1):
@@ -271,7 +596,7 @@ def recommend_learning_plan(
             
             # If we couldn't find enough weeks, fill remaining slots
             while len(assigned_weeks) < num_weeks:
-                for wk in range(1, optimal_weeks + 1):
+                for wk in list(range(min_week, optimal_weeks + 1)) + list(range(1, min_week)):
                     if wk not in assigned_weeks:
                         weeks_plan[wk].append(res_id)
                         week_hours_remaining[wk] -= hours_per_week
@@ -302,7 +627,7 @@ def recommend_learning_plan(
                 return True
         
         # If can't fit, add to appropriate week based on priority
-        target_week = 1 if priority == "high" else optimal_weeks
+        target_week = max(1, min_week) if priority == "high" else optimal_weeks
         weeks_plan[target_week].append(res_id)
         week_hours_remaining[target_week] -= time_needed
         resource_week_assignments[res_id] = {
@@ -332,13 +657,17 @@ def recommend_learning_plan(
         ), 
         reverse=True
     )
-    for res in selected_sorted:
+    # Place prerequisites before the resources that build on them
+    for res in order_by_prerequisites(selected_sorted):
         assign_resource_to_weeks(res)
     
     # Ensure all weeks have at least one resource
     empty_weeks = [wk for wk in range(1, optimal_weeks + 1) if len(weeks_plan[wk]) == 0]
     
     if empty_weeks:
+        selected_by_id: Dict[str, Dict[str, Any]] = {}
+        for res in selected_sorted:
+            selected_by_id.setdefault(res["id"], res)
         # Find resources that can be moved or split to fill empty weeks
         # Start with low-priority resources that can be redistributed
         for empty_week in empty_weeks:
@@ -349,13 +678,14 @@ def recommend_learning_plan(
                 
                 # Look for a low-priority resource to move
                 for res_id in weeks_plan[wk][:]:  # Copy list to iterate safely
-                    resource = next((r for r in selected_sorted if r["id"] == res_id), None)
+                    resource = selected_by_id.get(res_id)
                     if resource:
                         priority = resource.get("_priority", "low")
                         # Move low-priority resources to fill empty weeks
                         if priority == "low" or resource.get("_can_skim", False):
                             time_needed = float(resource.get("time", 0.0))
-                            if time_needed <= MAX_WEEKLY_HOURS and week_hours_remaining[empty_week] >= time_needed:
+                            if (time_needed <= MAX_WEEKLY_HOURS and week_hours_remaining[empty_week] >= time_needed
+                                    and respects_prerequisites(resource, empty_week)):
                                 # Move this resource to the empty week
                                 weeks_plan[wk].remove(res_id)
                                 weeks_plan[empty_week].append(res_id)
@@ -364,7 +694,9 @@ def recommend_learning_plan(
                                 
                                 # Update assignment
                                 if res_id in resource_week_assignments:
+                                    old_weeks = assigned_weeks_of(res_id)
                                     resource_week_assignments[res_id]["weeks"] = [empty_week]
+                                    record_placement(resource, old_weeks, [empty_week])
                                 break
             
             # If still empty, try to split a resource or add a small resource
@@ -381,6 +713,8 @@ def recommend_learning_plan(
                             continue
                     
                     # Try to assign a small resource or split a large one
+                    if not respects_prerequisites(resource, empty_week):
+                        continue
                     if time_needed <= week_hours_remaining[empty_week]:
                         # Remove from current week if assigned
                         for wk in range(1, optimal_weeks + 1):
@@ -392,11 +726,13 @@ def recommend_learning_plan(
                         # Add to empty week
                         weeks_plan[empty_week].append(res_id)
                         week_hours_remaining[empty_week] -= time_needed
+                        old_weeks = assigned_weeks_of(res_id)
                         resource_week_assignments[res_id] = {
                             "weeks": [empty_week],
                             "hours_per_week": time_needed,
                             "is_split": False
                         }
+                        record_placement(resource, old_weeks, [empty_week])
                         break
                     elif time_needed > MAX_WEEKLY_HOURS and week_hours_remaining[empty_week] >= MAX_WEEKLY_HOURS * 0.5:
                         # Split large resource to fill empty week
@@ -410,6 +746,7 @@ def recommend_learning_plan(
                                 "hours_per_week": hours_per_week,
                                 "is_split": True
                             }
+                            record_placement(resource, [], [empty_week])
                             weeks_plan[empty_week].append(res_id)
                             week_hours_remaining[empty_week] -= hours_per_week
                         break
@@ -436,8 +773,9 @@ def recommend_learning_plan(
                 resource["_priority"] = priority
                 resource["_can_skim"] = can_skim
                 resource["_covered_skills"] = covered_skills
+                resource["_primary_skill"] = get_primary_skill(resource)
                 
-                if time_needed <= week_hours_remaining[empty_week]:
+                if time_needed <= week_hours_remaining[empty_week] and respects_prerequisites(resource, empty_week):
                     # Add this resource to the empty week
                     weeks_plan[empty_week].append(res_id)
                     week_hours_remaining[empty_week] -= time_needed
@@ -446,6 +784,7 @@ def recommend_learning_plan(
                         "hours_per_week": time_needed,
                         "is_split": False
                     }
+                    record_placement(resource, [], [empty_week])
                     selected.append(resource)
                     selected_ids.add(res_id)
                     break
@@ -508,6 +847,276 @@ def recommend_learning_plan(
     }
     return result
 
+# --------------------------------------------------
+# What-if simulation along a plan
+# --------------------------------------------------
+
+def simulate_plan_progress(
+    plan: Dict[str, Any],
+    role_name: str,
+    student_profile: Dict[str, float]
+) -> Dict[str, Any]:
+    """
+    Projects readiness and alignment week by week if the plan is followed.
+
+    Skill-gain model: finishing a fraction f of a resource closes f * coverage
+    of the *remaining* gap to the role requirement for every covered skill,
+    i.e. remaining_gap *= (1 - f * coverage). Split resources contribute
+    hours_per_week / time of their coverage in each assigned week. Skills
+    never exceed the role requirement, and skills the role does not require
+    do not move.
+
+    The whole trajectory is computed in one (weeks x skills) pass: per-week
+    retention factors are accumulated with cumprod, then alignment and
+    readiness are evaluated row-wise.
+    """
+    vocab = m2.build_vocab()
+    inv_vocab = {idx: skill for skill, idx in vocab.items()}
+    r, w = m2.get_role_vectors(role_name, vocab)
+    s0 = m2.get_student_vector(student_profile, vocab)
+
+    num_weeks = int(plan.get("optimal_weeks", len(plan.get("weeks", {}))) or 0)
+
+    # retain[t, k]: fraction of skill k's gap left after week t+1's work
+    retain = np.ones((num_weeks, len(vocab)))
+    for res in plan.get("selected_resources", []):
+        assigned = [wk for wk in res.get("week_assignment", []) if 1 <= wk <= num_weeks]
+        if not assigned:
+            continue
+        time = float(res.get("time", 0.0))
+        if res.get("is_split") and time > 0:
+            fraction = min(1.0, float(res.get("hours_per_week", time)) / time)
+        else:
+            fraction = 1.0 / len(assigned)
+        for skill, cov in res.get("coverage", {}).items():
+            if skill not in vocab:
+                continue
+            factor = 1.0 - min(1.0, fraction * float(cov))
+            for wk in assigned:
+                retain[wk - 1, vocab[skill]] *= factor
+
+    # Row 0 is the starting point, row t is the state after week t
+    cumulative = np.vstack([np.ones((1, len(vocab))), np.cumprod(retain, axis=0)])
+    gap0 = np.maximum(0.0, r - s0)
+    S = np.where(gap0 > 0.0, r - gap0 * cumulative, s0)
+
+    total_required = float(np.sum(w * r))
+    alignment = m1.batch_weighted_cosine_similarity(S, r, w)
+    _, total_gap = m1.batch_weighted_gaps(S, r, w)
+    readiness = 1.0 - total_gap / total_required if total_required > 0 else np.ones(num_weeks + 1)
+
+    final = S[-1]
+    return {
+        "weeks": list(range(num_weeks + 1)),
+        "alignment": [float(a) for a in alignment],
+        "readiness": [float(x) for x in readiness],
+        "projected_profile": {inv_vocab[idx]: float(v) for idx, v in enumerate(final) if v > 0.0},
+        "gain_model": "remaining_gap *= (1 - fraction * coverage)"
+    }
+
+# --------------------------------------------------
+# Multi-objective (Pareto) plans
+# --------------------------------------------------
+
+# Only the best resources by benefit/hour are enumerated
+MAX_PARETO_CANDIDATES = 24
+# Frontier size cap; larger frontiers are thinned evenly along hours
+MAX_PARETO_LABELS = 512
+# Enumeration stops (returning the frontier found so far) after this long
+PARETO_BUDGET_SECONDS = 0.05
+
+def _prune_dominated(labels: List[Tuple[float, float, int, Tuple[int, ...]]]) -> List[Tuple[float, float, int, Tuple[int, ...]]]:
+    """
+    Keeps labels (hours, benefit, practice_count, items) not dominated by
+    another (fewer or equal hours, more or equal benefit and practice).
+    Sweep in hours order, tracking the best benefit seen per practice count.
+    """
+    labels.sort(key=lambda l: (l[0], -l[1], -l[2]))
+    max_practice = max((l[2] for l in labels), default=0)
+    best = [-math.inf] * (max_practice + 2)  # best[p]: best benefit seen with practice >= p
+    kept = []
+    for label in labels:
+        hours, benefit, practice, _ = label
+        if best[practice] >= benefit:
+            continue
+        kept.append(label)
+        for p in range(practice, -1, -1):
+            if best[p] >= benefit:
+                break
+            best[p] = benefit
+    return kept
+
+def _thin(labels: List[Tuple[float, float, int, Tuple[int, ...]]], limit: int) -> List[Tuple[float, float, int, Tuple[int, ...]]]:
+    if len(labels) <= limit:
+        return labels
+    step = (len(labels) - 1) / (limit - 1)
+    return [labels[round(i * step)] for i in range(limit)]
+
+def _readiness_gain(subset: List[Dict[str, Any]], gaps: Dict[str, float], total_required: float) -> float:
+    """
+    Readiness gained by finishing every resource in `subset`, as in
+    simulate_plan_progress: each closes min(1, coverage) of what is left of a
+    skill's gap, so resources covering the same skill are not counted twice.
+    """
+    if total_required <= 0:
+        return 0.0
+    remaining = dict(gaps)
+    for res in subset:
+        for skill, cov in res.get("coverage", {}).items():
+            if remaining.get(skill, 0.0) > 0.0:
+                remaining[skill] *= 1.0 - min(1.0, float(cov))
+    return (sum(gaps.values()) - sum(remaining.values())) / total_required
+
+def pareto_learning_plans(
+    evaluation_result: Dict[str, Any],
+    resources: Catalog,
+    role_requirements: Dict[str, Dict[str, float]],
+    student_profile: Dict[str, float],
+    max_plans: int = 4,
+    max_hours: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Non-dominated resource subsets trading total hours against benefit (sum
+    of benefit from score_resources_against_gaps) and the number of practice
+    resources; each also reports the readiness it would actually gain, with
+    overlapping coverage counted once. Each returned subset is scheduled with
+    recommend_learning_plan.
+
+    Labels are extended one candidate at a time and dominated ones dropped
+    after every step; the frontier is capped at MAX_PARETO_LABELS and the
+    enumeration stops at PARETO_BUDGET_SECONDS.
+    """
+    gaps = evaluation_result.get("gaps", {})
+    candidates = rank_beneficial_resources(resources, gaps, limit=MAX_PARETO_CANDIDATES)
+    if not candidates:
+        return []
+
+    total_required = sum(spec["required"] * spec["weight"] for spec in role_requirements.values())
+
+    deadline = _time.perf_counter() + PARETO_BUDGET_SECONDS
+    labels: List[Tuple[float, float, int, Tuple[int, ...]]] = [(0.0, 0.0, 0, ())]
+    for i, res in enumerate(candidates):
+        if _time.perf_counter() > deadline:
+            break
+        hours = float(res.get("time", 0.0))
+        practice = 1 if res.get("type") == "practice" else 0
+        extended = [
+            (h + hours, b + res["benefit"], p + practice, items + (i,))
+            for h, b, p, items in labels
+            if max_hours is None or h + hours <= max_hours
+        ]
+        labels = _thin(_prune_dominated(labels + extended), MAX_PARETO_LABELS)
+
+    frontier = [l for l in labels if l[3]]
+    if not frontier:
+        return []
+
+    # A few plans spread evenly from the cheapest to the most complete
+    picks = _thin(frontier, max(1, max_plans)) if max_plans > 1 else [frontier[-1]]
+
+    plans = []
+    for hours, benefit, practice, items in picks:
+        subset = [candidates[i] for i in items]
+        plan = recommend_learning_plan(evaluation_result, subset, role_requirements, student_profile)
+        plans.append({
+            "total_hours": hours,
+            "benefit": benefit,
+            "practice_count": practice,
+            "readiness_gain": _readiness_gain(subset, gaps, total_required),
+            "plan": plan,
+        })
+    return plans
+
+# --------------------------------------------------
+# Plan versions and deltas
+# --------------------------------------------------
+
+def plan_version(plan: Dict[str, Any]) -> str:
+    """Content hash of a plan (16 hex chars); equal plans get equal versions."""
+    payload = json.dumps(plan, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def diff_plans(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Differences turning `old` into `new`, matched by resource id in one pass:
+      added      : full entries of new resources
+      removed    : ids no longer selected
+      moved      : [{"id", "from", "to"}] week_assignment changes
+      changed    : [{"id", "fields": {...}}] other per-resource fields that changed,
+                   plus "removed_fields": [...] when keys were dropped
+      order      : new id order, only when it differs
+      plan_fields: changed or new top-level fields (weeks, total_hours, ...)
+      removed_plan_fields: top-level keys `new` no longer has (an empty plan
+                   has no optimal_weeks)
+    Returns None if either plan repeats a resource id (no unambiguous delta).
+    """
+    old_resources = old["selected_resources"]
+    new_resources = new["selected_resources"]
+    old_by_id = {r["id"]: r for r in old_resources}
+    new_ids = [r["id"] for r in new_resources]
+    if len(old_by_id) != len(old_resources) or len(set(new_ids)) != len(new_ids):
+        return None
+
+    added, moved, changed = [], [], []
+    for res in new_resources:
+        prev = old_by_id.get(res["id"])
+        if prev is None:
+            added.append(res)
+            continue
+        if prev.get("week_assignment") != res.get("week_assignment"):
+            moved.append({"id": res["id"], "from": prev.get("week_assignment"), "to": res.get("week_assignment")})
+        fields = {
+            key: value for key, value in res.items()
+            if key != "week_assignment" and (key not in prev or prev[key] != value)
+        }
+        removed_fields = [key for key in prev if key not in res]
+        if fields or removed_fields:
+            change = {"id": res["id"], "fields": fields}
+            if removed_fields:
+                change["removed_fields"] = removed_fields
+            changed.append(change)
+
+    new_id_set = set(new_ids)
+    delta = {
+        "added": added,
+        "removed": [r["id"] for r in old_resources if r["id"] not in new_id_set],
+        "moved": moved,
+        "changed": changed,
+        "plan_fields": {
+            key: value for key, value in new.items()
+            if key != "selected_resources" and (key not in old or old[key] != value)
+        },
+        "removed_plan_fields": [key for key in old if key != "selected_resources" and key not in new],
+    }
+    if new_ids != [r["id"] for r in old_resources]:
+        delta["order"] = new_ids
+    return delta
+
+def apply_plan_delta(old: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuilds the new plan from the old one and diff_plans(old, new) (reference for clients)."""
+    by_id = {r["id"]: dict(r) for r in old["selected_resources"]}
+    for rid in delta["removed"]:
+        del by_id[rid]
+    for move in delta["moved"]:
+        by_id[move["id"]]["week_assignment"] = move["to"]
+    for change in delta["changed"]:
+        entry = by_id[change["id"]]
+        entry.update(change["fields"])
+        for key in change.get("removed_fields", ()):
+            entry.pop(key, None)
+    order = delta.get("order")
+    if order is None:
+        order = [rid for rid in (r["id"] for r in old["selected_resources"]) if rid in by_id]
+    for res in delta["added"]:
+        by_id[res["id"]] = res
+
+    plan = {key: value for key, value in old.items() if key != "selected_resources"}
+    plan.update(delta["plan_fields"])
+    for key in delta["removed_plan_fields"]:
+        plan.pop(key, None)
+    plan["selected_resources"] = [by_id[rid] for rid in order]
+    return plan
+
 if __name__ == "__main__":
     student = {
         "DSA": 0.6,
@@ -543,7 +1152,6 @@ if __name__ == "__main__":
     ]
 
     # Get role requirements for SDE
-    import module2_models as m2
     role_requirements = {}
     for skill, spec in m2.ROLES["SDE"].items():
         role_requirements[skill] = {
@@ -563,3 +1171,64 @@ if __name__ == "__main__":
     print("\nWeek-by-week allocation:")
     for wk in range(1, plan['optimal_weeks'] + 1):
         print(f" Week {wk}: {plan['weeks'].get(wk, [])}")
+
+    print("\nPareto plans (hours vs readiness gain vs practice):")
+    t0 = _time.perf_counter()
+    frontier = pareto_learning_plans(eval_sde, resources, role_requirements, student)
+    elapsed_ms = (_time.perf_counter() - t0) * 1000.0
+    for option in frontier:
+        ids = [r["id"] for r in option["plan"]["selected_resources"]]
+        print(f" {option['total_hours']:5.1f}h  gain={option['readiness_gain']:.3f}  practice={option['practice_count']}  {ids}")
+    print(f" ({elapsed_ms:.1f} ms)")
+
+    print("\nDiminishing-returns selection (lazy greedy):")
+    for r in select_resources_lazy_greedy(resources, eval_sde["gaps"]):
+        print(f" - {r['id']:16s} marginal benefit={r['benefit']:.4f}")
+
+    # Lazy vs eager greedy on a large random catalog
+    import random
+    rng = random.Random(0)
+    skills = list(eval_sde["gaps"].keys())
+    big_catalog = [
+        {"id": f"res_{i}", "time": rng.uniform(1.0, 20.0),
+         "coverage": {s: rng.uniform(0.1, 1.0) for s in rng.sample(skills, rng.randint(1, 3))}}
+        for i in range(5000)
+    ]
+    t0 = _time.perf_counter()
+    lazy = select_resources_lazy_greedy(big_catalog, eval_sde["gaps"], min_gain=1e-6, target_coverage=1.0)
+    lazy_ms = (_time.perf_counter() - t0) * 1000.0
+
+    t0 = _time.perf_counter()
+    remaining = dict(eval_sde["gaps"])
+    eager, pool = [], list(big_catalog)
+    while pool:
+        # Rescore the whole pool after every pick, dropping exhausted resources
+        pool = [r for r in pool if sum(remaining[s] * c for s, c in r["coverage"].items()) > 1e-6]
+        if not pool:
+            break
+        gains = [sum(remaining[s] * c for s, c in r["coverage"].items()) / r["time"] for r in pool]
+        best = max(range(len(pool)), key=gains.__getitem__)
+        pick = pool.pop(best)
+        eager.append(pick["id"])
+        for s, c in pick["coverage"].items():
+            remaining[s] *= 1.0 - c
+    eager_ms = (_time.perf_counter() - t0) * 1000.0
+    assert [r["id"] for r in lazy] == eager
+    print(f" 5000 resources: lazy {lazy_ms:.1f} ms vs eager {eager_ms:.1f} ms ({len(lazy)} picks)")
+
+    trajectory = simulate_plan_progress(plan, "SDE", student)
+    print("\nProjected trajectory:")
+    for wk, a, rd in zip(trajectory["weeks"], trajectory["alignment"], trajectory["readiness"]):
+        print(f" Week {wk}: alignment={a:.3f} readiness={rd:.3f}")
+
+    print("\nPlan delta after a small skill change (DSA 0.6 -> 0.8, Git -> 0.5):")
+    updated_student = {**student, "DSA": 0.8, "Git": 0.5}
+    updated_plan = recommend_learning_plan(evalmod.evaluate_student(updated_student, "SDE"),
+                                           resources, role_requirements, updated_student)
+    t0 = _time.perf_counter()
+    delta = diff_plans(plan, updated_plan)
+    diff_us = (_time.perf_counter() - t0) * 1e6
+    assert plan_version(apply_plan_delta(plan, delta)) == plan_version(updated_plan)
+    print(f" {plan_version(plan)} -> {plan_version(updated_plan)}: +{[r['id'] for r in delta['added']]} "
+          f"-{delta['removed']} moved={[m['id'] for m in delta['moved']]} changed={[c['id'] for c in delta['changed']]}")
+    print(f" full plan {len(json.dumps(updated_plan))} bytes, delta {len(json.dumps(delta))} bytes, diff {diff_us:.0f} us")
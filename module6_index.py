@@ -0,0 +1,334 @@
+# module6_index.py
+"""
+In-memory nearest-neighbor index over stored student vectors.
+
+Vectors are aligned with module2_models.SKILLS ids. Queries rank stored
+students by weighted cosine under a role's weight vector:
+
+    sim(q, x) = sum(w * q * x) / (sqrt(sum(w * q^2)) * sqrt(sum(w * x^2)))
+
+Per-role row scales (1 / sqrt(w · x^2)) are maintained as rows are added, so
+a query is one (n, k) @ (k,) product, one multiply and an argpartition.
+
+The index persists to three .npy files next to a base path and can be
+reopened memory-mapped; the first add() after a memory-mapped load copies the
+arrays into memory.
+
+Each worker process holds its own index. catch_up_from_db() picks up rows
+that other processes inserted since the last catch-up (ids are allocated and
+committed in order, so everything up to synced_id has been seen).
+"""
+
+import sqlite3
+import sys
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+import module2_models as m2
+
+INITIAL_CAPACITY = 1024
+INDEX_DTYPE = np.float32
+
+
+class StudentVectorIndex:
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim if dim is not None else len(m2.SKILLS)
+        self.size = 0
+        self.vectors = np.zeros((INITIAL_CAPACITY, self.dim), dtype=INDEX_DTYPE)
+        self.ids = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.readiness = np.zeros(INITIAL_CAPACITY, dtype=INDEX_DTYPE)
+        self.role_codes = np.zeros(INITIAL_CAPACITY, dtype=np.int16)
+        self.role_names: List[str] = []
+        self._role_lookup: Dict[str, int] = {}
+        # role name -> (weights, row scales[:capacity]) kept in sync on add(),
+        # for the role definitions of m2.ROLES_GENERATION _scales_generation
+        self._role_scales: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._scales_generation = m2.ROLES_GENERATION
+        self._lock = threading.Lock()
+        # Highest evaluation id up to which the database has been read, and
+        # ids above it that this process added itself
+        self.synced_id = 0
+        self._unsynced_ids = set()
+        self._sync_lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    # --------------------------------------------------
+    # Building
+    # --------------------------------------------------
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = self.vectors.shape[0]
+        in_memory = self.vectors.flags.writeable and not isinstance(self.vectors, np.memmap)
+        if needed <= capacity and in_memory:
+            return
+
+        # Grow geometrically; a memory-mapped (read-only) index is copied once
+        new_capacity = max(needed, capacity * 2, INITIAL_CAPACITY) if needed > capacity else capacity
+
+        def grow(arr: np.ndarray) -> np.ndarray:
+            out = np.zeros((new_capacity,) + arr.shape[1:], dtype=arr.dtype)
+            out[:self.size] = arr[:self.size]
+            return out
+
+        self.vectors = grow(self.vectors)
+        self.ids = grow(self.ids)
+        self.readiness = grow(self.readiness)
+        self.role_codes = grow(self.role_codes)
+        for role, (w, scales) in self._role_scales.items():
+            self._role_scales[role] = (w, grow(scales))
+
+    def _role_code(self, role: str) -> int:
+        code = self._role_lookup.get(role)
+        if code is None:
+            code = len(self.role_names)
+            self.role_names.append(role)
+            self._role_lookup[role] = code
+        return code
+
+    def add(self, evaluation_id: int, student_vector: np.ndarray, readiness: float, role: str) -> None:
+        vec = np.asarray(student_vector, dtype=INDEX_DTYPE)
+        if vec.shape != (self.dim,):
+            raise ValueError(f"Student vector must have shape ({self.dim},), got {vec.shape}")
+
+        with self._sync_lock, self._lock:
+            if evaluation_id <= self.synced_id:
+                return  # already read from the database by catch_up_from_db
+            self._ensure_capacity(self.size + 1)
+            i = self.size
+            code = self._role_code(role)
+            self.vectors[i] = vec
+            self.ids[i] = evaluation_id
+            self.readiness[i] = readiness
+            self.role_codes[i] = code
+            sq = vec * vec
+            for cached_role, (w, scales) in self._role_scales.items():
+                scales[i] = _row_scale(np.sqrt(np.dot(sq, w)), cached_role == role)
+            self.size += 1
+            self._unsynced_ids.add(evaluation_id)
+
+    def _scales_for(self, role: str, w: np.ndarray) -> np.ndarray:
+        """
+        Per-row multiplier turning X @ (w*q) into a ranking score for `role`:
+        1/||x||_w for rows stored under that role, -1 for every other row
+        (so they can never score above 0, and the role filter costs nothing
+        at query time). Dropped for every role once ROLES_GENERATION moves:
+        a re-registered role may weigh the skills differently.
+        """
+        if self._scales_generation != m2.ROLES_GENERATION:
+            self._role_scales.clear()
+            self._scales_generation = m2.ROLES_GENERATION
+        cached = self._role_scales.get(role)
+        if cached is None:
+            scales = np.zeros(self.vectors.shape[0], dtype=INDEX_DTYPE)
+            X = self.vectors[:self.size]
+            norms = np.sqrt((X * X) @ w)
+            same_role = self.role_codes[:self.size] == self._role_lookup.get(role, -1)
+            inv = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+            scales[:self.size] = np.where(same_role, inv, -1.0)
+            cached = self._role_scales[role] = (w, scales)
+        return cached[1]
+
+    # --------------------------------------------------
+    # Querying
+    # --------------------------------------------------
+
+    def query(
+        self,
+        student_vector: np.ndarray,
+        role: str,
+        k: int = 5,
+        exclude_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k students stored under `role`, by weighted cosine under its weights.
+        """
+        if not m2.role_exists(role):
+            raise ValueError(f"Unknown role: {role}")
+
+        _, w64 = m2.get_role_vectors(role, m2.build_vocab())
+        w = w64.astype(INDEX_DTYPE)
+        q = np.asarray(student_vector, dtype=INDEX_DTYPE)
+        q_norm = float(np.sqrt(np.dot(q * q, w)))
+
+        with self._lock:
+            n = self.size
+            if n == 0 or k <= 0 or q_norm == 0.0:
+                return []
+
+            scores = self.vectors[:n] @ (w * q)
+            scores *= self._scales_for(role, w)[:n]
+
+            want = min(n, k + (1 if exclude_id is not None else 0))
+            top = np.argpartition(scores, n - want)[n - want:]
+            top = top[np.argsort(-scores[top])]
+
+            hits = []
+            for i in top:
+                if scores[i] <= 0.0 or (exclude_id is not None and self.ids[i] == exclude_id):
+                    continue
+                hits.append({
+                    "evaluation_id": int(self.ids[i]),
+                    "similarity": float(min(scores[i] / q_norm, 1.0)),
+                    "readiness": float(self.readiness[i]),
+                    "role": role,
+                })
+            return hits[:k]
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+
+    @staticmethod
+    def _paths(base_path: str) -> Tuple[str, str, str]:
+        return (
+            base_path + ".vectors.npy",
+            base_path + ".meta.npy",
+            base_path + ".roles.npy",
+        )
+
+    def save(self, base_path: str) -> None:
+        vec_path, meta_path, roles_path = self._paths(base_path)
+        with self._lock:
+            n = self.size
+            out = np.lib.format.open_memmap(vec_path, mode="w+", dtype=INDEX_DTYPE, shape=(n, self.dim))
+            out[:] = self.vectors[:n]
+            out.flush()
+            del out
+
+            meta = np.zeros(n, dtype=[("id", np.int64), ("readiness", INDEX_DTYPE), ("role", np.int16)])
+            meta["id"] = self.ids[:n]
+            meta["readiness"] = self.readiness[:n]
+            meta["role"] = self.role_codes[:n]
+            np.save(meta_path, meta)
+            np.save(roles_path, np.array(self.role_names, dtype=str))
+
+    @classmethod
+    def load(cls, base_path: str, mmap: bool = True) -> "StudentVectorIndex":
+        vec_path, meta_path, roles_path = cls._paths(base_path)
+        vectors = np.load(vec_path, mmap_mode="r" if mmap else None)
+        meta = np.load(meta_path)
+        role_names = [str(r) for r in np.load(roles_path)]
+
+        index = cls(dim=vectors.shape[1])
+        index.size = vectors.shape[0]
+        index.vectors = vectors
+        index.ids = np.ascontiguousarray(meta["id"])
+        index.readiness = np.ascontiguousarray(meta["readiness"])
+        index.role_codes = np.ascontiguousarray(meta["role"])
+        index.role_names = role_names
+        index._role_lookup = {role: code for code, role in enumerate(role_names)}
+        index.synced_id = index.max_id  # saved by --rebuild from the database
+        return index
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids[:self.size].max()) if self.size else 0
+
+
+def _row_scale(norm: float, same_role: bool) -> float:
+    if not same_role:
+        return -1.0
+    return 1.0 / norm if norm > 0 else 0.0
+
+
+def vector_to_blob(student_vector: np.ndarray) -> bytes:
+    return np.asarray(student_vector, dtype=INDEX_DTYPE).tobytes()
+
+
+def blob_to_vector(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=INDEX_DTYPE)
+
+
+def catch_up_from_db(index: StudentVectorIndex, db_path: str,
+                     conn: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Adds evaluation rows newer than index.synced_id that carry a
+    student_vector and were not added by this process. Cheap when nothing is
+    new (one range probe per partition), so it can run before every query.
+    Pass `conn` to reuse an open connection. Returns the number of rows added.
+    """
+    with index._sync_lock:
+        own = conn is None
+        if own:
+            conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(
+                "SELECT id, role, readiness, student_vector FROM evaluations WHERE id > ? ORDER BY id",
+                (index.synced_id,)
+            ).fetchall()
+        finally:
+            if own:
+                conn.close()
+
+        added = 0
+        for eval_id, role, readiness, blob in rows:
+            if blob is None or eval_id in index._unsynced_ids:
+                continue
+            vec = blob_to_vector(blob)
+            if vec.shape != (index.dim,):
+                continue  # written under a different SKILLS vocabulary
+            index.add(eval_id, vec, readiness, role)
+            added += 1
+        if rows:
+            index.synced_id = rows[-1][0]
+            index._unsynced_ids = {i for i in index._unsynced_ids if i > index.synced_id}
+        return added
+
+
+# --------------------------------------------------
+# Demo / benchmark
+#   python module6_index.py                               -> benchmark
+#   python module6_index.py --rebuild <db_path> <base_path> -> persist index
+# --------------------------------------------------
+if __name__ == "__main__":
+    import time
+
+    if len(sys.argv) == 4 and sys.argv[1] == "--rebuild":
+        index = StudentVectorIndex()
+        added = catch_up_from_db(index, sys.argv[2])
+        index.save(sys.argv[3])
+        print(f"Saved {added} vectors to {sys.argv[3]}.*.npy")
+        sys.exit(0)
+
+    rng = np.random.default_rng(0)
+    dim = len(m2.SKILLS)
+    n = 1_000_000
+
+    index = StudentVectorIndex()
+    t0 = time.perf_counter()
+    # Bulk fill for the benchmark; the app uses add() per inserted row
+    index._ensure_capacity(n)
+    index.vectors[:n] = rng.random((n, dim), dtype=INDEX_DTYPE)
+    index.ids[:n] = np.arange(1, n + 1)
+    index.readiness[:n] = rng.random(n, dtype=INDEX_DTYPE)
+    index.role_codes[:n] = rng.integers(0, len(m2.ROLES), n)
+    for role in m2.ROLES:
+        index._role_code(role)
+    index.size = n
+    print(f"Filled {n:,} vectors in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    q = rng.random(dim)
+    index.query(q, "SDE", k=5)  # builds the per-role norm cache
+    t0 = time.perf_counter()
+    runs = 20
+    for _ in range(runs):
+        top = index.query(q, "SDE", k=5)
+    print(f"Top-5 query over {n:,} vectors: {(time.perf_counter() - t0) * 1000 / runs:.2f} ms")
+    for hit in top:
+        print(" ", hit)
+
+    import os
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "student_index")
+        index.save(base)
+        t0 = time.perf_counter()
+        reopened = StudentVectorIndex.load(base, mmap=True)
+        print(f"Memory-mapped reopen: {(time.perf_counter() - t0) * 1000:.2f} ms")
+        assert [h["evaluation_id"] for h in reopened.query(q, "SDE", k=5)] == [h["evaluation_id"] for h in top]
+        del reopened
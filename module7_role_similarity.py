@@ -0,0 +1,142 @@
+# module7_role_similarity.py
+"""
+Precomputed role-to-role similarity and role clusters.
+
+Similarity uses the weighted cosine from module1_vectors: role A's required
+vector plays the student and is compared with role B's weighted requirement
+(w_B * r_B). That measure is asymmetric, so the matrix stores the mean of
+both directions.
+
+Everything is rebuilt when module2_models.ROLES_GENERATION moves, so after
+register_role/remove_role the next lookup sees the new roles. Lookups are
+dictionary reads of precomputed lists. A blend (canonical composite name) is
+scored against every role on lookup, one row of the matrix, and belongs to
+the cluster of its most similar role.
+"""
+
+import threading
+from typing import Dict, List, Any
+
+import numpy as np
+
+import module1_vectors as m1
+import module2_models as m2
+
+# Roles whose similarity is at least this are linked when clustering
+CLUSTER_THRESHOLD = 0.5
+
+
+class RoleSimilarity:
+
+    def __init__(self):
+        vocab = m2.build_vocab()
+        self.generation = m2.ROLES_GENERATION
+        self.role_names, R, W = m2.get_role_matrices(vocab)
+        self.R, self.W = R, W
+        n = len(self.role_names)
+
+        # directed[i, j] = weighted_cosine_similarity(r_i, r_j, w_j)
+        directed = np.zeros((n, n))
+        for j in range(n):
+            directed[:, j] = m1.batch_weighted_cosine_similarity(R, R[j], W[j])
+        self.matrix = (directed + directed.T) / 2.0
+        np.fill_diagonal(self.matrix, 1.0)
+
+        self.index = {role: i for i, role in enumerate(self.role_names)}
+        self.related = {
+            role: self._ranked_neighbors(i) for role, i in self.index.items()
+        }
+        self.clusters = self._cluster()
+        self.cluster_of = {
+            role: cluster_id
+            for cluster_id, members in enumerate(self.clusters)
+            for role in members
+        }
+
+    def _ranked_neighbors(self, i: int) -> List[Dict[str, Any]]:
+        order = np.argsort(-self.matrix[i], kind="stable")
+        return [
+            {"id": self.role_names[j], "similarity": float(self.matrix[i, j])}
+            for j in order if j != i
+        ]
+
+    def _cluster(self) -> List[List[str]]:
+        """Single-linkage clusters: connected components of matrix >= CLUSTER_THRESHOLD."""
+        n = len(self.role_names)
+        parent = list(range(n))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        rows, cols = np.nonzero(np.triu(self.matrix >= CLUSTER_THRESHOLD, k=1))
+        for a, b in zip(rows, cols):
+            ra, rb = find(int(a)), find(int(b))
+            if ra != rb:
+                parent[rb] = ra
+
+        groups: Dict[int, List[str]] = {}
+        for i, role in enumerate(self.role_names):
+            groups.setdefault(find(i), []).append(role)
+        return list(groups.values())
+
+    def _blend_neighbors(self, role_name: str) -> List[Dict[str, Any]]:
+        """The matrix row a blend would have, as ranked neighbors (its members included)."""
+        kernel = m2.get_role_kernel(role_name)
+        as_student = m1.batch_weighted_cosine_similarity(self.R, kernel.r, kernel.w)
+        as_target = np.array([
+            m1.weighted_cosine_similarity(kernel.r, self.R[j], self.W[j]) for j in range(len(self.role_names))
+        ])
+        row = (as_student + as_target) / 2.0
+        return [
+            {"id": self.role_names[j], "similarity": float(row[j])}
+            for j in np.argsort(-row, kind="stable")
+        ]
+
+    def lookup(self, role_name: str, k: int = 3) -> Dict[str, Any]:
+        if role_name in self.index:
+            related = self.related[role_name]
+            cluster_id = self.cluster_of[role_name]
+        elif m2.BLEND_SEPARATOR in role_name and m2.role_exists(role_name):
+            related = self._blend_neighbors(role_name)
+            cluster_id = self.cluster_of[related[0]["id"]]
+        else:
+            raise ValueError(f"Unknown role: {role_name}")
+
+        return {
+            "role": role_name,
+            "related": related[:k],
+            "cluster_id": cluster_id,
+            "cluster": self.clusters[cluster_id],
+        }
+
+
+_cache: Dict[str, RoleSimilarity] = {}
+_cache_lock = threading.Lock()
+
+
+def get_role_similarity() -> RoleSimilarity:
+    """Returns the precomputed similarity, rebuilding it if ROLES changed."""
+    current = _cache.get("roles")
+    if current is not None and current.generation == m2.ROLES_GENERATION:
+        return current
+
+    with _cache_lock:
+        current = _cache.get("roles")
+        if current is None or current.generation != m2.ROLES_GENERATION:
+            current = _cache["roles"] = RoleSimilarity()
+        return current
+
+
+# --------------------------------------------------
+# Demo
+# --------------------------------------------------
+if __name__ == "__main__":
+    sim = get_role_similarity()
+    print("Roles:", sim.role_names)
+    print("Similarity matrix:")
+    print(np.round(sim.matrix, 3))
+    for role in sim.role_names:
+        print(sim.lookup(role))
@@ -0,0 +1,180 @@
+# module8_shared_store.py
+"""
+Shared, read-only store of compiled roles, skills and the resource catalog.
+
+The gunicorn master compiles everything once and publishes it as a single
+memory-mapped segment file (on /dev/shm when available) before forking.
+Workers mmap the file read-only and get zero-copy NumPy views via
+np.frombuffer: app.py serves the catalog straight from the segment's CSR and
+string tables, and module2_models.attach_role_matrices() builds every role
+kernel on rows of its role matrices. The compiled data exists once per machine
+instead of once per worker.
+
+The segment uses the module9_catalog_file layout with its own magic
+("SKGSTORE") and the generation in the header's version field. Next to the
+catalog sections it holds the skills, role names and the role required,
+weight and weight * required matrices.
+
+Reloads: publish_store() writes generation + 1 to a temp file and renames it
+over the old one; gunicorn.conf.py does this on HUP before the workers are
+replaced, so new workers attach the new generation. A process that outlives
+a reload keeps its old mapping (the old inode stays alive until unmapped) and
+can switch with SharedStore.refresh(), so a reload never tears a view in use.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import module2_models as m2
+from module9_catalog_file import (HEADER, CatalogView, StringTable, compile_catalog_sections, decode_segment,
+                                  encode_segment, encode_strings, open_catalog, write_segment_file)
+
+MAGIC = b"SKGSTORE"
+
+# Set by the gunicorn master to the segment it published; workers inherit it
+STORE_ENV = "SKILLGAP_STORE_PATH"
+STORE_PREFIX = "skillgap_store"
+
+
+def own_store_path() -> str:
+    """A path of this process's own (pid-suffixed) on /dev/shm, or the temp dir."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"{STORE_PREFIX}.{os.getpid()}.bin")
+
+
+def default_store_path() -> str:
+    return os.environ.get(STORE_ENV) or own_store_path()
+
+
+# --------------------------------------------------
+# Compilation
+# --------------------------------------------------
+
+def compile_store_sections(catalog_path: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Roles, skills and the catalog file at catalog_path (else m2.DEFAULT_RESOURCES)."""
+    vocab = m2.build_vocab()
+    role_names, R, W = m2.get_role_matrices(vocab)
+    skills = [s for s, _ in sorted(vocab.items(), key=lambda kv: kv[1])]
+
+    sections = {"role.required": R, "role.weight": W, "role.wr": W * R}
+    sections.update(encode_strings("skills", skills))
+    sections.update(encode_strings("skills.group", [m2.SKILLS[s]["group"] for s in skills]))
+    sections.update(encode_strings("role.names", role_names))
+    if catalog_path:
+        sections.update(open_catalog(catalog_path).sections)
+    else:
+        sections.update(compile_catalog_sections(m2.DEFAULT_RESOURCES))
+    return sections
+
+
+def read_generation(path: str) -> int:
+    try:
+        with open(path, "rb") as f:
+            magic, _, _, generation = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return 0
+    return generation if magic == MAGIC else 0
+
+
+def publish_store(catalog_path: Optional[str] = None, path: Optional[str] = None) -> int:
+    """Compiles and publishes a new generation of the store. Returns the generation."""
+    path = path or default_store_path()
+    generation = read_generation(path) + 1
+    write_segment_file(path, encode_segment(compile_store_sections(catalog_path), generation, MAGIC))
+    return generation
+
+
+# --------------------------------------------------
+# Worker side
+# --------------------------------------------------
+
+class SharedStore:
+    """
+    Zero-copy views over a published segment. Call refresh() (cheap: one
+    stat) to pick up a newer generation.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_store_path()
+        self._lock = threading.Lock()
+        self._inode = None
+        self._mm = None
+        self.generation = 0
+        self.sections: Dict[str, np.ndarray] = {}
+        self.refresh()
+
+    def _attach(self, stat: os.stat_result) -> None:
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        generation, sections = decode_segment(mm, MAGIC)
+
+        # Old views stay valid: the old mapping is only dropped with them
+        self._mm = mm
+        self.generation = generation
+        self.sections = sections
+        self._inode = (stat.st_dev, stat.st_ino)
+
+        self.skills = StringTable(sections, "skills")
+        self.role_names = StringTable(sections, "role.names")
+        self.role_required = sections["role.required"]
+        self.role_weight = sections["role.weight"]
+        self.role_wr = sections["role.wr"]
+        self.catalog = CatalogView(sections)
+
+    def refresh(self) -> bool:
+        """Re-attaches if a new generation was published. Returns True if it did."""
+        stat = os.stat(self.path)
+        if (stat.st_dev, stat.st_ino) == self._inode:
+            return False
+        with self._lock:
+            if (stat.st_dev, stat.st_ino) == self._inode:
+                return False
+            self._attach(stat)
+            return True
+
+    def role_vectors(self, role_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Read-only (required, weight) views, same values as m2.get_role_vectors."""
+        i = self.role_names.index(role_name)
+        return self.role_required[i], self.role_weight[i]
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+
+# --------------------------------------------------
+# Demo
+# --------------------------------------------------
+if __name__ == "__main__":
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{STORE_PREFIX}.bin")
+        gen = publish_store(path=path)
+        store = SharedStore(path)
+        print(f"Published generation {gen}: {os.path.getsize(path)} bytes, {len(store)} resources")
+        print("Roles:", list(store.role_names))
+        r, w = store.role_vectors("SDE")
+        r2, w2 = m2.get_role_vectors("SDE", m2.build_vocab())
+        assert np.array_equal(r, r2) and np.array_equal(w, w2)
+        assert store.catalog.to_dicts() == [
+            {**res, "coverage": {k: float(v) for k, v in res["coverage"].items()}} for res in m2.DEFAULT_RESOURCES
+        ]
+
+        m2.attach_role_matrices(store.role_names, store.role_required, store.role_weight, store.role_wr)
+        assert np.shares_memory(m2.get_role_kernel("SDE").wr, store.role_wr)
+        print("Role kernels are views into the segment")
+
+        publish_store(path=path)
+        t0 = time.perf_counter()
+        changed = store.refresh()
+        print(f"Reload picked up generation {store.generation} (changed={changed}) in {(time.perf_counter() - t0) * 1e6:.0f} us")
+        t0 = time.perf_counter()
+        for _ in range(10000):
+            store.refresh()
+        print(f"No-op refresh: {(time.perf_counter() - t0) * 1e6 / 10000:.2f} us")
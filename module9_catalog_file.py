@@ -0,0 +1,410 @@
+# module9_catalog_file.py
+"""
+Compact on-disk binary resource catalog, opened with mmap and no parse step.
+
+File layout (little endian):
+
+    header        : magic "SKGCATLG", u32 format version, u32 section count,
+                    u64 catalog version
+    sections      : one 80-byte entry per section
+                    (name[32], dtype[8], u32 ndim, 4 pad, u64 dim0, u64 dim1,
+                     u64 offset, u64 nbytes)
+    data          : section payloads, each 64-byte aligned
+
+    string tables : res.id / res.title / res.url (u8 blob + i64 offsets),
+                    res.type_names / res.icon_names / res.cov.skills
+    columns       : res.time (f8), res.type (u1 code), res.icon_type (u1 code)
+    coverage CSR  : res.cov.indptr (i8), res.cov.indices (i4 skill id),
+                    res.cov.data (f8), res.cov.rows (i4 resource of each entry)
+    by skill      : res.cov.by_skill (i8 CSR entries ordered by skill, then
+                    resource) and res.cov.skill_indptr (i8), the CSC side
+    id order      : res.id.order (i8 positions sorted by id), for lookups
+
+Opening maps the file and wraps every section with np.frombuffer; nothing is
+decoded until an entry is read. The recommender (module4_recommender) reads
+CatalogView columns directly: scoring a gap vector is one pass over the CSR
+arrays, and only the resources a plan ends up listing are decoded to dicts.
+Files written before the by-skill and id-order sections existed still open;
+those sections are then derived when the file is opened.
+
+    python module9_catalog_file.py convert <catalog.json> <catalog.skcat>
+    python module9_catalog_file.py bench [num_resources]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+import module2_models as m2
+import module14_synthetic as synthetic
+
+CATALOG_MAGIC = b"SKGCATLG"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+SECTION = struct.Struct("<32s8sI4xQQQQ")
+ALIGN = 64
+
+
+# --------------------------------------------------
+# Segment encoding
+# --------------------------------------------------
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def encode_segment(sections: Dict[str, np.ndarray], version: int, magic: bytes = CATALOG_MAGIC) -> bytes:
+    names = list(sections.keys())
+    arrays = [np.ascontiguousarray(sections[name]) for name in names]
+
+    offset = _align(HEADER.size + SECTION.size * len(names))
+    entries = []
+    for name, arr in zip(names, arrays):
+        if arr.ndim > 2:
+            raise ValueError(f"Section {name} has {arr.ndim} dims; at most 2 are supported")
+        encoded_name = name.encode("utf-8")
+        if len(encoded_name) > 32:
+            raise ValueError(f"Section name too long: {name}")
+        shape = tuple(arr.shape) + (0,) * (2 - arr.ndim)
+        entries.append(SECTION.pack(encoded_name, arr.dtype.str.encode("ascii"), arr.ndim,
+                                    shape[0], shape[1], offset, arr.nbytes))
+        offset = _align(offset + arr.nbytes)
+
+    buf = bytearray(offset)
+    HEADER.pack_into(buf, 0, magic, FORMAT_VERSION, len(names), version)
+    for i, entry in enumerate(entries):
+        buf[HEADER.size + i * SECTION.size: HEADER.size + (i + 1) * SECTION.size] = entry
+    for entry, arr in zip(entries, arrays):
+        _, _, _, _, _, data_offset, nbytes = SECTION.unpack(entry)
+        buf[data_offset:data_offset + nbytes] = arr.tobytes()
+    return bytes(buf)
+
+
+def decode_segment(buffer, magic: bytes = CATALOG_MAGIC) -> Tuple[int, Dict[str, np.ndarray]]:
+    """Zero-copy views over an encoded segment (bytes, mmap, memoryview...)."""
+    found, format_version, count, version = HEADER.unpack_from(buffer, 0)
+    if found != magic:
+        raise ValueError(f"Bad segment magic {found!r}, expected {magic!r}")
+    if format_version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported catalog format version: {format_version}")
+
+    sections: Dict[str, np.ndarray] = {}
+    for i in range(count):
+        name, dtype, ndim, dim0, dim1, offset, nbytes = SECTION.unpack_from(buffer, HEADER.size + i * SECTION.size)
+        dt = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+        arr = np.frombuffer(buffer, dtype=dt, count=nbytes // dt.itemsize, offset=offset)
+        if ndim == 2:
+            arr = arr.reshape(dim0, dim1)
+        sections[name.rstrip(b"\0").decode("utf-8")] = arr
+    return version, sections
+
+
+# --------------------------------------------------
+# String tables
+# --------------------------------------------------
+
+def encode_strings(prefix: str, values: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+    return {f"{prefix}.offsets": offsets, f"{prefix}.blob": blob}
+
+
+class StringTable:
+    """Read-only strings decoded on access from an offsets/blob section pair."""
+
+    def __init__(self, sections: Dict[str, np.ndarray], prefix: str):
+        self.offsets = sections[f"{prefix}.offsets"]
+        self.blob = sections[f"{prefix}.blob"]
+        self._lookup: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def index(self, value: str) -> int:
+        if self._lookup is None:
+            self._lookup = {s: i for i, s in enumerate(self)}
+        return self._lookup[value]
+
+
+# --------------------------------------------------
+# Compilation
+# --------------------------------------------------
+
+def _enum_code(codes: Dict[str, int], value: str) -> int:
+    code = codes.setdefault(value, len(codes))
+    if code > 255:
+        raise ValueError("At most 256 distinct resource types / icon types are supported")
+    return code
+
+
+def compile_catalog_sections(resources: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Resource catalog as columns: string tables for id/title/url, enum codes
+    for type/icon_type, a float64 time column and CSR coverage whose column
+    ids follow module2_models.SKILLS (unknown coverage skills are appended).
+    """
+    coverage_skills = [s for s, _ in sorted(m2.SKILLS.items(), key=lambda kv: kv[1]["id"])]
+    skill_ids = {s: i for i, s in enumerate(coverage_skills)}
+    types: Dict[str, int] = {}
+    icons: Dict[str, int] = {}
+
+    n = len(resources)
+    hours = np.zeros(n, dtype=np.float64)
+    type_codes = np.zeros(n, dtype=np.uint8)
+    icon_codes = np.zeros(n, dtype=np.uint8)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indices: List[int] = []
+    data: List[float] = []
+
+    for i, res in enumerate(resources):
+        hours[i] = float(res.get("time", 0.0) or 0.0)
+        type_codes[i] = _enum_code(types, res.get("type", "unknown"))
+        icon_codes[i] = _enum_code(icons, res.get("icon_type", "docs"))
+        for skill, cov in res.get("coverage", {}).items():
+            if skill not in skill_ids:
+                skill_ids[skill] = len(coverage_skills)
+                coverage_skills.append(skill)
+            indices.append(skill_ids[skill])
+            data.append(float(cov))
+        indptr[i + 1] = len(indices)
+
+    ids = [r["id"] for r in resources]
+    sections = {
+        "res.time": hours,
+        "res.type": type_codes,
+        "res.icon_type": icon_codes,
+        "res.cov.indptr": indptr,
+        "res.cov.indices": np.array(indices, dtype=np.int32),
+        "res.cov.data": np.array(data, dtype=np.float64),
+    }
+    sections.update(_derived_sections(sections, len(coverage_skills), ids))
+    sections.update(encode_strings("res.id", ids))
+    sections.update(encode_strings("res.title", [r.get("title", "") for r in resources]))
+    sections.update(encode_strings("res.url", [r.get("url", "") for r in resources]))
+    sections.update(encode_strings("res.type_names", list(types)))
+    sections.update(encode_strings("res.icon_names", list(icons)))
+    sections.update(encode_strings("res.cov.skills", coverage_skills))
+    return sections
+
+
+def _derived_sections(sections: Dict[str, np.ndarray], num_skills: int,
+                      ids: List[str]) -> Dict[str, np.ndarray]:
+    """The row, by-skill and id-order sections, derived from the CSR and the ids."""
+    indptr, indices = sections["res.cov.indptr"], sections["res.cov.indices"]
+    return {
+        "res.cov.rows": np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr)),
+        # Stable: a skill's entries stay in resource order
+        "res.cov.by_skill": np.argsort(indices, kind="stable").astype(np.int64),
+        "res.cov.skill_indptr": np.searchsorted(np.sort(indices), np.arange(num_skills + 1)).astype(np.int64),
+        "res.id.order": np.array(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.int64),
+    }
+
+
+def write_segment_file(path: str, payload: bytes) -> None:
+    """Atomically replaces `path` so attached readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".skcat-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+# --------------------------------------------------
+# Reading
+# --------------------------------------------------
+
+class CatalogView:
+    """
+    Column views over the sections written by compile_catalog_sections.
+    Indexing rebuilds one entry in the original dict shape; the recommender
+    works on the columns instead (coverage_dot, skill_coverage).
+    """
+
+    def __init__(self, sections: Dict[str, np.ndarray]):
+        self.ids = StringTable(sections, "res.id")
+        self.titles = StringTable(sections, "res.title")
+        self.urls = StringTable(sections, "res.url")
+        self.time = sections["res.time"]
+        self.type = sections["res.type"]
+        self.icon_type = sections["res.icon_type"]
+        self.type_names = StringTable(sections, "res.type_names")
+        self.icon_names = StringTable(sections, "res.icon_names")
+        self.coverage_skills = StringTable(sections, "res.cov.skills")
+        self.coverage_indptr = sections["res.cov.indptr"]
+        self.coverage_indices = sections["res.cov.indices"]
+        self.coverage_data = sections["res.cov.data"]
+        if "res.cov.rows" not in sections:
+            sections = dict(sections, **_derived_sections(sections, len(self.coverage_skills), list(self.ids)))
+        self.sections = sections
+        self.coverage_rows = sections["res.cov.rows"]
+        self.coverage_by_skill = sections["res.cov.by_skill"]
+        self.coverage_skill_indptr = sections["res.cov.skill_indptr"]
+        self.id_order = sections["res.id.order"]
+        # Decoded once: one short string per skill
+        self.coverage_skill_names = list(self.coverage_skills)
+        self.coverage_skill_ids = {skill: j for j, skill in enumerate(self.coverage_skill_names)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        """Rebuilds one catalog entry in the original dict shape."""
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i = int(i) % len(self)
+        start, end = self.coverage_indptr[i], self.coverage_indptr[i + 1]
+        return {
+            "id": self.ids[i],
+            "title": self.titles[i],
+            "url": self.urls[i],
+            "time": float(self.time[i]),
+            "coverage": {
+                self.coverage_skill_names[j]: c
+                for j, c in zip(self.coverage_indices[start:end].tolist(), self.coverage_data[start:end].tolist())
+            },
+            "type": self.type_names[int(self.type[i])],
+            "icon_type": self.icon_names[int(self.icon_type[i])],
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [self[i] for i in range(len(self))]
+
+    def find(self, resource_id: str) -> Optional[int]:
+        """Position of a resource id (binary search over res.id.order), or None."""
+        lo, hi = 0, len(self.id_order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ids[int(self.id_order[mid])] < resource_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.id_order) and self.ids[int(self.id_order[lo])] == resource_id:
+            return int(self.id_order[lo])
+        return None
+
+    def coverage_dot(self, values: Dict[str, float]) -> np.ndarray:
+        """
+        Per resource, sum(coverage[skill] * values[skill]) over its covered
+        skills (missing skills count 0), accumulated in coverage order.
+        """
+        by_column = np.array([values.get(skill, 0.0) for skill in self.coverage_skill_names])
+        return np.bincount(self.coverage_rows, weights=self.coverage_data * by_column[self.coverage_indices],
+                           minlength=len(self))
+
+    def skill_coverage(self, skill: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, coverage) of the resources covering `skill`, in catalog order."""
+        j = self.coverage_skill_ids.get(skill)
+        if j is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+        entries = self.coverage_by_skill[self.coverage_skill_indptr[j]:self.coverage_skill_indptr[j + 1]]
+        return self.coverage_rows[entries], self.coverage_data[entries]
+
+
+def write_catalog(resources: List[Dict[str, Any]], path: str, version: int = 1) -> int:
+    """Converts dict-format resources (as in DEFAULT_RESOURCES) to a catalog file. Returns its size."""
+    payload = encode_segment(compile_catalog_sections(resources), version)
+    write_segment_file(path, payload)
+    return len(payload)
+
+
+class BinaryCatalog(CatalogView):
+    """A catalog file mapped read-only; columns are zero-copy views into the mapping."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.version, sections = decode_segment(self._mm)
+        super().__init__(sections)
+
+
+def open_catalog(path: str) -> BinaryCatalog:
+    return BinaryCatalog(path)
+
+
+def convert_json(json_path: str, out_path: str) -> int:
+    with open(json_path) as f:
+        resources = json.load(f)
+    return write_catalog(resources, out_path)
+
+
+# --------------------------------------------------
+# Load-time benchmark
+# --------------------------------------------------
+
+def _synthetic_resources(n: int) -> List[Dict[str, Any]]:
+    skills = list(m2.SKILLS)
+    return synthetic.generate_resources(skills, synthetic.skill_popularity(len(skills)), n,
+                                        np.random.default_rng(0))
+
+
+def _timed(fn) -> Tuple[Any, float]:
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000.0
+
+
+def benchmark(n: int = 50000) -> None:
+    """
+    Load time of the JSON list against the mapped file, both as the app uses
+    it (columns) and fully decoded to dicts, plus one gap-vector scoring pass
+    over the dicts and over the CSR columns.
+    """
+    resources = _synthetic_resources(n)
+    gaps = {skill: 0.05 * (i % 7) for i, skill in enumerate(m2.SKILLS)}
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "catalog.json")
+        bin_path = os.path.join(tmp, "catalog.skcat")
+        with open(json_path, "w") as f:
+            json.dump(resources, f)
+        write_catalog(resources, bin_path)
+
+        def load_json():
+            with open(json_path) as f:
+                return json.load(f)
+
+        parsed, json_ms = _timed(load_json)
+        catalog, open_ms = _timed(lambda: open_catalog(bin_path))
+        decoded, decode_ms = _timed(lambda: open_catalog(bin_path).to_dicts())
+        dict_scores, dict_score_ms = _timed(lambda: [
+            sum(gaps[s] * float(c) for s, c in r["coverage"].items() if s in gaps) for r in parsed
+        ])
+        column_scores, column_score_ms = _timed(lambda: catalog.coverage_dot(gaps))
+
+        assert decoded == parsed
+        assert column_scores.tolist() == dict_scores
+
+        print(f"{n:,} resources")
+        print(f"  JSON   : {os.path.getsize(json_path) / 1e6:6.2f} MB, json.load           {json_ms:8.2f} ms")
+        print(f"  binary : {os.path.getsize(bin_path) / 1e6:6.2f} MB, open (columns)      {open_ms:8.2f} ms")
+        print(f"                     open + to_dicts()   {decode_ms:8.2f} ms")
+        print(f"  scoring one gap vector: dicts {dict_score_ms:.2f} ms, CSR columns {column_score_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "convert":
+        size = convert_json(sys.argv[2], sys.argv[3])
+        print(f"Wrote {sys.argv[3]} ({size} bytes)")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+    else:
+        print(__doc__)
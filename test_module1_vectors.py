@@ -0,0 +1,73 @@
+# test_module1_vectors.py
+"""
+float32 batch scores against the float64 reference (python -m pytest).
+"""
+
+import numpy as np
+import pytest
+
+import module1_vectors as m1
+import module2_models as m2
+import module3_evaluator as m3
+
+
+def _students(n: int = 20000) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    S = rng.random((n, len(m2.SKILLS)))
+    # Zero rows, the proficiency grid and the [0, 1] bounds
+    S[:100] = 0.0
+    S[100:1100] = rng.choice(m3.QUANTIZED_LEVELS, size=(1000, S.shape[1]))
+    S[1100:1200] = 1.0
+    return S
+
+
+@pytest.mark.parametrize("role", sorted(m2.ROLES))
+def test_float32_batch_matches_float64(role):
+    r, w = m2.get_role_vectors(role, m2.build_vocab())
+    S = _students()
+    S32 = S.astype(m1.BATCH_DTYPE)
+
+    ref_sims = m1.batch_weighted_cosine_similarity(S, r, w)
+    ref_gaps, ref_totals = m1.batch_weighted_gaps(S, r, w)
+
+    sims = m1.batch_weighted_cosine_similarity(S32, r, w)
+    gaps, totals = m1.batch_weighted_gaps(S32, r, w)
+    assert sims.dtype == m1.BATCH_DTYPE and totals.dtype == m1.BATCH_DTYPE
+    assert np.max(np.abs(sims - ref_sims)) < m1.FLOAT32_TOLERANCE
+    assert np.max(np.abs(gaps - ref_gaps)) < m1.FLOAT32_TOLERANCE
+    assert np.max(np.abs(totals - ref_totals)) < m1.FLOAT32_TOLERANCE
+
+
+@pytest.mark.parametrize("role", sorted(m2.ROLES))
+def test_float32_kernels_match_float64(role):
+    r, w = m2.get_role_vectors(role, m2.build_vocab())
+    kernel = m2.get_role_kernel(role)
+    S32 = _students().astype(m1.BATCH_DTYPE)
+    n = S32.shape[0]
+
+    sims = np.empty(n, dtype=m1.BATCH_DTYPE)
+    scratch = np.empty(n, dtype=m1.BATCH_DTYPE)
+    totals = np.empty(n, dtype=m1.BATCH_DTYPE)
+    G = np.empty_like(S32)
+    m1.batch_weighted_cosine_similarity_into(S32, kernel, sims, scratch)
+    m1.batch_weighted_gaps_into(S32, kernel, G, totals)
+
+    S = S32.astype(np.float64)
+    _, ref_totals = m1.batch_weighted_gaps(S, r, w)
+    assert np.max(np.abs(sims - m1.batch_weighted_cosine_similarity(S, r, w))) < m1.FLOAT32_TOLERANCE
+    assert np.max(np.abs(totals - ref_totals)) < m1.FLOAT32_TOLERANCE
+
+
+@pytest.mark.parametrize("role", sorted(m2.ROLES))
+def test_evaluate_students_batch_float32(role):
+    rng = np.random.default_rng(1)
+    skills = list(m2.SKILLS)
+    profiles = [
+        {skill: float(rng.random()) for skill in skills if rng.random() < 0.7}
+        for _ in range(500)
+    ]
+    exact = m3.evaluate_students_batch(profiles, role)
+    fast = m3.evaluate_students_batch(profiles, role, dtype=m1.BATCH_DTYPE)
+    for a, b in zip(fast, exact):
+        assert abs(a["alignment_score"] - b["alignment_score"]) < m1.FLOAT32_TOLERANCE
+        assert abs(a["readiness_score"] - b["readiness_score"]) < m1.FLOAT32_TOLERANCE
@@ -0,0 +1,38 @@
+# test_module4_recommender.py
+"""
+Pareto plan options against the evaluator (python -m pytest).
+"""
+
+import pytest
+
+import module2_models as m2
+import module3_evaluator as m3
+import module4_recommender as m4
+
+# Two resources covering the same skill: together they close 1 - 0.2 * 0.5
+# of the DSA gap, not 0.8 + 0.5 of it
+OVERLAPPING = [
+    {"id": "dsa_drills", "title": "DSA drills", "url": "", "time": 2.0,
+     "coverage": {"DSA": 0.8}, "type": "practice", "icon_type": "code"},
+    {"id": "dsa_course", "title": "DSA course", "url": "", "time": 3.0,
+     "coverage": {"DSA": 0.5}, "type": "course", "icon_type": "book"},
+]
+
+
+def test_pareto_readiness_gain_counts_overlap_once():
+    role = "SDE"
+    profile = {"DSA": 0.0, "OS": 0.6, "C++": 0.4}
+    evaluation = m3.evaluate_student(profile, role)
+
+    options = m4.pareto_learning_plans(evaluation, OVERLAPPING, m2.ROLES[role], profile, max_plans=8)
+    both = [option for option in options if len(option["plan"]["selected_resources"]) == 2]
+    assert len(both) == 1
+
+    # Readiness of the profile after both resources, under the same gain model
+    required = m2.ROLES[role]["DSA"]["required"]
+    finished = dict(profile, DSA=required - required * (1 - 0.8) * (1 - 0.5))
+    expected = m3.evaluate_student(finished, role)["readiness_score"] - evaluation["readiness_score"]
+
+    total_required = sum(spec["required"] * spec["weight"] for spec in m2.ROLES[role].values())
+    assert both[0]["readiness_gain"] == pytest.approx(expected)
+    assert both[0]["readiness_gain"] < both[0]["benefit"] / total_required